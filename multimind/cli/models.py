@@ -12,9 +12,8 @@ from rich.table import Table
 from rich.progress import Progress
 
 from ..core.models import ModelResponse
-from ..gateway.models import get_model_handler
+from ..gateway.models import get_model_handler, handler_registry
 from ..gateway.monitoring import monitor
-from ..gateway.config import config
 
 console = Console()
 
@@ -133,8 +132,8 @@ def health(model: Optional[str]):
             else:
                 # Check all configured models
                 status = {}
-                for model_name in config.validate().keys():
-                    if config.validate()[model_name]:
+                for model_name, is_valid in handler_registry.validate().items():
+                    if is_valid:
                         handler = get_model_handler(model_name)
                         health = asyncio.run(monitor.check_health(model_name, handler))
                         status[model_name] = health
@@ -9,6 +9,7 @@ from pathlib import Path
 from datetime import datetime
 import asyncio
 from pydantic import BaseModel
+from ..core.http_pool import HTTPClientPool, http_pool as default_http_pool
 
 class Document(BaseModel):
     text: str
@@ -33,7 +34,8 @@ class RAGClient:
         self,
         base_url: str = "http://localhost:8000",
         api_key: Optional[str] = None,
-        token: Optional[str] = None
+        token: Optional[str] = None,
+        http_pool: Optional[HTTPClientPool] = None
     ):
         """Initialize the RAG client.
 
@@ -41,8 +43,10 @@ class RAGClient:
             base_url: Base URL of the RAG API
             api_key: API key for authentication
             token: JWT token for authentication
+            http_pool: Pool of keep-alive HTTP sessions (shared by default)
         """
         self.base_url = base_url.rstrip("/")
+        self.http_pool = http_pool or default_http_pool
         self.headers = {}
         if api_key:
             self.headers["X-API-Key"] = api_key
@@ -59,16 +63,16 @@ class RAGClient:
         Returns:
             Access token
         """
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                f"{self.base_url}/token",
-                data={"username": username, "password": password}
-            ) as response:
-                if response.status != 200:
-                    raise Exception(f"Login failed: {await response.text()}")
-                data = await response.json()
-                self.headers["Authorization"] = f"Bearer {data['access_token']}"
-                return data["access_token"]
+        session = self.http_pool.get_session(self.base_url)
+        async with session.post(
+            f"{self.base_url}/token",
+            data={"username": username, "password": password}
+        ) as response:
+            if response.status != 200:
+                raise Exception(f"Login failed: {await response.text()}")
+            data = await response.json()
+            self.headers["Authorization"] = f"Bearer {data['access_token']}"
+            return data["access_token"]
 
     async def add_documents(
         self,
@@ -82,15 +86,15 @@ class RAGClient:
         Returns:
             Response from the API
         """
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                f"{self.base_url}/documents",
-                json={"documents": [doc.dict() for doc in documents]},
-                headers=self.headers
-            ) as response:
-                if response.status != 200:
-                    raise Exception(f"Failed to add documents: {await response.text()}")
-                return await response.json()
+        session = self.http_pool.get_session(self.base_url)
+        async with session.post(
+            f"{self.base_url}/documents",
+            json={"documents": [doc.dict() for doc in documents]},
+            headers=self.headers
+        ) as response:
+            if response.status != 200:
+                raise Exception(f"Failed to add documents: {await response.text()}")
+            return await response.json()
 
     async def add_file(
         self,
@@ -110,24 +114,24 @@ class RAGClient:
         if not file_path.exists():
             raise FileNotFoundError(f"File not found: {file_path}")
 
-        async with aiohttp.ClientSession() as session:
-            data = aiohttp.FormData()
-            data.add_field(
-                "file",
-                file_path.open("rb"),
-                filename=file_path.name
-            )
-            if metadata:
-                data.add_field("metadata", json.dumps(metadata))
-
-            async with session.post(
-                f"{self.base_url}/files",
-                data=data,
-                headers=self.headers
-            ) as response:
-                if response.status != 200:
-                    raise Exception(f"Failed to add file: {await response.text()}")
-                return await response.json()
+        session = self.http_pool.get_session(self.base_url)
+        data = aiohttp.FormData()
+        data.add_field(
+            "file",
+            file_path.open("rb"),
+            filename=file_path.name
+        )
+        if metadata:
+            data.add_field("metadata", json.dumps(metadata))
+
+        async with session.post(
+            f"{self.base_url}/files",
+            data=data,
+            headers=self.headers
+        ) as response:
+            if response.status != 200:
+                raise Exception(f"Failed to add file: {await response.text()}")
+            return await response.json()
 
     async def query(
         self,
@@ -151,15 +155,15 @@ class RAGClient:
             filter_metadata=filter_metadata
         )
 
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                f"{self.base_url}/query",
-                json=request.dict(),
-                headers=self.headers
-            ) as response:
-                if response.status != 200:
-                    raise Exception(f"Query failed: {await response.text()}")
-                return await response.json()
+        session = self.http_pool.get_session(self.base_url)
+        async with session.post(
+            f"{self.base_url}/query",
+            json=request.dict(),
+            headers=self.headers
+        ) as response:
+            if response.status != 200:
+                raise Exception(f"Query failed: {await response.text()}")
+            return await response.json()
 
     async def generate(
         self,
@@ -189,15 +193,15 @@ class RAGClient:
             filter_metadata=filter_metadata
         )
 
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                f"{self.base_url}/generate",
-                json=request.dict(),
-                headers=self.headers
-            ) as response:
-                if response.status != 200:
-                    raise Exception(f"Generation failed: {await response.text()}")
-                return await response.json()
+        session = self.http_pool.get_session(self.base_url)
+        async with session.post(
+            f"{self.base_url}/generate",
+            json=request.dict(),
+            headers=self.headers
+        ) as response:
+            if response.status != 200:
+                raise Exception(f"Generation failed: {await response.text()}")
+            return await response.json()
 
     async def clear_documents(self) -> Dict[str, Any]:
         """Clear all documents from the RAG system.
@@ -205,14 +209,14 @@ class RAGClient:
         Returns:
             Response from the API
         """
-        async with aiohttp.ClientSession() as session:
-            async with session.delete(
-                f"{self.base_url}/documents",
-                headers=self.headers
-            ) as response:
-                if response.status != 200:
-                    raise Exception(f"Failed to clear documents: {await response.text()}")
-                return await response.json()
+        session = self.http_pool.get_session(self.base_url)
+        async with session.delete(
+            f"{self.base_url}/documents",
+            headers=self.headers
+        ) as response:
+            if response.status != 200:
+                raise Exception(f"Failed to clear documents: {await response.text()}")
+            return await response.json()
 
     async def get_document_count(self) -> int:
         """Get the number of documents in the RAG system.
@@ -220,15 +224,15 @@ class RAGClient:
         Returns:
             Number of documents
         """
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                f"{self.base_url}/documents/count",
-                headers=self.headers
-            ) as response:
-                if response.status != 200:
-                    raise Exception(f"Failed to get document count: {await response.text()}")
-                data = await response.json()
-                return data["count"]
+        session = self.http_pool.get_session(self.base_url)
+        async with session.get(
+            f"{self.base_url}/documents/count",
+            headers=self.headers
+        ) as response:
+            if response.status != 200:
+                raise Exception(f"Failed to get document count: {await response.text()}")
+            data = await response.json()
+            return data["count"]
 
     async def switch_model(
         self,
@@ -244,19 +248,19 @@ class RAGClient:
         Returns:
             Response from the API
         """
-        async with aiohttp.ClientSession() as session:
-            data = aiohttp.FormData()
-            data.add_field("model_type", model_type)
-            data.add_field("model_name", model_name)
-
-            async with session.post(
-                f"{self.base_url}/models/switch",
-                data=data,
-                headers=self.headers
-            ) as response:
-                if response.status != 200:
-                    raise Exception(f"Failed to switch model: {await response.text()}")
-                return await response.json()
+        session = self.http_pool.get_session(self.base_url)
+        data = aiohttp.FormData()
+        data.add_field("model_type", model_type)
+        data.add_field("model_name", model_name)
+
+        async with session.post(
+            f"{self.base_url}/models/switch",
+            data=data,
+            headers=self.headers
+        ) as response:
+            if response.status != 200:
+                raise Exception(f"Failed to switch model: {await response.text()}")
+            return await response.json()
 
     async def health_check(self) -> Dict[str, Any]:
         """Check the health of the RAG system.
@@ -264,11 +268,11 @@ class RAGClient:
         Returns:
             Health status
         """
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                f"{self.base_url}/health",
-                headers=self.headers
-            ) as response:
-                if response.status != 200:
-                    raise Exception(f"Health check failed: {await response.text()}")
-                return await response.json()
\ No newline at end of file
+        session = self.http_pool.get_session(self.base_url)
+        async with session.get(
+            f"{self.base_url}/health",
+            headers=self.headers
+        ) as response:
+            if response.status != 200:
+                raise Exception(f"Health check failed: {await response.text()}")
+            return await response.json()
\ No newline at end of file
@@ -4,12 +4,15 @@ Core chat functionality for MultiMind
 
 import json
 import logging
+import sqlite3
+import threading
 import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Union
-from dataclasses import dataclass, asdict
-from pydantic import BaseModel
+from typing import Callable, Dict, List, Optional, Union
+from pydantic import BaseModel, Field, PrivateAttr
 
 logger = logging.getLogger(__name__)
 
@@ -17,31 +20,36 @@ class ChatMessage(BaseModel):
     """A single chat message"""
     role: str
     content: str
-    model: str
-    timestamp: datetime = datetime.now()
+    model: Optional[str] = None
+    timestamp: datetime = Field(default_factory=datetime.now)
     metadata: Dict = {}
 
 class ChatSession(BaseModel):
     """A chat session with history and metadata"""
     session_id: str
     model: str
-    created_at: datetime = datetime.now()
-    updated_at: datetime = datetime.now()
+    created_at: datetime = Field(default_factory=datetime.now)
+    updated_at: datetime = Field(default_factory=datetime.now)
     messages: List[ChatMessage] = []
     metadata: Dict = {}
     system_prompt: Optional[str] = None
+    # Called with each new message so a store can persist it
+    _on_message: Optional[Callable[["ChatSession", ChatMessage], None]] = PrivateAttr(default=None)
 
-    def add_message(self, role: str, content: str, model: str, metadata: Optional[Dict[str, Union[str, int, float]]] = None) -> None:
+    def add_message(self, role: str, content: str, model: Optional[str] = None, metadata: Optional[Dict[str, Union[str, int, float]]] = None) -> None:
         """Add a message to the session"""
         if metadata is None:
             metadata = {}
-        self.messages.append(ChatMessage(
+        message = ChatMessage(
             role=role,
             content=content,
             model=model,
             metadata=metadata
-        ))
+        )
+        self.messages.append(message)
         self.updated_at = datetime.now()
+        if self._on_message is not None:
+            self._on_message(self, message)
 
     def get_context(self, max_messages: int = 10) -> List[Dict[str, str]]:
         """Get recent messages for context"""
@@ -51,9 +59,9 @@ class ChatSession(BaseModel):
     def export(self, format: str = "json") -> Union[str, Dict]:
         """Export session to different formats"""
         if format == "json":
-            return json.dumps(asdict(self), default=str)
+            return self.model_dump_json()
         elif format == "dict":
-            return asdict(self)
+            return self.model_dump()
         else:
             raise ValueError(f"Unsupported export format: {format}")
 
@@ -61,13 +69,7 @@ class ChatSession(BaseModel):
     def from_file(cls, file_path: Union[str, Path]) -> "ChatSession":
         """Load session from file"""
         with open(file_path, "r") as f:
-            data = json.load(f)
-            # Convert string timestamps back to datetime
-            for key in ["created_at", "updated_at"]:
-                data[key] = datetime.fromisoformat(data[key])
-            for msg in data["messages"]:
-                msg["timestamp"] = datetime.fromisoformat(msg["timestamp"])
-            return cls(**data)
+            return cls.model_validate(json.load(f))
 
     def save(self, directory: Union[str, Path]) -> Path:
         """Save session to file"""
@@ -75,16 +77,278 @@ class ChatSession(BaseModel):
         directory.mkdir(parents=True, exist_ok=True)
         file_path = directory / f"chat_{self.session_id}.json"
         with open(file_path, "w") as f:
-            json.dump(asdict(self), f, default=str, indent=2)
+            f.write(self.model_dump_json())
         return file_path
 
+def _session_summary(session: ChatSession) -> Dict:
+    return {
+        "session_id": session.session_id,
+        "model": session.model,
+        "created_at": session.created_at,
+        "updated_at": session.updated_at,
+        "message_count": len(session.messages)
+    }
+
+class SessionStore(ABC):
+    """Persistence backend for chat sessions"""
+
+    path: Path
+
+    @abstractmethod
+    def save_session(self, session: ChatSession) -> None:
+        """Create or update a session's metadata"""
+        pass
+
+    @abstractmethod
+    def append_message(self, session: ChatSession, message: ChatMessage) -> None:
+        """Persist a message just added to a session"""
+        pass
+
+    @abstractmethod
+    def load_session(self, session_id: str) -> Optional[ChatSession]:
+        """Load a session with its messages"""
+        pass
+
+    @abstractmethod
+    def list_sessions(self, limit: Optional[int] = None, offset: int = 0) -> List[Dict]:
+        """List session summaries, most recently updated first"""
+        pass
+
+    @abstractmethod
+    def count_sessions(self) -> int:
+        """Number of stored sessions"""
+        pass
+
+    @abstractmethod
+    def delete_session(self, session_id: str) -> bool:
+        """Delete a session and its messages"""
+        pass
+
+    def close(self) -> None:
+        """Release any resources held by the store"""
+        pass
+
+class JSONSessionStore(SessionStore):
+    """One JSON file per session; rewrites the file on every change"""
+
+    def __init__(self, directory: Union[str, Path]):
+        self.path = Path(directory)
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    def _file(self, session_id: str) -> Path:
+        return self.path / f"chat_{session_id}.json"
+
+    def save_session(self, session: ChatSession) -> None:
+        session.save(self.path)
+
+    def append_message(self, session: ChatSession, message: ChatMessage) -> None:
+        session.save(self.path)
+
+    def load_session(self, session_id: str) -> Optional[ChatSession]:
+        file_path = self._file(session_id)
+        if not file_path.exists():
+            return None
+        return ChatSession.from_file(file_path)
+
+    def list_sessions(self, limit: Optional[int] = None, offset: int = 0) -> List[Dict]:
+        sessions = [_session_summary(ChatSession.from_file(f)) for f in self.path.glob("chat_*.json")]
+        sessions.sort(key=lambda s: s["updated_at"], reverse=True)
+        end = offset + limit if limit is not None else None
+        return sessions[offset:end]
+
+    def count_sessions(self) -> int:
+        return sum(1 for _ in self.path.glob("chat_*.json"))
+
+    def delete_session(self, session_id: str) -> bool:
+        file_path = self._file(session_id)
+        if file_path.exists():
+            file_path.unlink()
+            return True
+        return False
+
+class SQLiteSessionStore(SessionStore):
+    """
+    SQLite session store in WAL mode.
+
+    Messages are append-only rows; session rows keep a message count and are
+    indexed by update time, so listing never touches message data.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        with self._conn:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    session_id TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL,
+                    system_prompt TEXT,
+                    metadata TEXT NOT NULL DEFAULT '{}',
+                    message_count INTEGER NOT NULL DEFAULT 0
+                );
+                CREATE INDEX IF NOT EXISTS ix_sessions_updated_at ON sessions (updated_at);
+                CREATE TABLE IF NOT EXISTS messages (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    session_id TEXT NOT NULL REFERENCES sessions (session_id) ON DELETE CASCADE,
+                    role TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    model TEXT,
+                    timestamp TEXT NOT NULL,
+                    metadata TEXT NOT NULL DEFAULT '{}'
+                );
+                CREATE INDEX IF NOT EXISTS ix_messages_session_id ON messages (session_id, id);
+            """)
+
+    def save_session(self, session: ChatSession) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT INTO sessions (session_id, model, created_at, updated_at, system_prompt, metadata, message_count)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (session_id) DO UPDATE SET
+                    model = excluded.model,
+                    updated_at = excluded.updated_at,
+                    system_prompt = excluded.system_prompt,
+                    metadata = excluded.metadata
+                """,
+                (
+                    session.session_id,
+                    session.model,
+                    session.created_at.isoformat(),
+                    session.updated_at.isoformat(),
+                    session.system_prompt,
+                    json.dumps(session.metadata, default=str),
+                    len(session.messages)
+                )
+            )
+
+    def append_message(self, session: ChatSession, message: ChatMessage) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO messages (session_id, role, content, model, timestamp, metadata) VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    session.session_id,
+                    message.role,
+                    message.content,
+                    message.model,
+                    message.timestamp.isoformat(),
+                    json.dumps(message.metadata, default=str)
+                )
+            )
+            self._conn.execute(
+                "UPDATE sessions SET updated_at = ?, message_count = message_count + 1 WHERE session_id = ?",
+                (session.updated_at.isoformat(), session.session_id)
+            )
+
+    def import_session(self, session: ChatSession) -> None:
+        """Write a whole session, replacing any stored copy"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session.session_id,))
+        self.save_session(session)
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO messages (session_id, role, content, model, timestamp, metadata) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (session.session_id, m.role, m.content, m.model, m.timestamp.isoformat(), json.dumps(m.metadata, default=str))
+                    for m in session.messages
+                ]
+            )
+
+    def load_session(self, session_id: str) -> Optional[ChatSession]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT session_id, model, created_at, updated_at, system_prompt, metadata FROM sessions WHERE session_id = ?",
+                (session_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            messages = self._conn.execute(
+                "SELECT role, content, model, timestamp, metadata FROM messages WHERE session_id = ? ORDER BY id",
+                (session_id,)
+            ).fetchall()
+        return ChatSession(
+            session_id=row[0],
+            model=row[1],
+            created_at=datetime.fromisoformat(row[2]),
+            updated_at=datetime.fromisoformat(row[3]),
+            system_prompt=row[4],
+            metadata=json.loads(row[5]),
+            messages=[
+                ChatMessage(
+                    role=role,
+                    content=content,
+                    model=model,
+                    timestamp=datetime.fromisoformat(timestamp),
+                    metadata=json.loads(metadata)
+                )
+                for role, content, model, timestamp, metadata in messages
+            ]
+        )
+
+    def list_sessions(self, limit: Optional[int] = None, offset: int = 0) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT session_id, model, created_at, updated_at, message_count FROM sessions
+                ORDER BY updated_at DESC LIMIT ? OFFSET ?
+                """,
+                (limit if limit is not None else -1, offset)
+            ).fetchall()
+        return [
+            {
+                "session_id": session_id,
+                "model": model,
+                "created_at": datetime.fromisoformat(created_at),
+                "updated_at": datetime.fromisoformat(updated_at),
+                "message_count": message_count
+            }
+            for session_id, model, created_at, updated_at, message_count in rows
+        ]
+
+    def count_sessions(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def delete_session(self, session_id: str) -> bool:
+        with self._lock, self._conn:
+            cursor = self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+        return cursor.rowcount > 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
 class ChatManager:
     """Manage chat sessions and persistence"""
 
-    def __init__(self, storage_dir: Union[str, Path] = "chat_sessions"):
+    def __init__(
+        self,
+        storage_dir: Union[str, Path] = "chat_sessions",
+        store: Optional[SessionStore] = None,
+        max_active_sessions: int = 1000
+    ):
         self.storage_dir = Path(storage_dir)
         self.storage_dir.mkdir(parents=True, exist_ok=True)
-        self.active_sessions: Dict[str, ChatSession] = {}
+        self.store = store or SQLiteSessionStore(self.storage_dir / "sessions.db")
+        # Bounded LRU of hot sessions; everything else lives in the store
+        self.max_active_sessions = max_active_sessions
+        self.active_sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+
+    def _activate(self, session: ChatSession) -> ChatSession:
+        """Cache a session and persist its new messages through the store"""
+        session._on_message = self.store.append_message
+        self.active_sessions[session.session_id] = session
+        self.active_sessions.move_to_end(session.session_id)
+        while len(self.active_sessions) > self.max_active_sessions:
+            self.active_sessions.popitem(last=False)
+        return session
 
     def create_session(
         self,
@@ -99,57 +363,86 @@ class ChatManager:
             system_prompt=system_prompt,
             metadata=metadata or {}
         )
-        self.active_sessions[session.session_id] = session
-        return session
+        self.store.save_session(session)
+        return self._activate(session)
 
     def get_session(self, session_id: str) -> Optional[ChatSession]:
-        """Get an active session by ID"""
-        return self.active_sessions.get(session_id)
+        """Get a session by ID, loading it from storage if it isn't active"""
+        session = self.active_sessions.get(session_id)
+        if session is not None:
+            self.active_sessions.move_to_end(session_id)
+            return session
+        return self.load_session(session_id)
 
-    def list_sessions(self) -> List[Dict]:
-        """List all active sessions"""
-        return [
-            {
-                "session_id": session.session_id,
-                "model": session.model,
-                "created_at": session.created_at,
-                "updated_at": session.updated_at,
-                "message_count": len(session.messages)
-            }
-            for session in self.active_sessions.values()
-        ]
+    def list_sessions(self, limit: Optional[int] = None, offset: int = 0) -> List[Dict]:
+        """List stored sessions, most recently updated first"""
+        return self.store.list_sessions(limit=limit, offset=offset)
+
+    def count_sessions(self) -> int:
+        """Number of stored sessions"""
+        return self.store.count_sessions()
 
     def load_session(self, session_id: str) -> Optional[ChatSession]:
         """Load a session from storage"""
+        try:
+            session = self.store.load_session(session_id)
+            if session is None:
+                session = self._import_legacy_session(session_id)
+            if session is not None:
+                return self._activate(session)
+        except Exception as e:
+            logger.error(f"Error loading session {session_id}: {e}")
+        return None
+
+    def _legacy_file(self, session_id: str) -> Optional[Path]:
+        """A chat_{id}.json session left over from the JSON store, if there is one to import"""
         file_path = self.storage_dir / f"chat_{session_id}.json"
-        if file_path.exists():
+        if not file_path.exists() or not isinstance(self.store, SQLiteSessionStore):
+            return None
+        return file_path
+
+    def _import_legacy_session(self, session_id: str) -> Optional[ChatSession]:
+        """Move a session saved as chat_{id}.json into the store"""
+        file_path = self._legacy_file(session_id)
+        if file_path is None:
+            return None
+        session = ChatSession.from_file(file_path)
+        self.store.import_session(session)
+        file_path.unlink()
+        return session
+
+    def migrate_json_sessions(self) -> int:
+        """Import all legacy chat_{id}.json sessions into the store"""
+        migrated = 0
+        for file_path in self.storage_dir.glob("chat_*.json"):
+            session_id = file_path.stem[len("chat_"):]
             try:
-                session = ChatSession.from_file(file_path)
-                self.active_sessions[session.session_id] = session
-                return session
+                if self._import_legacy_session(session_id) is not None:
+                    migrated += 1
             except Exception as e:
-                logger.error(f"Error loading session {session_id}: {e}")
-        return None
+                logger.error(f"Error migrating session {session_id}: {e}")
+        return migrated
 
     def save_session(self, session_id: str) -> Optional[Path]:
-        """Save a session to storage"""
+        """Save a session's metadata to storage; messages are stored as they are added"""
         session = self.active_sessions.get(session_id)
         if session:
             try:
-                return session.save(self.storage_dir)
+                self.store.save_session(session)
+                return self.store.path
             except Exception as e:
                 logger.error(f"Error saving session {session_id}: {e}")
         return None
 
     def delete_session(self, session_id: str) -> bool:
-        """Delete a session"""
-        if session_id in self.active_sessions:
-            del self.active_sessions[session_id]
-            file_path = self.storage_dir / f"chat_{session_id}.json"
-            if file_path.exists():
-                file_path.unlink()
-            return True
-        return False
+        """Delete a session, including one still only in a legacy JSON file"""
+        was_active = self.active_sessions.pop(session_id, None) is not None
+        deleted = self.store.delete_session(session_id)
+        legacy_file = self._legacy_file(session_id)
+        if legacy_file is not None:
+            legacy_file.unlink()
+            deleted = True
+        return deleted or was_active
 
 # Global chat manager instance
-chat_manager = ChatManager() 
\ No newline at end of file
+chat_manager = ChatManager()
@@ -32,4 +32,8 @@ class ConfigurationError(MultiMindError):
 
 class ValidationError(MultiMindError):
     """Raised when there's a validation error."""
-    pass 
\ No newline at end of file
+    pass
+
+class RateLimitError(MultiMindError):
+    """Raised when a request cannot be admitted within its rate limits."""
+    pass
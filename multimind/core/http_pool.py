@@ -0,0 +1,74 @@
+"""
+Shared, pooled HTTP client sessions.
+"""
+
+import asyncio
+from typing import Dict, Optional, Tuple
+
+import aiohttp
+
+
+class HTTPClientPool:
+    """
+    Lifecycle-managed aiohttp sessions shared per base URL.
+
+    Each session keeps a bounded pool of keep-alive connections, so repeated
+    requests to the same server skip connection and TLS setup. Sessions are
+    bound to the event loop that created them and recreated on a new loop.
+    """
+
+    def __init__(
+        self,
+        limit: int = 100,
+        limit_per_host: int = 0,
+        keepalive_timeout: float = 30.0,
+        timeout: Optional[float] = None
+    ):
+        """
+        Args:
+            limit: Maximum open connections per session (0 = unlimited)
+            limit_per_host: Maximum open connections per host (0 = unlimited)
+            keepalive_timeout: Seconds an idle connection is kept open
+            timeout: Total request timeout in seconds (None = aiohttp default)
+        """
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = timeout
+        self._sessions: Dict[str, Tuple[asyncio.AbstractEventLoop, aiohttp.ClientSession]] = {}
+
+    def get_session(self, base_url: str) -> aiohttp.ClientSession:
+        """Get the shared session for a base URL, creating it on first use."""
+        key = base_url.rstrip("/")
+        loop = asyncio.get_event_loop()
+        entry = self._sessions.get(key)
+        if entry is None or entry[0] is not loop or entry[1].closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout
+            )
+            session_kwargs = {"connector": connector}
+            if self.timeout is not None:
+                session_kwargs["timeout"] = aiohttp.ClientTimeout(total=self.timeout)
+            entry = (loop, aiohttp.ClientSession(**session_kwargs))
+            self._sessions[key] = entry
+        return entry[1]
+
+    async def close(self) -> None:
+        """Close all sessions owned by the running event loop."""
+        loop = asyncio.get_event_loop()
+        sessions, self._sessions = self._sessions, {}
+        for session_loop, session in sessions.values():
+            # Sessions from a finished loop can't be closed from this one
+            if session_loop is loop and not session.closed:
+                await session.close()
+
+    async def __aenter__(self) -> "HTTPClientPool":
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.close()
+
+# Global pool instance
+http_pool = HTTPClientPool()
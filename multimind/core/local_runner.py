@@ -2,11 +2,11 @@
 Local model runner for Ollama and other local model implementations.
 """
 
-import aiohttp
 import json
 from typing import List, Dict, Any, Optional, AsyncGenerator, Union, TypeVar, Awaitable
 
 from .base import BaseLLM
+from .http_pool import HTTPClientPool, http_pool as default_http_pool
 
 T = TypeVar('T')
 
@@ -17,10 +17,13 @@ class LocalRunner(BaseLLM):
         self,
         model_name: str,
         base_url: str = "http://localhost:11434",
+        http_pool: Optional[HTTPClientPool] = None,
         **kwargs
     ):
         super().__init__(model_name, **kwargs)
         self.base_url = base_url.rstrip("/")
+        # Connections are pooled and kept alive across requests
+        self.http_pool = http_pool or default_http_pool
 
     async def _make_request_stream(
         self,
@@ -28,12 +31,12 @@ class LocalRunner(BaseLLM):
         data: Dict[str, Any]
     ) -> AsyncGenerator[Dict[str, Any], None]:
         """Make a streaming request to the Ollama API."""
-        async with aiohttp.ClientSession() as session:
-            url = f"{self.base_url}/{endpoint}"
-            async with session.post(url, json=data) as response:
-                async for line in response.content:
-                    if line:
-                        yield json.loads(line)
+        session = self.http_pool.get_session(self.base_url)
+        url = f"{self.base_url}/{endpoint}"
+        async with session.post(url, json=data) as response:
+            async for line in response.content:
+                if line.strip():
+                    yield json.loads(line)
 
     async def _make_request(
         self,
@@ -41,10 +44,10 @@ class LocalRunner(BaseLLM):
         data: Dict[str, Any]
     ) -> Dict[str, Any]:
         """Make a regular request to the Ollama API."""
-        async with aiohttp.ClientSession() as session:
-            url = f"{self.base_url}/{endpoint}"
-            async with session.post(url, json=data) as response:
-                return await response.json()
+        session = self.http_pool.get_session(self.base_url)
+        url = f"{self.base_url}/{endpoint}"
+        async with session.post(url, json=data) as response:
+            return await response.json()
 
     async def generate(
         self,
@@ -2,10 +2,11 @@
 Core model functionality for MultiMind
 """
 
+import inspect
 import json
 import logging
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional, Union
+from typing import Dict, List, Optional, Union, AsyncGenerator
 from dataclasses import dataclass
 from datetime import datetime
 
@@ -35,4 +36,22 @@ class ModelHandler(ABC):
     @abstractmethod
     async def generate(self, prompt: str, **kwargs) -> ModelResponse:
         """Generate text from a prompt"""
-        pass 
\ No newline at end of file
+        pass
+
+    async def close(self) -> None:
+        """Close the handler's SDK client, if it holds one"""
+        close = getattr(self._client, "close", None)
+        if close is not None:
+            result = close()
+            if inspect.isawaitable(result):
+                await result
+
+    async def chat_stream(self, messages: List[Dict[str, str]], **kwargs) -> AsyncGenerator[str, None]:
+        """Stream a chat response as text chunks; yields the full response by default"""
+        response = await self.chat(messages, **kwargs)
+        yield response.content
+
+    async def generate_stream(self, prompt: str, **kwargs) -> AsyncGenerator[str, None]:
+        """Stream text generated from a prompt"""
+        async for text in self.chat_stream([{"role": "user", "content": prompt}], **kwargs):
+            yield text 
\ No newline at end of file
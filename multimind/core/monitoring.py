@@ -5,11 +5,12 @@ Core monitoring functionality for MultiMind
 import time
 import logging
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass, field
-from collections import defaultdict
+from collections import defaultdict, deque, OrderedDict
 import asyncio
 from pydantic import BaseModel
+from .exceptions import RateLimitError
 
 logger = logging.getLogger(__name__)
 
@@ -33,8 +34,55 @@ class ModelHealth(BaseModel):
     latency_ms: Optional[float] = None
     uptime_percentage: float = 100.0
 
+class TokenBucket:
+    """Token bucket holding up to ``capacity`` tokens, refilled at ``rate`` tokens per second."""
+
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def available(self) -> float:
+        """Tokens currently available (negative while repaying an oversized request)."""
+        self._refill()
+        return self.tokens
+
+    def time_until(self, amount: float) -> float:
+        """Seconds until ``amount`` tokens can be consumed; 0.0 if they can be now."""
+        if self.capacity <= 0:
+            # A zero limit admits nothing, ever
+            return float("inf")
+        # Requests larger than the bucket are admitted once it is full
+        amount = min(amount, self.capacity)
+        deficit = amount - self.available()
+        if deficit <= 0:
+            return 0.0
+        return deficit / self.rate if self.rate > 0 else float("inf")
+
+    def consume(self, amount: float) -> None:
+        """Take ``amount`` tokens; the balance may go negative for oversized requests."""
+        self._refill()
+        self.tokens -= amount
+
+def _utilization(bucket: TokenBucket) -> float:
+    """Share of a bucket's budget in use; a zero-capacity bucket is always exhausted."""
+    if bucket.capacity <= 0:
+        return 1.0
+    return 1.0 - bucket.available() / bucket.capacity
+
 class ModelMonitor:
-    """Monitor model health, usage, and performance"""
+    """
+    Monitor model health, usage, and performance
+
+    Rate limits are opt-in: only models configured with ``set_rate_limits``
+    are throttled; every other model is always admitted.
+    """
 
     def __init__(self):
         self.metrics: Dict[str, ModelMetrics] = defaultdict(ModelMetrics)
@@ -46,6 +94,12 @@ class ModelMonitor:
             }
         )
         self._lock = asyncio.Lock()
+        # Models whose limits were set explicitly; only these are enforced
+        self._limited_models = set()
+        # Rate limiting state: (requests, tokens) buckets and per-tenant wait queues per model
+        self._buckets: Dict[str, Tuple[TokenBucket, TokenBucket]] = {}
+        self._queues: Dict[str, "OrderedDict[str, deque]"] = defaultdict(OrderedDict)
+        self._dispatchers: Dict[str, asyncio.Task] = {}
 
     async def track_request(
         self,
@@ -122,12 +176,151 @@ class ModelMonitor:
             "requests_per_minute": requests_per_minute,
             "tokens_per_minute": tokens_per_minute
         }
+        self._limited_models.add(model)
+        # Rebuild the buckets with the new limits on next use
+        self._buckets.pop(model, None)
+
+    def has_rate_limits(self, model: str) -> bool:
+        """Whether rate limits are enforced for a model"""
+        return model in self._limited_models
+
+    def _get_buckets(self, model: str) -> Tuple[TokenBucket, TokenBucket]:
+        """Request and token buckets for a model, created from its rate limits."""
+        if model not in self._buckets:
+            limits = self.rate_limits[model]
+            self._buckets[model] = (
+                TokenBucket(limits["requests_per_minute"], limits["requests_per_minute"] / 60.0),
+                TokenBucket(limits["tokens_per_minute"], limits["tokens_per_minute"] / 60.0)
+            )
+        return self._buckets[model]
+
+    def _wait_time(self, model: str, tokens: int) -> float:
+        """Seconds until one request of ``tokens`` tokens fits both buckets."""
+        if not self.has_rate_limits(model):
+            return 0.0
+        requests_bucket, tokens_bucket = self._get_buckets(model)
+        return max(requests_bucket.time_until(1), tokens_bucket.time_until(tokens))
+
+    def _consume(self, model: str, tokens: int) -> None:
+        if not self.has_rate_limits(model):
+            return
+        requests_bucket, tokens_bucket = self._get_buckets(model)
+        requests_bucket.consume(1)
+        tokens_bucket.consume(tokens)
 
     async def check_rate_limit(self, model: str, tokens: int) -> bool:
-        """Check if a request would exceed rate limits"""
-        # Implement rate limiting logic here
-        # This is a placeholder for actual rate limiting implementation
+        """Check if a request could be admitted now without exceeding rate limits"""
+        return not self._queues[model] and self._wait_time(model, tokens) == 0
+
+    def try_acquire(self, model: str, tokens: int = 0) -> bool:
+        """Admit a request immediately if it fits the rate limits, without waiting"""
+        if self._queues[model] or self._wait_time(model, tokens) > 0:
+            return False
+        self._consume(model, tokens)
         return True
 
+    async def acquire(
+        self,
+        model: str,
+        tokens: int = 0,
+        tenant: str = "default",
+        timeout: Optional[float] = None
+    ) -> None:
+        """
+        Wait until a request fits the model's request and token budgets.
+
+        Waiting requests are queued per tenant and admitted round-robin across
+        tenants, so one tenant's burst can't starve the others. Raises
+        RateLimitError if the request isn't admitted within ``timeout`` seconds,
+        or at once if the model's limits can never admit it.
+        """
+        queue = self._queues[model]
+        wait = self._wait_time(model, tokens)
+        if wait == float("inf"):
+            raise RateLimitError(f"Rate limits for {model} admit no requests")
+        if not queue and wait == 0:
+            self._consume(model, tokens)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        queue.setdefault(tenant, deque()).append((tokens, future))
+        dispatcher = self._dispatchers.get(model)
+        if dispatcher is None or dispatcher.done():
+            self._dispatchers[model] = asyncio.ensure_future(self._dispatch(model))
+
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            raise RateLimitError(f"Request for {model} not admitted within {timeout}s")
+
+    async def _dispatch(self, model: str) -> None:
+        """Admit queued requests for a model as budget frees up, round-robin across tenants."""
+        queue = self._queues[model]
+        while queue:
+            tenant, waiters = next(iter(queue.items()))
+            # Drop requests that timed out or were cancelled
+            while waiters and waiters[0][1].done():
+                waiters.popleft()
+            if not waiters:
+                del queue[tenant]
+                continue
+
+            tokens, future = waiters[0]
+            wait = self._wait_time(model, tokens)
+            if wait == float("inf"):
+                # Limits were lowered to zero while the request was queued
+                waiters.popleft()
+                future.set_exception(RateLimitError(f"Rate limits for {model} admit no requests"))
+                continue
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+
+            waiters.popleft()
+            self._consume(model, tokens)
+            future.set_result(None)
+            # Move the tenant to the back of the line
+            del queue[tenant]
+            if waiters:
+                queue[tenant] = waiters
+        self._dispatchers.pop(model, None)
+
+    def estimate_wait(self, model: str, tokens: int = 0) -> float:
+        """Estimated seconds before a new request of ``tokens`` tokens would be admitted"""
+        if not self.has_rate_limits(model):
+            return 0.0
+        requests_bucket, tokens_bucket = self._get_buckets(model)
+        queued = [waiter for waiters in self._queues[model].values() for waiter in waiters
+                  if not waiter[1].done()]
+        request_deficit = len(queued) + 1 - requests_bucket.available()
+        token_deficit = sum(t for t, _ in queued) + min(tokens, tokens_bucket.capacity) - tokens_bucket.available()
+        return max(
+            request_deficit / requests_bucket.rate if requests_bucket.rate > 0 else float("inf"),
+            token_deficit / tokens_bucket.rate if tokens_bucket.rate > 0 else float("inf"),
+            0.0
+        )
+
+    def get_backpressure(self, model: str) -> Dict[str, float]:
+        """
+        Backpressure signals for a model: queued requests, estimated wait and
+        how much of each budget is in use (1.0 = exhausted).
+        """
+        if not self.has_rate_limits(model):
+            return {"queued": 0, "estimated_wait": 0.0, "request_utilization": 0.0, "token_utilization": 0.0}
+        requests_bucket, tokens_bucket = self._get_buckets(model)
+        queued = sum(
+            1 for waiters in self._queues[model].values() for _, future in waiters if not future.done()
+        )
+        return {
+            "queued": queued,
+            "estimated_wait": self.estimate_wait(model),
+            "request_utilization": _utilization(requests_bucket),
+            "token_utilization": _utilization(tokens_bucket)
+        }
+
+    def is_throttled(self, model: str, tokens: int = 0) -> bool:
+        """Whether a request would have to wait; callers can reroute instead"""
+        return bool(self._queues[model]) or self._wait_time(model, tokens) > 0
+
 # Global monitor instance
 monitor = ModelMonitor() 
\ No newline at end of file
@@ -0,0 +1,266 @@
+"""
+Request coalescing and response caching for model calls.
+"""
+
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import pickle
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Returned by CacheBackend.get on a miss, so None stays a cacheable response
+_MISSING = object()
+
+def make_cache_key(*parts: Any) -> str:
+    """Stable hash of a request's model, parameters and prompt."""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def is_deterministic(params: Dict[str, Any]) -> bool:
+    """
+    Whether a request should give the same answer every time.
+
+    True for greedy decoding (temperature 0) or when a seed is pinned; sampled
+    requests produce a fresh answer per call and shouldn't be shared.
+    """
+    if params.get("seed") is not None:
+        return True
+    temperature = params.get("temperature")
+    return temperature is not None and temperature <= 0
+
+class CacheBackend(ABC):
+    """Storage for cached responses"""
+
+    @abstractmethod
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get a cached value, or ``default`` if missing or expired"""
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Cache a value, expiring after ``ttl`` seconds if given"""
+        pass
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        pass
+
+    @abstractmethod
+    def clear(self) -> None:
+        pass
+
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+class InMemoryCacheBackend(CacheBackend):
+    """
+    LRU cache in process memory with per-entry expiry
+
+    Values are deep-copied in and out, so callers can't mutate cached
+    responses (the SQLite backend gets the same isolation from pickling).
+    """
+
+    def __init__(self, max_size: int = 1000):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[Any, Optional[float]]]" = OrderedDict()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        value, expires_at = entry
+        if expires_at is not None and time.time() >= expires_at:
+            del self._entries[key]
+            return default
+        self._entries.move_to_end(key)
+        return copy.deepcopy(value)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self._entries[key] = (copy.deepcopy(value), time.time() + ttl if ttl is not None else None)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class SQLiteCacheBackend(CacheBackend):
+    """Pickled responses in an SQLite file, shared across processes and restarts"""
+
+    def __init__(self, path: Union[str, Path], max_size: Optional[int] = None):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    expires_at REAL,
+                    accessed_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS ix_responses_accessed_at ON responses (accessed_at);
+            """)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return default
+            if row[1] is not None and now >= row[1]:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return default
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        return pickle.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, pickle.dumps(value), now + ttl if ttl is not None else None, now)
+            )
+            if self.max_size is not None:
+                # Evict least recently used entries beyond the size bound
+                self._conn.execute(
+                    """
+                    DELETE FROM responses WHERE key IN (
+                        SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                    )
+                    """,
+                    (self.max_size,)
+                )
+
+    def delete(self, key: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+class RequestCoalescer:
+    """Single-flight: concurrent calls with the same key share one execution"""
+
+    def __init__(self):
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._in_flight
+
+    async def run(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Await the in-flight call for ``key``, or start one with ``factory``"""
+        future = self._in_flight.get(key)
+        if future is not None:
+            # Shield so one waiter's cancellation doesn't cancel the shared call
+            return await asyncio.shield(future)
+
+        future = asyncio.ensure_future(factory())
+        self._in_flight[key] = future
+        future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return await asyncio.shield(future)
+
+class ResponseCache:
+    """
+    Deduplicates identical in-flight requests and caches their responses.
+
+    Only deterministic requests (see ``is_deterministic``) are shared unless
+    ``cache_sampled`` is set. Cache hits and coalesced callers each get their
+    own copy of the response.
+    """
+
+    def __init__(
+        self,
+        backend: Optional[CacheBackend] = None,
+        ttl: Optional[float] = 3600.0,
+        cache_sampled: bool = False
+    ):
+        """
+        Args:
+            backend: Where responses are stored (in-memory LRU by default)
+            ttl: Seconds a response stays cached (None = until evicted)
+            cache_sampled: Also share responses for sampled (temperature > 0) requests
+        """
+        self.backend = backend if backend is not None else InMemoryCacheBackend()
+        self.ttl = ttl
+        self.cache_sampled = cache_sampled
+        self.coalescer = RequestCoalescer()
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "bypassed": 0}
+
+    def should_cache(self, params: Dict[str, Any]) -> bool:
+        return self.cache_sampled or is_deterministic(params)
+
+    async def get_or_compute(
+        self,
+        key: str,
+        factory: Callable[[], Awaitable[Any]],
+        params: Optional[Dict[str, Any]] = None
+    ) -> Tuple[Any, bool]:
+        """
+        Return ``(response, cached)`` for a request.
+
+        ``cached`` is True when the response came from the cache or from an
+        identical call already in flight.
+        """
+        if not self.should_cache(params or {}):
+            self.stats["bypassed"] += 1
+            return await factory(), False
+
+        value = self.backend.get(key, _MISSING)
+        if value is not _MISSING:
+            self.stats["hits"] += 1
+            return value, True
+
+        if key in self.coalescer:
+            self.stats["coalesced"] += 1
+            # The leader gets the shared result itself; followers get copies
+            return copy.deepcopy(await self.coalescer.run(key, factory)), True
+
+        self.stats["misses"] += 1
+
+        async def compute():
+            result = await factory()
+            try:
+                self.backend.set(key, result, self.ttl)
+            except Exception as e:
+                logger.warning(f"Failed to cache response: {e}")
+            return result
+
+        return await self.coalescer.run(key, compute), False
+
+    def invalidate(self, key: str) -> None:
+        self.backend.delete(key)
+
+    def clear(self) -> None:
+        self.backend.clear()
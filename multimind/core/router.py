@@ -2,12 +2,15 @@
 Router for managing provider selection and request routing.
 """
 
-from typing import Dict, List, Optional, Any, Union
+from typing import Dict, List, Optional, Any, Union, Tuple
 from pydantic import BaseModel
 from enum import Enum
 import asyncio
 import time
 from .provider import ProviderAdapter, GenerationResult, EmbeddingResult, ImageAnalysisResult
+from .monitoring import ModelMonitor
+from .response_cache import ResponseCache, make_cache_key
+from .semantic_cache import SemanticResponseCache
 from ..observability.metrics import MetricsCollector
 import numpy as np
 
@@ -31,6 +34,7 @@ class TaskConfig(BaseModel):
     fallback_providers: List[str]
     routing_strategy: RoutingStrategy
     ensemble_config: Optional[Dict[str, Any]] = None
+    cascade_config: Optional[Dict[str, Any]] = None
 
 class ProviderPerformanceTracker:
     """Tracks provider performance for adaptive routing and weighting."""
@@ -64,6 +68,13 @@ class ProviderPerformanceTracker:
         # Score: success * (1/latency) * quality * feedback
         return success_rate * (1.0 / (avg_latency + 1e-3)) * avg_quality * avg_feedback
 
+    def get_latency_percentile(self, provider: str, percentile: float = 95, window: int = 200) -> Optional[float]:
+        """Latency percentile over the provider's most recent calls, or None without samples."""
+        m = self.metrics.get(provider, None)
+        if not m or not m["latency"]:
+            return None
+        return float(np.percentile(m["latency"][-window:], percentile))
+
     def get_best_provider(self, providers: List[str]) -> str:
         scores = {p: self.get_score(p) for p in providers}
         return max(scores.items(), key=lambda x: x[1])[0]
@@ -92,13 +103,32 @@ class FallbackPolicy:
 class Router:
     """Router for managing provider selection and request routing."""
     
-    def __init__(self):
-        """Initialize the router."""
+    def __init__(
+        self,
+        monitor: Optional[ModelMonitor] = None,
+        response_cache: Optional[ResponseCache] = None,
+        semantic_cache: Optional[SemanticResponseCache] = None
+    ):
+        """
+        Initialize the router.
+        
+        If a monitor is given, providers it reports as throttled (rate limits
+        keyed by provider name) are routed around while others have capacity,
+        and every provider call takes one request and its ``max_tokens`` from
+        the provider's budget, waiting for capacity if needed.
+        If a response cache is given, identical deterministic requests are
+        coalesced while in flight and answered from the cache afterwards.
+        If a semantic cache is given, deterministic text requests for the
+        task types it is enabled for are answered from similar past requests.
+        """
         self.providers: Dict[str, ProviderAdapter] = {}
         self.task_configs: Dict[TaskType, TaskConfig] = {}
         self.metrics = MetricsCollector()
         self.performance_tracker = ProviderPerformanceTracker()
         self.fallback_policy = FallbackPolicy()
+        self.monitor = monitor
+        self.response_cache = response_cache
+        self.semantic_cache = semantic_cache
     
     def register_provider(self, name: str, provider: ProviderAdapter):
         """Register a provider with the router."""
@@ -108,6 +138,26 @@ class Router:
         """Configure a task with the given configuration."""
         self.task_configs[task_type] = config
     
+    def _order_by_backpressure(self, provider_names: List[str]) -> List[str]:
+        """Move providers the monitor reports as throttled behind the others."""
+        if self.monitor is None:
+            return list(provider_names)
+        return sorted(provider_names, key=self.monitor.is_throttled)
+    
+    async def _acquire(self, provider_name: str, **kwargs) -> None:
+        """Consume rate-limit budget for one call to a provider, queued under the request's tenant."""
+        if self.monitor is not None:
+            await self.monitor.acquire(
+                provider_name,
+                tokens=kwargs.get("max_tokens") or 0,
+                tenant=kwargs.get("tenant") or "default"
+            )
+    
+    @staticmethod
+    def _provider_kwargs(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """Drop routing-only arguments before calling a provider."""
+        return {k: v for k, v in kwargs.items() if k != "tenant"}
+    
     async def route(
         self,
         task_type: TaskType,
@@ -122,12 +172,7 @@ class Router:
         start_time = time.time()
         
         try:
-            if config.routing_strategy == RoutingStrategy.ENSEMBLE:
-                result = await self._handle_ensemble(task_type, input_data, config, **kwargs)
-            elif config.routing_strategy == RoutingStrategy.CASCADE:
-                result = await self._handle_cascade(task_type, input_data, config, **kwargs)
-            else:
-                result = await self._handle_single_provider(task_type, input_data, config, **kwargs)
+            result, cached = await self._run_cached(task_type, input_data, config, **kwargs)
             
             # Record successful request metrics
             latency_ms = (time.time() - start_time) * 1000
@@ -139,6 +184,10 @@ class Router:
                 metadata={"request_id": kwargs.get("request_id")}
             )
             
+            if cached:
+                # Cost and tokens were already recorded for the original call
+                return result
+            
             if hasattr(result, "cost"):
                 self.metrics.record_cost(
                     provider=result.provider,
@@ -171,6 +220,65 @@ class Router:
             )
             raise
     
+    async def _run_cached(
+        self,
+        task_type: TaskType,
+        input_data: Any,
+        config: TaskConfig,
+        **kwargs
+    ) -> Tuple[Union[GenerationResult, EmbeddingResult, ImageAnalysisResult], bool]:
+        """Run a request through the exact and semantic caches; returns (result, cached)."""
+        params = {k: v for k, v in kwargs.items() if k != "request_id"}
+        scope_parts = (
+            task_type.value,
+            config.routing_strategy.value,
+            config.preferred_providers,
+            config.fallback_providers,
+            params
+        )
+        
+        async def run_semantic():
+            if (
+                self.semantic_cache is not None
+                and isinstance(input_data, str)
+                and task_type != TaskType.EMBEDDINGS
+                and self.semantic_cache.enabled_for(task_type.value)
+                and self.semantic_cache.should_cache(params)
+            ):
+                return await self.semantic_cache.get_or_compute(
+                    input_data,
+                    lambda: self._dispatch(task_type, input_data, config, **kwargs),
+                    scope=make_cache_key(*scope_parts)
+                )
+            return await self._dispatch(task_type, input_data, config, **kwargs), False
+        
+        if self.response_cache is None:
+            return await run_semantic()
+        
+        # Embeddings don't sample, so they are always safe to share
+        cache_params = {**params, "temperature": 0} if task_type == TaskType.EMBEDDINGS else params
+        (result, semantic_hit), cached = await self.response_cache.get_or_compute(
+            make_cache_key(*scope_parts, input_data),
+            run_semantic,
+            cache_params
+        )
+        return result, cached or semantic_hit
+    
+    async def _dispatch(
+        self,
+        task_type: TaskType,
+        input_data: Any,
+        config: TaskConfig,
+        **kwargs
+    ) -> Union[GenerationResult, EmbeddingResult, ImageAnalysisResult]:
+        """Run a request with the task's routing strategy."""
+        if config.routing_strategy == RoutingStrategy.ENSEMBLE:
+            return await self._handle_ensemble(task_type, input_data, config, **kwargs)
+        elif config.routing_strategy == RoutingStrategy.CASCADE:
+            return await self._handle_cascade(task_type, input_data, config, **kwargs)
+        else:
+            return await self._handle_single_provider(task_type, input_data, config, **kwargs)
+    
     async def _handle_single_provider(
         self,
         task_type: TaskType,
@@ -180,19 +288,27 @@ class Router:
         **kwargs
     ) -> Union[GenerationResult, EmbeddingResult, ImageAnalysisResult]:
         """Handle routing to a single provider (adaptive if enabled, with fallback policy)."""
-        if use_adaptive_routing and len(config.preferred_providers) > 1:
-            provider_name = self.performance_tracker.get_best_provider(config.preferred_providers)
+        candidates = config.preferred_providers
+        if self.monitor is not None:
+            # Reroute instead of queueing behind a provider's rate limits
+            candidates = [p for p in candidates if not self.monitor.is_throttled(p)] or candidates
+        if use_adaptive_routing and len(candidates) > 1:
+            provider_name = self.performance_tracker.get_best_provider(candidates)
         else:
-            provider_name = config.preferred_providers[0]
+            provider_name = candidates[0]
         provider = self.providers[provider_name]
+        # Wait for rate-limit budget first: queueing is not provider latency,
+        # and a RateLimitError is not a provider failure
+        await self._acquire(provider_name, **kwargs)
+        provider_kwargs = self._provider_kwargs(kwargs)
         start = time.time()
         try:
             if task_type == TaskType.TEXT_GENERATION:
-                result = await provider.generate_text(input_data, **kwargs)
+                result = await provider.generate_text(input_data, **provider_kwargs)
             elif task_type == TaskType.EMBEDDINGS:
-                result = await provider.generate_embeddings(input_data, **kwargs)
+                result = await provider.generate_embeddings(input_data, **provider_kwargs)
             elif task_type == TaskType.IMAGE_ANALYSIS:
-                result = await provider.analyze_image(input_data, **kwargs)
+                result = await provider.analyze_image(input_data, **provider_kwargs)
             else:
                 raise ValueError(f"Unsupported task type: {task_type}")
             latency = time.time() - start
@@ -223,6 +339,39 @@ class Router:
                 print(self.fallback_policy.get_fallback_message(provider_name, e))
             raise
     
+    async def _call_provider(
+        self,
+        task_type: TaskType,
+        provider_name: str,
+        input_data: Any,
+        timeout: Optional[float] = None,
+        **kwargs
+    ) -> Union[GenerationResult, EmbeddingResult, ImageAnalysisResult]:
+        """Call one provider for a task, with an optional timeout, recording its performance."""
+        await self._acquire(provider_name, **kwargs)
+        provider = self.providers[provider_name]
+        provider_kwargs = self._provider_kwargs(kwargs)
+        if task_type == TaskType.TEXT_GENERATION:
+            call = provider.generate_text(input_data, **provider_kwargs)
+        elif task_type == TaskType.EMBEDDINGS:
+            call = provider.generate_embeddings(input_data, **provider_kwargs)
+        elif task_type == TaskType.IMAGE_ANALYSIS:
+            call = provider.analyze_image(input_data, **provider_kwargs)
+        else:
+            raise ValueError(f"Unsupported task type: {task_type}")
+        
+        start = time.time()
+        try:
+            result = await asyncio.wait_for(call, timeout) if timeout is not None else await call
+        except asyncio.CancelledError:
+            # Cancelled stragglers are neither successes nor failures
+            raise
+        except Exception:
+            self.performance_tracker.record(provider_name, success=False, latency=time.time() - start)
+            raise
+        self.performance_tracker.record(provider_name, success=True, latency=time.time() - start)
+        return result
+    
     async def _handle_ensemble(
         self,
         task_type: TaskType,
@@ -230,50 +379,91 @@ class Router:
         config: TaskConfig,
         **kwargs
     ) -> Union[GenerationResult, EmbeddingResult, ImageAnalysisResult]:
-        """Handle ensemble routing strategy."""
+        """
+        Handle ensemble routing strategy.
+        
+        Providers are called concurrently. ensemble_config options:
+        - method: "weighted_voting" returns the completed result with the highest
+          weight; otherwise the first result to complete is returned
+        - weights: provider -> weight (default 1.0)
+        - quorum: return once this many providers succeed (default: all)
+        - confidence_threshold (or min_confidence): return once the successful
+          providers' share of the total weight reaches this value
+        - timeout / provider_timeouts: per-provider timeout in seconds
+        Providers still running when the ensemble returns are cancelled.
+        """
         if not config.ensemble_config:
             raise ValueError("Ensemble configuration is required for ensemble routing")
         
-        results = []
-        for provider_name in config.preferred_providers:
-            provider = self.providers[provider_name]
-            try:
-                if task_type == TaskType.TEXT_GENERATION:
-                    result = await provider.generate_text(input_data, **kwargs)
-                elif task_type == TaskType.EMBEDDINGS:
-                    result = await provider.generate_embeddings(input_data, **kwargs)
-                elif task_type == TaskType.IMAGE_ANALYSIS:
-                    result = await provider.analyze_image(input_data, **kwargs)
-                else:
-                    raise ValueError(f"Unsupported task type: {task_type}")
+        ensemble_config = config.ensemble_config
+        provider_names = config.preferred_providers
+        weights = ensemble_config.get("weights", {})
+        quorum = min(ensemble_config.get("quorum", len(provider_names)), len(provider_names))
+        threshold = ensemble_config.get("confidence_threshold", ensemble_config.get("min_confidence"))
+        provider_timeouts = ensemble_config.get("provider_timeouts", {})
+        total_weight = sum(weights.get(name, 1.0) for name in provider_names) or 1.0
+        
+        # Fan out to all providers at once
+        tasks = {
+            asyncio.ensure_future(self._call_provider(
+                task_type,
+                provider_name,
+                input_data,
+                timeout=provider_timeouts.get(provider_name, ensemble_config.get("timeout")),
+                **kwargs
+            )): provider_name
+            for provider_name in provider_names
+        }
+        results = []  # (provider_name, result) in completion order
+        confidence = 0.0
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    provider_name = tasks[task]
+                    try:
+                        results.append((provider_name, task.result()))
+                        confidence += weights.get(provider_name, 1.0) / total_weight
+                    except Exception as e:
+                        self.metrics.record_error(
+                            provider=provider_name,
+                            task_type=task_type,
+                            model=kwargs.get("model", "unknown"),
+                            error_type=type(e).__name__,
+                            error_message=str(e),
+                            metadata={"request_id": kwargs.get("request_id")}
+                        )
                 
-                results.append(result)
-            except Exception as e:
-                self.metrics.record_error(
-                    provider=provider_name,
-                    task_type=task_type,
-                    model=kwargs.get("model", "unknown"),
-                    error_type=type(e).__name__,
-                    error_message=str(e),
-                    metadata={"request_id": kwargs.get("request_id")}
-                )
+                # Early exit on quorum or confidence
+                if len(results) >= quorum or (threshold is not None and confidence >= threshold):
+                    break
+        finally:
+            # Cancel stragglers
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
         
         if not results:
             raise Exception("All providers failed in ensemble routing")
         
         # Use weighted voting for ensemble results
-        if config.ensemble_config["method"] == "weighted_voting":
-            weights = config.ensemble_config["weights"]
-            weighted_results = []
-            for result in results:
-                weight = weights.get(result.provider, 1.0)
-                weighted_results.append((result, weight))
-            
-            # For now, just return the result with highest weight
-            return max(weighted_results, key=lambda x: x[1])[0]
+        if ensemble_config.get("method") == "weighted_voting":
+            # Highest weight wins; ties go to the result that completed first
+            return max(results, key=lambda x: weights.get(x[0], 1.0))[1]
         else:
             # Default to first successful result
-            return results[0]
+            return results[0][1]
+    
+    def _hedge_delay(self, provider_name: str, cascade_config: Dict[str, Any]) -> float:
+        """Delay before hedging a provider: fixed, or its observed latency percentile."""
+        if cascade_config.get("hedge_delay") is not None:
+            return cascade_config["hedge_delay"]
+        observed = self.performance_tracker.get_latency_percentile(
+            provider_name, cascade_config.get("hedge_percentile", 95)
+        )
+        return observed if observed is not None else cascade_config.get("default_hedge_delay", 1.0)
     
     async def _handle_cascade(
         self,
@@ -282,38 +472,81 @@ class Router:
         config: TaskConfig,
         **kwargs
     ) -> Union[GenerationResult, EmbeddingResult, ImageAnalysisResult]:
-        """Handle cascade routing strategy."""
+        """
+        Handle cascade routing strategy.
+        
+        Preferred providers are tried first, then fallback providers; a failure
+        moves on to the next provider. cascade_config options:
+        - hedge: if the running provider hasn't answered after the hedge delay,
+          launch the next one in parallel and take the first success
+        - hedge_delay: fixed hedge delay in seconds; by default the provider's
+          observed hedge_percentile (95) latency, or default_hedge_delay (1.0)
+          until it has samples
+        - deadline: overall time budget in seconds for the whole cascade
+        - provider_timeout: per-provider timeout in seconds
+        """
+        cascade_config = config.cascade_config or {}
+        hedge = cascade_config.get("hedge", False)
+        deadline = cascade_config.get("deadline")
+        queue = (
+            self._order_by_backpressure(config.preferred_providers)
+            + self._order_by_backpressure(config.fallback_providers)
+        )
+        loop = asyncio.get_running_loop()
+        deadline_at = loop.time() + deadline if deadline is not None else None
         errors = []
+        in_flight = {}  # task -> provider name
+        hedge_at = None
         
-        # Try preferred providers first
-        for provider_name in config.preferred_providers:
-            provider = self.providers[provider_name]
-            try:
-                if task_type == TaskType.TEXT_GENERATION:
-                    return await provider.generate_text(input_data, **kwargs)
-                elif task_type == TaskType.EMBEDDINGS:
-                    return await provider.generate_embeddings(input_data, **kwargs)
-                elif task_type == TaskType.IMAGE_ANALYSIS:
-                    return await provider.analyze_image(input_data, **kwargs)
-                else:
-                    raise ValueError(f"Unsupported task type: {task_type}")
-            except Exception as e:
-                errors.append((provider_name, e))
+        def launch():
+            nonlocal hedge_at
+            provider_name = queue.pop(0)
+            task = asyncio.ensure_future(self._call_provider(
+                task_type,
+                provider_name,
+                input_data,
+                timeout=cascade_config.get("provider_timeout"),
+                **kwargs
+            ))
+            in_flight[task] = provider_name
+            hedge_at = loop.time() + self._hedge_delay(provider_name, cascade_config) if hedge else None
         
-        # Try fallback providers if all preferred providers fail
-        for provider_name in config.fallback_providers:
-            provider = self.providers[provider_name]
-            try:
-                if task_type == TaskType.TEXT_GENERATION:
-                    return await provider.generate_text(input_data, **kwargs)
-                elif task_type == TaskType.EMBEDDINGS:
-                    return await provider.generate_embeddings(input_data, **kwargs)
-                elif task_type == TaskType.IMAGE_ANALYSIS:
-                    return await provider.analyze_image(input_data, **kwargs)
-                else:
-                    raise ValueError(f"Unsupported task type: {task_type}")
-            except Exception as e:
-                errors.append((provider_name, e))
+        try:
+            if queue:
+                launch()
+            while in_flight:
+                # Wake up for the next hedge or the deadline, whichever comes first
+                wake_at = [t for t in (hedge_at if queue else None, deadline_at) if t is not None]
+                timeout = max(min(wake_at) - loop.time(), 0) if wake_at else None
+                done, _ = await asyncio.wait(
+                    set(in_flight), timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                
+                if not done:
+                    if deadline_at is not None and loop.time() >= deadline_at:
+                        raise asyncio.TimeoutError(
+                            f"Cascade deadline of {deadline}s exceeded "
+                            f"(waiting on {', '.join(in_flight.values())})"
+                        )
+                    # Hedge delay elapsed: race the next provider
+                    launch()
+                    continue
+                
+                for task in done:
+                    provider_name = in_flight.pop(task)
+                    try:
+                        return task.result()
+                    except Exception as e:
+                        errors.append((provider_name, e))
+                
+                # Failed: move on to the next provider
+                if queue:
+                    launch()
+        finally:
+            for task in in_flight:
+                task.cancel()
+            if in_flight:
+                await asyncio.gather(*in_flight, return_exceptions=True)
         
         # If all providers fail, raise an exception with error details
         error_messages = [f"{p}: {str(e)}" for p, e in errors]
@@ -0,0 +1,201 @@
+"""
+Semantic response cache keyed by prompt embeddings.
+"""
+
+import asyncio
+import copy
+import inspect
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from .response_cache import is_deterministic
+
+logger = logging.getLogger(__name__)
+
+class SemanticResponseCache:
+    """
+    Returns cached responses for prompts similar to ones already answered.
+
+    Prompts are embedded and searched in a vector store backend; a cached
+    response is reused when its prompt's cosine similarity to the new one
+    reaches ``similarity_threshold`` and it was produced under the same scope
+    (model and parameters). Entries are evicted LRU beyond ``max_entries`` or
+    after ``ttl`` seconds.
+
+    The cache is opt-in per task type and, like ``ResponseCache``, only
+    shares responses to deterministic requests unless ``cache_sampled`` is
+    set. Embeddings are never served from it: a near-duplicate text must get
+    its own vector.
+    """
+
+    # Task types whose results belong to the exact input and can't be shared
+    UNSUPPORTED_TASK_TYPES = frozenset({"embeddings"})
+
+    def __init__(
+        self,
+        embedder: Any,
+        vector_store: Any,
+        similarity_threshold: float = 0.95,
+        max_entries: int = 10000,
+        ttl: Optional[float] = None,
+        task_types: Iterable[str] = ("text_generation",),
+        top_k: int = 5,
+        cache_sampled: bool = False
+    ):
+        """
+        Args:
+            embedder: An EmbeddingModel (or anything with ``generate_embedding``),
+                or a sync/async callable mapping text to a vector
+            vector_store: A VectorStoreBackend holding the prompt embeddings
+            similarity_threshold: Minimum cosine similarity for a cache hit
+            max_entries: Maximum cached responses before LRU eviction
+            ttl: Seconds a response stays cached (None = until evicted)
+            task_types: Task types the cache applies to
+            top_k: Candidates fetched from the vector store per lookup
+            cache_sampled: Also share responses for sampled (temperature > 0) requests
+        """
+        unsupported = self.UNSUPPORTED_TASK_TYPES.intersection(task_types)
+        if unsupported:
+            raise ValueError(f"Semantic caching is not supported for: {', '.join(sorted(unsupported))}")
+        self.embedder = embedder
+        self.vector_store = vector_store
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.task_types = set(task_types)
+        self.top_k = top_k
+        self.cache_sampled = cache_sampled
+        # entry id -> {"vector", "scope", "response", "created_at"}
+        self.entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # Vectors of evicted entries still in the store; rebuilt away in bulk
+        self._stale = 0
+        self._lock = asyncio.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def enabled_for(self, task_type: str) -> bool:
+        """Whether the cache is opted in for a task type"""
+        return task_type in self.task_types and task_type not in self.UNSUPPORTED_TASK_TYPES
+
+    def should_cache(self, params: Dict[str, Any]) -> bool:
+        """Whether a request's parameters allow sharing its response"""
+        return self.cache_sampled or is_deterministic(params)
+
+    async def _embed(self, text: str) -> np.ndarray:
+        if hasattr(self.embedder, "generate_embedding"):
+            vector = self.embedder.generate_embedding(text)
+        else:
+            vector = self.embedder(text)
+        if inspect.isawaitable(vector):
+            vector = await vector
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _expired(self, entry: Dict[str, Any]) -> bool:
+        return self.ttl is not None and time.time() - entry["created_at"] >= self.ttl
+
+    async def lookup(self, prompt: str, scope: str = "default") -> Optional[Any]:
+        """Get the cached response for the most similar prompt, if similar enough"""
+        vector = await self._embed(prompt)
+        return await self._lookup_vector(vector, scope)
+
+    async def _lookup_vector(self, vector: np.ndarray, scope: str) -> Optional[Any]:
+        if not self.entries:
+            self.stats["misses"] += 1
+            return None
+        # Over-fetch while evicted vectors linger in the store
+        k = min(self.top_k * 2 if self._stale else self.top_k, len(self.entries) + self._stale)
+        candidates = await self.vector_store.search(vector.tolist(), k=k)
+
+        best_id, best_similarity = None, self.similarity_threshold
+        for candidate in candidates:
+            entry_id = (candidate.metadata or {}).get("cache_id")
+            entry = self.entries.get(entry_id)
+            if entry is None or entry["scope"] != scope:
+                continue
+            if self._expired(entry):
+                await self._evict(entry_id)
+                continue
+            # Backends score differently, so compare cosine similarity directly
+            similarity = float(np.dot(entry["vector"], vector))
+            if similarity >= best_similarity:
+                best_id, best_similarity = entry_id, similarity
+
+        if best_id is None:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        self.entries.move_to_end(best_id)
+        # Hand out copies so callers cannot mutate the cached response
+        return copy.deepcopy(self.entries[best_id]["response"])
+
+    async def store(self, prompt: str, response: Any, scope: str = "default") -> None:
+        """Cache a response for a prompt"""
+        await self._store_vector(await self._embed(prompt), response, scope)
+
+    async def _store_vector(self, vector: np.ndarray, response: Any, scope: str) -> None:
+        entry_id = uuid.uuid4().hex
+        async with self._lock:
+            await self.vector_store.add_vectors(
+                [vector.tolist()], [{"cache_id": entry_id, "scope": scope}], [{"cache_id": entry_id}]
+            )
+            self.entries[entry_id] = {
+                "vector": vector,
+                "scope": scope,
+                "response": copy.deepcopy(response),
+                "created_at": time.time()
+            }
+        while len(self.entries) > self.max_entries:
+            await self._evict(next(iter(self.entries)))
+
+    async def _evict(self, entry_id: str) -> None:
+        if self.entries.pop(entry_id, None) is None:
+            return
+        self.stats["evictions"] += 1
+        self._stale += 1
+        # Deleting single vectors isn't reliable across backends, so stale
+        # vectors are skipped on lookup and dropped by rebuilding the store
+        if self._stale > max(len(self.entries), 1):
+            await self._rebuild()
+
+    async def _rebuild(self) -> None:
+        """Rebuild the vector store from the live entries"""
+        async with self._lock:
+            await self.vector_store.clear()
+            if self.entries:
+                await self.vector_store.add_vectors(
+                    [entry["vector"].tolist() for entry in self.entries.values()],
+                    [{"cache_id": entry_id, "scope": entry["scope"]} for entry_id, entry in self.entries.items()],
+                    [{"cache_id": entry_id} for entry_id in self.entries]
+                )
+            self._stale = 0
+
+    async def get_or_compute(
+        self,
+        prompt: str,
+        factory: Callable[[], Awaitable[Any]],
+        scope: str = "default"
+    ) -> Tuple[Any, bool]:
+        """Return ``(response, cached)``, calling ``factory`` and caching its result on a miss"""
+        vector = await self._embed(prompt)
+        response = await self._lookup_vector(vector, scope)
+        if response is not None:
+            return response, True
+        response = await factory()
+        try:
+            await self._store_vector(vector, response, scope)
+        except Exception as e:
+            logger.warning(f"Failed to cache response semantically: {e}")
+        return response, False
+
+    async def clear(self) -> None:
+        """Drop all cached responses"""
+        async with self._lock:
+            self.entries.clear()
+            self._stale = 0
+            await self.vector_store.clear()
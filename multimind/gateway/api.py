@@ -2,19 +2,23 @@
 FastAPI-based API Gateway for MultiMind
 """
 
+import json
 import logging
-from typing import Dict, List, Optional, Any
-from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks
+from typing import Dict, List, Optional, Any, AsyncGenerator, Awaitable, Callable, Literal
+from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 import time
 from datetime import datetime
 import uvicorn
 
-from ..core.config import config
-from ..core.models import ModelResponse
-from ..gateway.models import get_model_handler
+from ..core.config import GatewayConfig, config
+from ..core.models import ModelHandler, ModelResponse
+from ..gateway.models import handler_registry
 from ..core.monitoring import monitor, ModelHealth
+from ..core.exceptions import RateLimitError
+from ..core.http_pool import http_pool
 from ..core.chat import chat_manager, ChatSession, ChatMessage
 from ..compliance.privacy import (
     PrivacyCompliance,
@@ -32,6 +36,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Seconds a request may wait for rate limit budget before getting a 429
+RATE_LIMIT_TIMEOUT = 30.0
+
 # Initialize FastAPI app
 app = FastAPI(
     title="MultiMind API",
@@ -51,6 +58,25 @@ app.add_middleware(
 # Initialize compliance routes
 init_compliance_app(app)
 
+@app.on_event("startup")
+async def init_handlers():
+    """Validate model configuration and build handlers once at startup"""
+    status = handler_registry.reload()
+    logger.info(f"Configured models: {[model for model, ok in status.items() if ok]}")
+
+@app.on_event("startup")
+async def migrate_chat_sessions():
+    """Import chat sessions saved as JSON files by earlier versions into the session store"""
+    migrated = chat_manager.migrate_json_sessions()
+    if migrated:
+        logger.info(f"Migrated {migrated} JSON chat sessions")
+
+@app.on_event("shutdown")
+async def close_clients():
+    """Close model clients and pooled HTTP connections on shutdown"""
+    await handler_registry.close()
+    await http_pool.close()
+
 # Pydantic models for request/response
 class ChatMessage(BaseModel):
     """Model for chat messages"""
@@ -64,12 +90,16 @@ class ChatRequest(BaseModel):
     model: str = Field(default=config.default_model, description="Model to use")
     temperature: Optional[float] = Field(default=0.7, description="Sampling temperature")
     max_tokens: Optional[int] = Field(default=None, description="Maximum tokens to generate")
+    stream: bool = Field(default=False, description="Stream the response as it is generated")
+    stream_format: Literal["sse", "ndjson"] = Field(default="sse", description="Streaming format: server-sent events or newline-delimited JSON")
 
 class GenerateRequest(BaseModel):
     prompt: str = Field(..., description="Prompt to generate from")
     model: str = Field(default=config.default_model, description="Model to use")
     temperature: Optional[float] = Field(default=0.7, description="Sampling temperature")
     max_tokens: Optional[int] = Field(default=None, description="Maximum tokens to generate")
+    stream: bool = Field(default=False, description="Stream the response as it is generated")
+    stream_format: Literal["sse", "ndjson"] = Field(default="sse", description="Streaming format: server-sent events or newline-delimited JSON")
 
 class CompareRequest(BaseModel):
     """Request model for comparing models"""
@@ -139,7 +169,8 @@ class TrainingRequest(BaseModel):
 
 # Dependency to validate model configuration
 async def validate_model_config():
-    status = config.validate(value={})
+    # Validated once at startup/reload rather than per request
+    status = handler_registry.status or handler_registry.validate()
     if not any(status.values()):
         raise HTTPException(
             status_code=500,
@@ -147,15 +178,110 @@ async def validate_model_config():
         )
     return status
 
+async def _admit(model: str, tokens: int = 0) -> None:
+    """Wait for the model's rate limit budget for one request, or fail with a 429"""
+    try:
+        await monitor.acquire(model, tokens=tokens, timeout=RATE_LIMIT_TIMEOUT)
+    except RateLimitError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+
+def _format_stream_event(payload: Dict[str, Any], stream_format: str, event: Optional[str] = None) -> str:
+    """Encode one streamed payload as an SSE event or an NDJSON line"""
+    if stream_format == "ndjson":
+        return json.dumps(payload) + "\n"
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(payload)}\n\n"
+
+async def _stream_chunks(
+    http_request: Request,
+    chunks: AsyncGenerator[str, None],
+    model: str,
+    stream_format: str,
+    handler: ModelHandler,
+    on_complete: Optional[Callable[[str], Awaitable[None]]] = None
+) -> AsyncGenerator[str, None]:
+    """
+    Forward a handler's text stream to the client.
+
+    Chunks are pulled from the provider only as fast as the client reads them,
+    and the provider stream is closed as soon as the client disconnects. The
+    handler must have been acquired from the registry; it is released when
+    the stream ends.
+    """
+    start_time = time.time()
+    parts = []
+    try:
+        async for text in chunks:
+            if await http_request.is_disconnected():
+                logger.info(f"Client disconnected, cancelling {model} stream")
+                return
+            parts.append(text)
+            yield _format_stream_event({"content": text, "model": model}, stream_format)
+
+        content = "".join(parts)
+        if on_complete:
+            await on_complete(content)
+        await monitor.track_request(
+            model=model,
+            tokens=0,
+            cost=0.0,
+            response_time=time.time() - start_time,
+            success=True
+        )
+        if stream_format == "ndjson":
+            yield _format_stream_event({"done": True, "model": model}, stream_format)
+        else:
+            yield "data: [DONE]\n\n"
+    except Exception as e:
+        logger.error(f"Error streaming from {model}: {str(e)}")
+        await monitor.track_request(
+            model=model,
+            tokens=0,
+            cost=0.0,
+            response_time=time.time() - start_time,
+            success=False,
+            error=str(e)
+        )
+        # Headers are already sent, so report the error in-band
+        yield _format_stream_event({"error": str(e)}, stream_format, event="error")
+    finally:
+        await chunks.aclose()
+        handler_registry.release(handler)
+
+def _streaming_response(
+    http_request: Request,
+    chunks: AsyncGenerator[str, None],
+    model: str,
+    stream_format: str,
+    handler: ModelHandler,
+    on_complete: Optional[Callable[[str], Awaitable[None]]] = None
+) -> StreamingResponse:
+    media_type = "application/x-ndjson" if stream_format == "ndjson" else "text/event-stream"
+    return StreamingResponse(
+        _stream_chunks(http_request, chunks, model, stream_format, handler, on_complete),
+        media_type=media_type,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.get("/")
 async def root():
     """Root endpoint with API information"""
     return {
         "name": "MultiMind API",
         "version": "1.0.0",
-        "models": list(config.validate(value={}).keys())
+        "models": list(handler_registry.status.keys())
     }
 
+@app.post("/v1/config/reload")
+async def reload_config():
+    """Reload model configuration from the environment and rebuild changed handlers"""
+    try:
+        status = handler_registry.reload(GatewayConfig())
+        return {"models": status}
+    except Exception as e:
+        logger.error(f"Error reloading config: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/v1/models")
 async def list_models(status: Dict = Depends(validate_model_config)):
     """List available models and their status"""
@@ -164,9 +290,9 @@ async def list_models(status: Dict = Depends(validate_model_config)):
             model: {
                 "status": "available" if is_valid else "unavailable",
                 "config": {
-                    "model_name": config.get_model_config(model).model_name,
-                    "temperature": config.get_model_config(model).temperature,
-                    "max_tokens": config.get_model_config(model).max_tokens
+                    "model_name": handler_registry.config.get_model_config(model).model_name,
+                    "temperature": handler_registry.config.get_model_config(model).temperature,
+                    "max_tokens": handler_registry.config.get_model_config(model).max_tokens
                 }
             }
             for model, is_valid in status.items()
@@ -174,8 +300,8 @@ async def list_models(status: Dict = Depends(validate_model_config)):
     }
 
 @app.post("/v1/chat", response_model=ModelResponse)
-async def chat(request: ChatRequest, status: Dict = Depends(validate_model_config)):
-    """Chat with a model"""
+async def chat(request: ChatRequest, http_request: Request, status: Dict = Depends(validate_model_config)):
+    """Chat with a model, optionally streaming the response"""
     try:
         if request.model not in status or not status[request.model]:
             raise HTTPException(
@@ -183,15 +309,28 @@ async def chat(request: ChatRequest, status: Dict = Depends(validate_model_confi
                 detail=f"Model {request.model} is not available"
             )
 
-        handler = get_model_handler(request.model)
+        await _admit(request.model, tokens=request.max_tokens or 0)
+
+        messages = [{"role": msg.role, "content": msg.content} for msg in request.messages]
+        if request.stream:
+            handler = handler_registry.acquire(request.model)
+            return _streaming_response(
+                http_request,
+                handler.chat_stream(messages, temperature=request.temperature, max_tokens=request.max_tokens),
+                request.model,
+                request.stream_format,
+                handler
+            )
+
         start_time = time.time()
 
         try:
-            response = await handler.chat(
-                [{"role": msg.role, "content": msg.content} for msg in request.messages],
-                temperature=request.temperature,
-                max_tokens=request.max_tokens
-            )
+            async with handler_registry.lease(request.model) as handler:
+                response = await handler.chat(
+                    messages,
+                    temperature=request.temperature,
+                    max_tokens=request.max_tokens
+                )
 
             # Track successful request
             await monitor.track_request(
@@ -216,13 +355,15 @@ async def chat(request: ChatRequest, status: Dict = Depends(validate_model_confi
             )
             raise
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in chat endpoint: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/v1/generate", response_model=ModelResponse)
-async def generate(request: GenerateRequest, status: Dict = Depends(validate_model_config)):
-    """Generate text from a prompt"""
+async def generate(request: GenerateRequest, http_request: Request, status: Dict = Depends(validate_model_config)):
+    """Generate text from a prompt, optionally streaming the response"""
     try:
         if request.model not in status or not status[request.model]:
             raise HTTPException(
@@ -230,15 +371,29 @@ async def generate(request: GenerateRequest, status: Dict = Depends(validate_mod
                 detail=f"Model {request.model} is not available"
             )
 
-        handler = get_model_handler(request.model)
-        response = await handler.generate(
-            request.prompt,
-            temperature=request.temperature,
-            max_tokens=request.max_tokens
-        )
+        await _admit(request.model, tokens=request.max_tokens or 0)
+
+        if request.stream:
+            handler = handler_registry.acquire(request.model)
+            return _streaming_response(
+                http_request,
+                handler.generate_stream(request.prompt, temperature=request.temperature, max_tokens=request.max_tokens),
+                request.model,
+                request.stream_format,
+                handler
+            )
+
+        async with handler_registry.lease(request.model) as handler:
+            response = await handler.generate(
+                request.prompt,
+                temperature=request.temperature,
+                max_tokens=request.max_tokens
+            )
 
         return response
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in generate endpoint: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -253,12 +408,12 @@ async def compare(request: CompareRequest, status: Dict = Depends(validate_model
                 logger.warning(f"Model {model} is not available, skipping")
                 continue
 
-            handler = get_model_handler(model)
-            response = await handler.generate(
-                request.prompt,
-                temperature=request.temperature,
-                max_tokens=request.max_tokens
-            )
+            async with handler_registry.lease(model) as handler:
+                response = await handler.generate(
+                    request.prompt,
+                    temperature=request.temperature,
+                    max_tokens=request.max_tokens
+                )
             responses[model] = response
 
         return CompareResponse(responses=responses)
@@ -284,7 +439,7 @@ async def get_metrics(model: Optional[str] = None):
 async def create_session(request: SessionCreate):
     """Create a new chat session"""
     try:
-        session = await chat_manager.create_session(
+        session = chat_manager.create_session(
             model=request.model,
             system_prompt=request.system_prompt,
             metadata=request.metadata
@@ -301,20 +456,11 @@ async def create_session(request: SessionCreate):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/v1/sessions", response_model=List[SessionResponse])
-async def list_sessions():
-    """List all chat sessions"""
+async def list_sessions(limit: int = Query(100, ge=1, le=1000), offset: int = Query(0, ge=0)):
+    """List chat sessions, most recently updated first"""
     try:
-        sessions = await chat_manager.list_sessions()
-        return [
-            SessionResponse(
-                session_id=session.session_id,
-                model=session.model,
-                created_at=session.created_at,
-                updated_at=session.updated_at,
-                message_count=len(session.messages)
-            )
-            for session in sessions
-        ]
+        sessions = chat_manager.list_sessions(limit=limit, offset=offset)
+        return [SessionResponse(**session) for session in sessions]
     except Exception as e:
         logger.error(f"Error listing sessions: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -323,7 +469,7 @@ async def list_sessions():
 async def get_session(session_id: str):
     """Get a specific chat session"""
     try:
-        session = await chat_manager.get_session(session_id)
+        session = chat_manager.get_session(session_id)
         if not session:
             raise HTTPException(status_code=404, detail="Session not found")
         return {
@@ -356,12 +502,14 @@ async def add_message(
 ):
     """Add a message to a chat session"""
     try:
-        session = await chat_manager.get_session(session_id)
+        session = chat_manager.get_session(session_id)
         if not session:
             raise HTTPException(status_code=404, detail="Session not found")
 
+        await _admit(session.model)
+
         # Add user message
-        await session.add_message(
+        session.add_message(
             role=message.role,
             content=message.content,
             model=message.model,
@@ -371,12 +519,12 @@ async def add_message(
         # Get model response in background
         async def get_model_response():
             try:
-                handler = get_model_handler(session.model)
-                response = await handler.chat(
-                    [{"role": msg.role, "content": msg.content} for msg in session.messages],
-                    temperature=0.7
-                )
-                await session.add_message(
+                async with handler_registry.lease(session.model) as handler:
+                    response = await handler.chat(
+                        [{"role": msg.role, "content": msg.content} for msg in session.messages],
+                        temperature=0.7
+                    )
+                session.add_message(
                     role="assistant",
                     content=response.content,
                     model=session.model,
@@ -384,7 +532,7 @@ async def add_message(
                 )
             except Exception as e:
                 logger.error(f"Error getting model response: {str(e)}")
-                await session.add_message(
+                session.add_message(
                     role="assistant",
                     content="Sorry, I encountered an error while processing your request.",
                     model=session.model,
@@ -400,11 +548,59 @@ async def add_message(
         logger.error(f"Error adding message: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/v1/sessions/{session_id}/messages/stream")
+async def stream_message(
+    session_id: str,
+    message: ChatMessage,
+    http_request: Request,
+    stream_format: Literal["sse", "ndjson"] = "sse"
+):
+    """Add a message to a chat session and stream the model's reply"""
+    try:
+        session = chat_manager.get_session(session_id)
+        if not session:
+            raise HTTPException(status_code=404, detail="Session not found")
+
+        await _admit(session.model)
+
+        session.add_message(
+            role=message.role,
+            content=message.content,
+            model=message.model,
+            metadata=message.metadata
+        )
+
+        async def save_response(content: str):
+            session.add_message(
+                role="assistant",
+                content=content,
+                model=session.model
+            )
+
+        handler = handler_registry.acquire(session.model)
+        return _streaming_response(
+            http_request,
+            handler.chat_stream(
+                [{"role": msg.role, "content": msg.content} for msg in session.messages],
+                temperature=0.7
+            ),
+            session.model,
+            stream_format,
+            handler,
+            on_complete=save_response
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error streaming message: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.delete("/v1/sessions/{session_id}")
 async def delete_session(session_id: str):
     """Delete a chat session"""
     try:
-        success = await chat_manager.delete_session(session_id)
+        success = chat_manager.delete_session(session_id)
         if not success:
             raise HTTPException(status_code=404, detail="Session not found")
         return {"status": "session deleted"}
@@ -419,15 +615,15 @@ async def check_health(model: Optional[str] = None):
     """Check health of models"""
     try:
         if model:
-            handler = get_model_handler(model)
-            health = await monitor.check_health(model, handler)
+            async with handler_registry.lease(model) as handler:
+                health = await monitor.check_health(model, handler)
             return {model: health}
         else:
             health_status = {}
-            for model_name in config.validate(value={}).keys():
-                if config.validate(value={})[model_name]:
-                    handler = get_model_handler(model_name)
-                    health = await monitor.check_health(model_name, handler)
+            for model_name, is_valid in handler_registry.status.items():
+                if is_valid:
+                    async with handler_registry.lease(model_name) as handler:
+                        health = await monitor.check_health(model_name, handler)
                     health_status[model_name] = health
             return health_status
     except Exception as e:
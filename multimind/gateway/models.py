@@ -2,16 +2,20 @@
 Model handlers for different AI providers in the MultiMind Gateway
 """
 
+import asyncio
+import json
 import logging
-from typing import Dict, List, Optional
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, AsyncGenerator, AsyncIterator, Set
 
+import aiohttp
 import openai
 import anthropic
-import requests
-from huggingface_hub import InferenceClient
+from huggingface_hub import AsyncInferenceClient
 
 from ..core.models import ModelHandler, ModelResponse
-from .config import ModelConfig, config
+from ..core.http_pool import http_pool
+from .config import GatewayConfig, ModelConfig, config
 
 logger = logging.getLogger(__name__)
 
@@ -59,6 +63,23 @@ class OpenAIHandler(ModelHandler):
             logger.error(f"OpenAI API error: {str(e)}")
             raise
 
+    async def chat_stream(self, messages: List[Dict[str, str]], **kwargs) -> AsyncGenerator[str, None]:
+        """Stream completion deltas as they arrive"""
+        try:
+            stream = await self._client.chat.completions.create(
+                model=self.config.model_name,
+                messages=messages,
+                temperature=kwargs.get("temperature", self.config.temperature),
+                max_tokens=kwargs.get("max_tokens", self.config.max_tokens),
+                stream=True
+            )
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except Exception as e:
+            logger.error(f"OpenAI API error: {str(e)}")
+            raise
+
     async def generate(self, prompt: str, **kwargs) -> ModelResponse:
         messages = [{"role": "user", "content": prompt}]
         return await self.chat(messages, **kwargs)
@@ -95,6 +116,25 @@ class AnthropicHandler(ModelHandler):
             logger.error(f"Anthropic API error: {str(e)}")
             raise
 
+    async def chat_stream(self, messages: List[Dict[str, str]], **kwargs) -> AsyncGenerator[str, None]:
+        """Stream text deltas as they arrive"""
+        try:
+            prompt = "\n".join([f"{m['role']}: {m['content']}" for m in messages])
+
+            stream = await self._client.messages.create(
+                model=self.config.model_name,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=kwargs.get("temperature", self.config.temperature),
+                max_tokens=kwargs.get("max_tokens", self.config.max_tokens),
+                stream=True
+            )
+            async for event in stream:
+                if event.type == "content_block_delta" and getattr(event.delta, "text", None):
+                    yield event.delta.text
+        except Exception as e:
+            logger.error(f"Anthropic API error: {str(e)}")
+            raise
+
     async def generate(self, prompt: str, **kwargs) -> ModelResponse:
         messages = [{"role": "user", "content": prompt}]
         return await self.chat(messages, **kwargs)
@@ -102,24 +142,41 @@ class AnthropicHandler(ModelHandler):
 class OllamaHandler(ModelHandler):
     """Handler for Ollama models"""
 
-    async def chat(self, messages: List[Dict[str, str]], **kwargs) -> ModelResponse:
-        try:
-            # Convert messages to Ollama format
-            prompt = "\n".join([f"{m['role']}: {m['content']}" for m in messages])
+    def _request_data(self, messages: List[Dict[str, str]], stream: bool, **kwargs) -> Dict:
+        # Convert messages to Ollama format
+        prompt = "\n".join([f"{m['role']}: {m['content']}" for m in messages])
+        return {
+            "model": self.config.model_name,
+            "prompt": prompt,
+            "stream": stream,
+            "temperature": kwargs.get("temperature", self.config.temperature),
+            "max_tokens": kwargs.get("max_tokens", self.config.max_tokens)
+        }
 
-            response = requests.post(
-                f"{self.config.api_base}/api/generate",
-                json={
-                    "model": self.config.model_name,
-                    "prompt": prompt,
-                    "temperature": kwargs.get("temperature", self.config.temperature),
-                    "max_tokens": kwargs.get("max_tokens", self.config.max_tokens)
-                },
-                timeout=self.config.timeout if hasattr(self.config, 'timeout') else 30
+    def _post(self, data: Dict):
+        """POST to the generate endpoint over the shared connection pool."""
+        session = http_pool.get_session(self.config.api_base)
+        if data["stream"]:
+            # A stream may run as long as generation does; only bound connecting and each gap between chunks
+            timeout = aiohttp.ClientTimeout(
+                total=None,
+                sock_connect=self.config.timeout,
+                sock_read=self.config.timeout
             )
-            response.raise_for_status()
+        else:
+            timeout = aiohttp.ClientTimeout(total=self.config.timeout)
+        return session.post(
+            f"{self.config.api_base}/api/generate",
+            json=data,
+            timeout=timeout
+        )
+
+    async def chat(self, messages: List[Dict[str, str]], **kwargs) -> ModelResponse:
+        try:
+            async with self._post(self._request_data(messages, stream=False, **kwargs)) as response:
+                response.raise_for_status()
+                result = await response.json()
 
-            result = response.json()
             return ModelResponse(
                 content=result["response"],
                 model=self.config.model_name,
@@ -129,6 +186,21 @@ class OllamaHandler(ModelHandler):
             logger.error(f"Ollama API error: {str(e)}")
             raise
 
+    async def chat_stream(self, messages: List[Dict[str, str]], **kwargs) -> AsyncGenerator[str, None]:
+        """Stream the response text as Ollama generates it"""
+        try:
+            async with self._post(self._request_data(messages, stream=True, **kwargs)) as response:
+                response.raise_for_status()
+                async for line in response.content:
+                    if not line.strip():
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get("response"):
+                        yield chunk["response"]
+        except Exception as e:
+            logger.error(f"Ollama API error: {str(e)}")
+            raise
+
     async def generate(self, prompt: str, **kwargs) -> ModelResponse:
         messages = [{"role": "user", "content": prompt}]
         return await self.chat(messages, **kwargs)
@@ -138,22 +210,25 @@ class HuggingFaceHandler(ModelHandler):
 
     def __init__(self, model_config: ModelConfig):
         super().__init__(model_config)
-        self._client = InferenceClient(
+        self._client = AsyncInferenceClient(
             model=self.config.model_name,
-            token=self.config.api_key
+            token=self.config.api_key,
+            timeout=self.config.timeout
         )
 
+    def _generation_kwargs(self, **kwargs) -> Dict:
+        return {
+            "temperature": kwargs.get("temperature", self.config.temperature),
+            "max_new_tokens": kwargs.get("max_tokens", self.config.max_tokens),
+            "return_full_text": False
+        }
+
     async def chat(self, messages: List[Dict[str, str]], **kwargs) -> ModelResponse:
         try:
             # Convert messages to prompt format
             prompt = "\n".join([f"{m['role']}: {m['content']}" for m in messages])
 
-            response = await self._client.text_generation(
-                prompt,
-                temperature=kwargs.get("temperature", self.config.temperature),
-                max_new_tokens=kwargs.get("max_tokens", self.config.max_tokens),
-                return_full_text=False
-            )
+            response = await self._client.text_generation(prompt, **self._generation_kwargs(**kwargs))
 
             return ModelResponse(
                 content=response,
@@ -163,22 +238,168 @@ class HuggingFaceHandler(ModelHandler):
             logger.error(f"HuggingFace API error: {str(e)}")
             raise
 
+    async def chat_stream(self, messages: List[Dict[str, str]], **kwargs) -> AsyncGenerator[str, None]:
+        """Stream generated tokens from the inference endpoint"""
+        try:
+            prompt = "\n".join([f"{m['role']}: {m['content']}" for m in messages])
+            stream = await self._client.text_generation(
+                prompt, stream=True, **self._generation_kwargs(**kwargs)
+            )
+            async for text in stream:
+                yield text
+        except Exception as e:
+            logger.error(f"HuggingFace API error: {str(e)}")
+            raise
+
     async def generate(self, prompt: str, **kwargs) -> ModelResponse:
         messages = [{"role": "user", "content": prompt}]
         return await self.chat(messages, **kwargs)
 
+MODEL_HANDLERS = {
+    "openai": OpenAIHandler,
+    "anthropic": AnthropicHandler,
+    "ollama": OllamaHandler,
+    "huggingface": HuggingFaceHandler
+}
+
+# Setting each provider needs before its handler can be used
+REQUIRED_SETTINGS = {
+    "openai": "api_key",
+    "anthropic": "api_key",
+    "ollama": "api_base",
+    "huggingface": "model_name"
+}
+
+class HandlerRegistry:
+    """
+    Builds each model handler once and reuses it until its configuration changes
+
+    Handlers that are replaced or dropped have their SDK clients closed once
+    every request that leased them has released them.
+    """
+
+    def __init__(self, gateway_config: Optional[GatewayConfig] = None):
+        self.config = gateway_config or config
+        self.status: Dict[str, bool] = {}
+        self._handlers: Dict[str, ModelHandler] = {}
+        self._fingerprints: Dict[str, Dict] = {}
+        self._closing: Set[asyncio.Task] = set()
+        self._leases: Dict[ModelHandler, int] = {}
+        self._retired: Set[ModelHandler] = set()
+
+    def validate(self) -> Dict[str, bool]:
+        """Check which models are configured well enough to use"""
+        self.status = {
+            model_name: bool(getattr(self.config.get_model_config(model_name), setting, None))
+            for model_name, setting in REQUIRED_SETTINGS.items()
+        }
+        return self.status
+
+    def reload(self, gateway_config: Optional[GatewayConfig] = None) -> Dict[str, bool]:
+        """
+        Re-validate configuration and rebuild handlers whose settings changed.
+
+        Pass a new GatewayConfig (e.g. after environment changes) to swap it in.
+        Handlers for valid models are built eagerly so a bad SDK setup shows up
+        here rather than on the first request.
+        """
+        if gateway_config is not None:
+            self.config = gateway_config
+        self.validate()
+        for model_name, is_valid in self.status.items():
+            if not is_valid:
+                handler = self._handlers.pop(model_name, None)
+                self._fingerprints.pop(model_name, None)
+                if handler is not None:
+                    self._retire(handler)
+                continue
+            try:
+                self.get(model_name)
+            except Exception as e:
+                logger.error(f"Failed to initialize {model_name} handler: {str(e)}")
+                self.status[model_name] = False
+        return self.status
+
+    def get(self, model_name: str) -> ModelHandler:
+        """Get the cached handler for a model, building it on first use or after a config change"""
+        key = model_name.lower()
+        handler_class = MODEL_HANDLERS.get(key)
+        if not handler_class:
+            raise ValueError(f"Unsupported model: {model_name}")
+
+        model_config = self.config.get_model_config(key)
+        fingerprint = model_config.model_dump()
+        if key not in self._handlers or self._fingerprints.get(key) != fingerprint:
+            replaced = self._handlers.get(key)
+            self._handlers[key] = handler_class(model_config)
+            self._fingerprints[key] = fingerprint
+            if replaced is not None:
+                self._retire(replaced)
+        return self._handlers[key]
+
+    def acquire(self, model_name: str) -> ModelHandler:
+        """Get a model's handler and keep its client open until release() is called"""
+        handler = self.get(model_name)
+        self._leases[handler] = self._leases.get(handler, 0) + 1
+        return handler
+
+    def release(self, handler: ModelHandler) -> None:
+        """Drop a lease taken by acquire(), closing the handler if it was retired meanwhile"""
+        remaining = self._leases.get(handler, 0) - 1
+        if remaining > 0:
+            self._leases[handler] = remaining
+            return
+        self._leases.pop(handler, None)
+        if handler in self._retired:
+            self._retired.discard(handler)
+            self._close_later(handler)
+
+    @asynccontextmanager
+    async def lease(self, model_name: str) -> AsyncIterator[ModelHandler]:
+        """Use a model's handler for the duration of a request"""
+        handler = self.acquire(model_name)
+        try:
+            yield handler
+        finally:
+            self.release(handler)
+
+    async def close(self) -> None:
+        """Close every handler's client, including retired ones that are still leased"""
+        handlers = list(self._handlers.values()) + list(self._retired)
+        self._handlers.clear()
+        self._fingerprints.clear()
+        self._retired.clear()
+        self._leases.clear()
+        await asyncio.gather(*(self._close_handler(h) for h in handlers), *self._closing)
+
+    def _retire(self, handler: ModelHandler) -> None:
+        """Close a handler that is no longer served, waiting for in-flight requests to release it"""
+        if self._leases.get(handler):
+            self._retired.add(handler)
+            return
+        self._close_later(handler)
+
+    def _close_later(self, handler: ModelHandler) -> None:
+        """Close a handler's client, in the background if a loop is running"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            asyncio.run(self._close_handler(handler))
+            return
+        task = loop.create_task(self._close_handler(handler))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    @staticmethod
+    async def _close_handler(handler: ModelHandler) -> None:
+        try:
+            await handler.close()
+        except Exception as e:
+            logger.warning(f"Failed to close {type(handler).__name__}: {str(e)}")
+
+# Global handler registry
+handler_registry = HandlerRegistry()
+
 def get_model_handler(model_name: str) -> ModelHandler:
-    """Factory function to get the appropriate model handler"""
-    model_map = {
-        "openai": OpenAIHandler,
-        "anthropic": AnthropicHandler,
-        "ollama": OllamaHandler,
-        "huggingface": HuggingFaceHandler
-    }
-
-    handler_class = model_map.get(model_name.lower())
-    if not handler_class:
-        raise ValueError(f"Unsupported model: {model_name}")
-
-    model_config = config.get_model_config(model_name)
-    return handler_class(model_config)
\ No newline at end of file
+    """Get the shared handler for a model from the global registry"""
+    return handler_registry.get(model_name)
@@ -3,7 +3,7 @@ Advanced LLM interface module for managing LLM connections and generation.
 """
 
 from typing import List, Dict, Any, Optional, Union, Tuple, Protocol, runtime_checkable
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict
 from enum import Enum
 import asyncio
 import json
@@ -12,6 +12,8 @@ from datetime import datetime
 import logging
 from ..models.base import BaseLLM
 from ..prompts.advanced_prompting import AdvancedPrompting, PromptType, PromptStrategy
+from ..core.response_cache import ResponseCache, make_cache_key
+from ..core.semantic_cache import SemanticResponseCache
 
 @dataclass
 class GenerationConfig:
@@ -75,6 +77,8 @@ class LLMInterface:
         error_config: Optional[ErrorHandlingConfig] = None,
         ensemble_strategy: str = "llm",
         custom_ensemble_fn: Optional[Any] = None,
+        response_cache: Optional[ResponseCache] = None,
+        semantic_cache: Optional[SemanticResponseCache] = None,
         **kwargs
     ):
         """
@@ -86,6 +90,10 @@ class LLMInterface:
             error_config: Optional error handling configuration
             ensemble_strategy: Ensemble strategy for combining results
             custom_ensemble_fn: Optional custom ensemble function
+            response_cache: Optional cache that coalesces and reuses identical
+                deterministic generations
+            semantic_cache: Optional cache that reuses generations for similar
+                prompts (applies if enabled for "text_generation")
             **kwargs: Additional parameters
         """
         self.models = models
@@ -94,6 +102,8 @@ class LLMInterface:
         self.kwargs = kwargs
         self.ensemble_strategy = EnsembleStrategy(ensemble_strategy)
         self.custom_ensemble_fn = custom_ensemble_fn
+        self.response_cache = response_cache
+        self.semantic_cache = semantic_cache
         
         # Initialize advanced prompting
         self.prompting = AdvancedPrompting(model=models[default_model])
@@ -107,7 +117,8 @@ class LLMInterface:
             "successful_requests": 0,
             "failed_requests": 0,
             "total_tokens": 0,
-            "total_latency": 0.0
+            "total_latency": 0.0,
+            "cached_requests": 0
         }
 
     def _get_default_error_config(self) -> ErrorHandlingConfig:
@@ -155,8 +166,9 @@ class LLMInterface:
             # Generate text
             start_time = time.time()
             
-            result = await self._generate_with_retry(
+            result, cached = await self._generate_cached(
                 model,
+                model_name or self.default_model,
                 prompt,
                 gen_config,
                 **kwargs
@@ -166,13 +178,20 @@ class LLMInterface:
             
             # Update metrics
             self.metrics["successful_requests"] += 1
-            self.metrics["total_tokens"] += result.get("usage", {}).get("total_tokens", 0)
             self.metrics["total_latency"] += latency
+            if cached:
+                self.metrics["cached_requests"] += 1
+            else:
+                self.metrics["total_tokens"] += result.get("usage", {}).get("total_tokens", 0)
+            
+            metadata = dict(result.get("metadata") or {})
+            if cached:
+                metadata["cached"] = True
             
             return GenerationResult(
                 text=result["text"],
-                metadata=result.get("metadata", {}),
-                usage=result.get("usage", {}),
+                metadata=metadata,
+                usage=dict(result.get("usage") or {}),
                 model=model_name or self.default_model,
                 latency=latency
             )
@@ -190,6 +209,41 @@ class LLMInterface:
                 **kwargs
             )
 
+    async def _generate_cached(
+        self,
+        model: BaseLLM,
+        model_name: str,
+        prompt: str,
+        config: GenerationConfig,
+        **kwargs
+    ) -> Tuple[Dict[str, Any], bool]:
+        """Generate through the exact and semantic caches; returns (result, cached)."""
+        scope = (model_name, asdict(config), kwargs)
+        params = {"temperature": config.temperature, **config.custom_params, **kwargs}
+        
+        async def generate_semantic():
+            if (
+                self.semantic_cache is not None
+                and self.semantic_cache.enabled_for("text_generation")
+                and self.semantic_cache.should_cache(params)
+            ):
+                return await self.semantic_cache.get_or_compute(
+                    prompt,
+                    lambda: self._generate_with_retry(model, prompt, config, **kwargs),
+                    scope=make_cache_key(*scope)
+                )
+            return await self._generate_with_retry(model, prompt, config, **kwargs), False
+        
+        if self.response_cache is None:
+            return await generate_semantic()
+        
+        (result, semantic_hit), cached = await self.response_cache.get_or_compute(
+            make_cache_key(*scope, prompt),
+            generate_semantic,
+            params
+        )
+        return result, cached or semantic_hit
+
     def _get_default_config(self, model: BaseLLM) -> GenerationConfig:
         """Get default generation configuration."""
         return GenerationConfig(
@@ -558,5 +612,6 @@ class LLMInterface:
             "successful_requests": 0,
             "failed_requests": 0,
             "total_tokens": 0,
-            "total_latency": 0.0
+            "total_latency": 0.0,
+            "cached_requests": 0
         } 
\ No newline at end of file
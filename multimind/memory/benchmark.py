@@ -0,0 +1,498 @@
+"""
+Benchmark and profiling harness for memory implementations.
+
+Drives memory classes through add/get/search/save/load at configurable
+scales with a deterministic fake LLM and embedder, and reports latency
+percentiles, throughput, peak RSS and bytes written.
+
+Usage:
+    python -m multimind.memory.benchmark --memory BufferMemory --scales 1000 10000
+    python -m multimind.memory.benchmark --all --scales 1000 --json results.json
+"""
+
+from typing import List, Dict, Any, Optional, Callable, Type
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+import argparse
+import asyncio
+import contextlib
+import importlib
+import inspect
+import io
+import json
+import multiprocessing
+import pkgutil
+import signal
+import sys
+import tempfile
+import threading
+import time
+import zlib
+import numpy as np
+from .base import BaseMemory
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_VOCABULARY = (
+    "agent user system memory context task plan result error retry model "
+    "query answer document search index cache vector token summary event "
+    "time place person project meeting deadline report update status"
+).split()
+
+_SEARCH_METHODS = (
+    "search", "search_messages", "get_relevant_messages", "get_relevant_memory",
+    "get_similar_memories", "query", "retrieve"
+)
+
+
+class FakeLLM:
+    """Deterministic stand-in for an LLM; responses depend only on the prompt."""
+
+    def __init__(self, response: Optional[str] = None):
+        self.response = response
+        self.calls = 0
+
+    def _respond(self, prompt: str) -> str:
+        self.calls += 1
+        if self.response is not None:
+            return self.response
+        return "{}"
+
+    async def generate(self, prompt: str = "", **kwargs) -> str:
+        return self._respond(prompt)
+
+    async def chat(self, messages: List[Dict[str, str]], **kwargs) -> str:
+        return self._respond(json.dumps(messages))
+
+    async def embeddings(self, text: str, **kwargs) -> List[float]:
+        return FakeEmbedder()(text).tolist()
+
+
+class FakeEmbedder:
+    """Deterministic hashing embedder producing unit vectors."""
+
+    def __init__(self, dim: int = 128):
+        self.dim = dim
+
+    def __call__(self, text: str) -> np.ndarray:
+        rng = np.random.default_rng(zlib.crc32(text.encode("utf-8")))
+        vector = rng.standard_normal(self.dim).astype(np.float32)
+        return vector / np.linalg.norm(vector)
+
+    def embed(self, text: str) -> np.ndarray:
+        return self(text)
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        return np.stack([self(text) for text in texts])
+
+
+@dataclass
+class OperationStats:
+    """Latency statistics for one operation."""
+    count: int = 0
+    total_seconds: float = 0.0
+    p50_ms: float = 0.0
+    p95_ms: float = 0.0
+    p99_ms: float = 0.0
+    max_ms: float = 0.0
+    throughput: float = 0.0  # operations per second
+
+    @classmethod
+    def from_samples(cls, samples: List[float]) -> "OperationStats":
+        if not samples:
+            return cls()
+        latencies = np.asarray(samples) * 1000
+        total = float(np.sum(samples))
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        return cls(
+            count=len(samples),
+            total_seconds=total,
+            p50_ms=float(p50),
+            p95_ms=float(p95),
+            p99_ms=float(p99),
+            max_ms=float(latencies.max()),
+            throughput=len(samples) / total if total > 0 else float("inf")
+        )
+
+
+@dataclass
+class BenchmarkResult:
+    """Result of benchmarking one memory class at one scale."""
+    memory: str
+    scale: int
+    items_added: int = 0
+    truncated: bool = False
+    operations: Dict[str, OperationStats] = field(default_factory=dict)
+    peak_rss_kb: Optional[int] = None
+    bytes_written: Optional[int] = None
+    storage_bytes: int = 0
+    llm_calls: int = 0
+    error: Optional[str] = None
+
+
+def generate_messages(count: int, seed: int = 0) -> List[Dict[str, str]]:
+    """Generate deterministic synthetic conversation messages."""
+    rng = np.random.default_rng(seed)
+    words = rng.integers(0, len(_VOCABULARY), size=(count, 12))
+    return [
+        {
+            "role": "user" if i % 2 == 0 else "assistant",
+            "content": f"message {i}: " + " ".join(_VOCABULARY[w] for w in row)
+        }
+        for i, row in enumerate(words)
+    ]
+
+
+def discover_memory_classes() -> Dict[str, Type[BaseMemory]]:
+    """Import every module in ``multimind.memory`` and collect concrete BaseMemory subclasses."""
+    package = importlib.import_module(__package__)
+    classes = {}
+    for module_info in pkgutil.iter_modules(package.__path__):
+        if module_info.name in ("benchmark", "base"):
+            continue
+        try:
+            module = importlib.import_module(f"{__package__}.{module_info.name}")
+        except Exception:
+            # Optional dependency missing or module not importable
+            continue
+        for name, obj in vars(module).items():
+            if (
+                inspect.isclass(obj)
+                and issubclass(obj, BaseMemory)
+                and obj is not BaseMemory
+                and obj.__module__ == module.__name__
+                and not inspect.isabstract(obj)
+            ):
+                classes[name] = obj
+    return classes
+
+
+def default_factory(
+    memory_class: Type[BaseMemory],
+    storage_dir: Path,
+    llm: FakeLLM,
+    embedder: FakeEmbedder
+) -> BaseMemory:
+    """Instantiate a memory class, filling in the constructor arguments it accepts."""
+    parameters = inspect.signature(memory_class.__init__).parameters
+    candidates = {
+        "llm": llm,
+        "model": llm,
+        "embedder": embedder,
+        "embedding_model": embedder,
+        "storage_path": str(storage_dir / "memory.json"),
+        "storage_dir": str(storage_dir),
+        "path": str(storage_dir / "memory.json"),
+        "database_url": (
+            f"sqlite+aiosqlite:///{storage_dir / 'memory.db'}"
+            if memory_class.__name__.startswith("Async")
+            else f"sqlite:///{storage_dir / 'memory.db'}"
+        ),
+    }
+    kwargs = {name: value for name, value in candidates.items() if name in parameters}
+    return memory_class(**kwargs)
+
+
+async def _maybe_await(value: Any) -> Any:
+    if inspect.isawaitable(value):
+        return await value
+    return value
+
+
+def _directory_size(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+def _io_bytes_written() -> Optional[int]:
+    """Bytes written by this process according to /proc, where available."""
+    try:
+        with open("/proc/self/io") as f:
+            for line in f:
+                if line.startswith("wchar:"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+def _peak_rss_kb() -> Optional[int]:
+    # VmHWM is per address space; ru_maxrss survives exec and would include the parent's peak
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux kilobytes
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+async def _timed(samples: List[float], call: Callable[[], Any]) -> Any:
+    start = time.perf_counter()
+    result = await _maybe_await(call())
+    samples.append(time.perf_counter() - start)
+    return result
+
+
+class _PhaseTimeout(BaseException):
+    """Raised by the alarm handler; a BaseException so memory code's ``except Exception`` can't swallow it."""
+
+
+@contextlib.contextmanager
+def _phase_budget(seconds: Optional[float]):
+    """
+    Interrupt the enclosed phase with ``_PhaseTimeout`` after ``seconds``.
+
+    Uses SIGALRM, so it also stops a single call that never returns, but
+    only on platforms with ``setitimer`` and only in the main thread;
+    elsewhere the budget is left to the between-call deadline checks.
+    """
+    if (
+        not seconds
+        or not hasattr(signal, "setitimer")
+        or threading.current_thread() is not threading.main_thread()
+    ):
+        yield
+        return
+
+    def interrupt(signum, frame):
+        raise _PhaseTimeout()
+
+    previous = signal.signal(signal.SIGALRM, interrupt)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+async def benchmark_memory(
+    memory_class: Type[BaseMemory],
+    scale: int,
+    queries: int = 100,
+    max_seconds: Optional[float] = None,
+    factory: Callable[..., BaseMemory] = default_factory,
+    quiet: bool = True
+) -> BenchmarkResult:
+    """
+    Benchmark one memory class at one scale.
+
+    Adds ``scale`` messages, then runs ``queries`` get and search calls and
+    one save/load round trip. If adding takes longer than ``max_seconds``
+    the add phase stops early and the result is marked ``truncated``, which
+    is how quadratic behaviour shows up at larger scales. Get and search are
+    held to the same budget; a save or load that exceeds it is an error.
+    """
+    result = BenchmarkResult(memory=memory_class.__name__, scale=scale)
+    llm = FakeLLM()
+    embedder = FakeEmbedder()
+    messages = generate_messages(scale)
+    # Suppress the print-based error reporting used throughout the memory modules
+    output = contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext()
+
+    with tempfile.TemporaryDirectory(prefix="multimind_bench_") as tmp, output:
+        storage_dir = Path(tmp)
+        bytes_before = _io_bytes_written()
+        try:
+            memory = factory(memory_class, storage_dir, llm, embedder)
+
+            # Add
+            samples = []
+            deadline = time.perf_counter() + max_seconds if max_seconds else None
+            try:
+                with _phase_budget(max_seconds):
+                    for message in messages:
+                        await _timed(samples, lambda: memory.add_message(message))
+                        if deadline and time.perf_counter() > deadline:
+                            result.truncated = True
+                            break
+            except _PhaseTimeout:
+                result.truncated = True
+            result.items_added = len(samples)
+            result.operations["add"] = OperationStats.from_samples(samples)
+
+            # Get
+            samples = []
+            try:
+                with _phase_budget(max_seconds):
+                    for _ in range(queries):
+                        await _timed(samples, memory.get_messages)
+            except _PhaseTimeout:
+                result.truncated = True
+            result.operations["get"] = OperationStats.from_samples(samples)
+
+            # Search, with whichever search method the class provides
+            search = next(
+                (getattr(memory, name) for name in _SEARCH_METHODS if hasattr(memory, name)),
+                None
+            )
+            if search is not None:
+                samples = []
+                query_messages = generate_messages(queries, seed=1)
+                try:
+                    with _phase_budget(max_seconds):
+                        for message in query_messages:
+                            try:
+                                await _timed(samples, lambda: search(message["content"]))
+                            except TypeError:
+                                # Search signature not driveable with a plain query string
+                                break
+                except _PhaseTimeout:
+                    result.truncated = True
+                result.operations["search"] = OperationStats.from_samples(samples)
+
+            # Save / load
+            for op in ("save", "load"):
+                samples = []
+                try:
+                    with _phase_budget(max_seconds):
+                        await _timed(samples, getattr(memory, op))
+                except _PhaseTimeout:
+                    raise TimeoutError(f"{op} exceeded {max_seconds}s")
+                result.operations[op] = OperationStats.from_samples(samples)
+
+            result.storage_bytes = _directory_size(storage_dir)
+        except Exception as e:
+            result.error = f"{type(e).__name__}: {e}"
+
+        bytes_after = _io_bytes_written()
+        if bytes_before is not None and bytes_after is not None:
+            result.bytes_written = bytes_after - bytes_before
+
+    result.llm_calls = llm.calls
+    result.peak_rss_kb = _peak_rss_kb()
+    return result
+
+
+def _run(
+    memory_class: Type[BaseMemory],
+    scale: int,
+    queries: int,
+    max_seconds: Optional[float]
+) -> Dict[str, Any]:
+    try:
+        result = asyncio.run(benchmark_memory(
+            memory_class, scale, queries=queries, max_seconds=max_seconds
+        ))
+    except _PhaseTimeout:
+        # The alarm fired while the event loop itself was waiting, outside any phase's handler
+        result = BenchmarkResult(
+            memory=memory_class.__name__, scale=scale, error=f"timed out after {max_seconds}s"
+        )
+    return asdict(result)
+
+
+def _run_isolated(args: Dict[str, Any]) -> Dict[str, Any]:
+    """Benchmark in a worker process so peak RSS is per memory class and scale."""
+    # Import only the class's own module so other modules' dependencies don't inflate RSS
+    memory_class = getattr(importlib.import_module(args["module"]), args["memory"])
+    return _run(memory_class, args["scale"], args["queries"], args["max_seconds"])
+
+
+def run_benchmarks(
+    memory_names: List[str],
+    scales: List[int],
+    queries: int = 100,
+    max_seconds: Optional[float] = None,
+    isolate: bool = True,
+    run_timeout: Optional[float] = 600.0
+) -> List[Dict[str, Any]]:
+    """
+    Benchmark each named memory class at each scale, optionally one process per run.
+
+    Each phase is held to ``max_seconds`` in-process as well (see
+    ``_phase_budget``). Isolated runs that still exceed ``run_timeout``
+    seconds are terminated and reported as errors.
+    """
+    classes = discover_memory_classes()
+    results = []
+    for name in memory_names:
+        for scale in scales:
+            if name not in classes:
+                results.append(asdict(BenchmarkResult(
+                    memory=name, scale=scale, error="not found or not instantiable"
+                )))
+                continue
+            args = {"memory": name, "module": classes[name].__module__, "scale": scale, "queries": queries, "max_seconds": max_seconds}
+            if isolate:
+                with multiprocessing.get_context("spawn").Pool(1) as pool:
+                    try:
+                        results.append(pool.apply_async(_run_isolated, (args,)).get(run_timeout))
+                    except multiprocessing.TimeoutError:
+                        pool.terminate()
+                        results.append(asdict(BenchmarkResult(
+                            memory=name, scale=scale, error=f"timed out after {run_timeout}s"
+                        )))
+            else:
+                results.append(_run(classes[name], scale, queries, max_seconds))
+    return results
+
+
+def format_results(results: List[Dict[str, Any]]) -> str:
+    """Format results as a plain-text table."""
+    lines = [
+        f"{'memory':<28}{'scale':>8}{'added':>8}{'op':>8}"
+        f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'ops/s':>12}{'rss MB':>9}{'written KB':>12}"
+    ]
+    for result in results:
+        if result["error"]:
+            lines.append(f"{result['memory']:<28}{result['scale']:>8}  error: {result['error']}")
+            continue
+        rss = f"{result['peak_rss_kb'] / 1024:.1f}" if result["peak_rss_kb"] else "-"
+        written = f"{result['bytes_written'] / 1024:.1f}" if result["bytes_written"] is not None else "-"
+        added = f"{result['items_added']}{'*' if result['truncated'] else ''}"
+        for op, stats in result["operations"].items():
+            lines.append(
+                f"{result['memory']:<28}{result['scale']:>8}{added:>8}{op:>8}"
+                f"{stats['p50_ms']:>10.3f}{stats['p95_ms']:>10.3f}{stats['p99_ms']:>10.3f}"
+                f"{stats['throughput']:>12.1f}{rss:>9}{written:>12}"
+            )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark multimind memory implementations.")
+    parser.add_argument("--memory", nargs="*", default=[], help="Memory class names to benchmark")
+    parser.add_argument("--all", action="store_true", help="Benchmark every discoverable memory class")
+    parser.add_argument("--list", action="store_true", help="List discoverable memory classes")
+    parser.add_argument("--scales", nargs="+", type=int, default=[1000, 10000, 100000])
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--max-seconds", type=float, default=60.0, help="Time budget per phase")
+    parser.add_argument("--timeout", type=float, default=600.0, help="Hard limit per isolated run")
+    parser.add_argument("--no-isolate", action="store_true", help="Run in-process (shared peak RSS)")
+    parser.add_argument("--json", help="Write raw results to this file")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print("\n".join(sorted(discover_memory_classes())))
+        return
+    names = sorted(discover_memory_classes()) if args.all else args.memory
+    if not names:
+        parser.error("pass --memory NAME [NAME ...] or --all")
+
+    results = run_benchmarks(
+        names,
+        args.scales,
+        queries=args.queries,
+        max_seconds=args.max_seconds,
+        isolate=not args.no_isolate,
+        run_timeout=args.timeout
+    )
+    print(format_results(results))
+    if any(result["truncated"] for result in results):
+        print("* stopped at --max-seconds")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,10 +6,65 @@ from typing import List, Dict, Any, Optional, Set, Tuple
 from datetime import datetime, timedelta
 import json
 from pathlib import Path
+from collections import defaultdict
+import heapq
 import numpy as np
 from ..models.base import BaseLLM
 from .base import BaseMemory
 
+class LSHContentIndex:
+    """
+    Random-hyperplane LSH index over memory rows for approximate cosine lookup.
+
+    Each of ``num_tables`` tables hashes a vector to ``num_bits`` sign bits;
+    a query is compared only against rows sharing a bucket in some table.
+    """
+
+    def __init__(self, dim: int, num_tables: int = 4, num_bits: int = 12, seed: int = 0):
+        rng = np.random.default_rng(seed)
+        self.planes = rng.standard_normal((num_tables, num_bits, dim)).astype(np.float32)
+        self.powers = 1 << np.arange(num_bits, dtype=np.int64)
+        self.buckets: List[Dict[int, Set[int]]] = [defaultdict(set) for _ in range(num_tables)]
+        self.keys: Dict[int, np.ndarray] = {}
+
+    def _hash(self, vector: np.ndarray) -> np.ndarray:
+        bits = (self.planes @ vector) > 0
+        return bits.astype(np.int64) @ self.powers
+
+    def add(self, location: int, vector: np.ndarray) -> None:
+        """Index (or re-index) the row stored at a location."""
+        self.remove(location)
+        keys = self._hash(vector)
+        self.keys[location] = keys
+        for table, key in zip(self.buckets, keys):
+            table[int(key)].add(location)
+
+    def remove(self, location: int) -> None:
+        """Drop a location from the index."""
+        keys = self.keys.pop(location, None)
+        if keys is None:
+            return
+        for table, key in zip(self.buckets, keys):
+            bucket = table.get(int(key))
+            if bucket is not None:
+                bucket.discard(location)
+                if not bucket:
+                    del table[int(key)]
+
+    def candidates(self, vector: np.ndarray) -> Set[int]:
+        """Get locations colliding with a query vector in any table."""
+        result: Set[int] = set()
+        for table, key in zip(self.buckets, self._hash(vector)):
+            result.update(table.get(int(key), ()))
+        return result
+
+    def clear(self) -> None:
+        """Remove all locations."""
+        for table in self.buckets:
+            table.clear()
+        self.keys.clear()
+
+
 class DNCMemory(BaseMemory):
     """Memory that implements Differentiable Neural Computer architecture."""
 
@@ -38,7 +93,12 @@ class DNCMemory(BaseMemory):
         compression_threshold: float = 0.8,
         enable_backup: bool = True,
         backup_interval: int = 3600,  # 1 hour
-        max_backups: int = 24
+        max_backups: int = 24,
+        sparse_access: bool = False,
+        sparse_top_k: int = 8,
+        lsh_tables: int = 4,
+        lsh_bits: int = 12,
+        save_every: Optional[int] = None
     ):
         super().__init__(memory_key)
         self.llm = llm
@@ -64,16 +124,19 @@ class DNCMemory(BaseMemory):
         self.enable_backup = enable_backup
         self.backup_interval = backup_interval
         self.max_backups = max_backups
+        # Sparse access mode (Sparse Access Memory): top-K weightings, sparse
+        # link matrix, LSH content addressing and heap-ordered allocation
+        self.sparse_access = sparse_access
+        self.sparse_top_k = sparse_top_k
+        self.lsh_tables = lsh_tables
+        self.lsh_bits = lsh_bits
+        # Number of add_message calls between saves; call save() to flush early.
+        # Sparse memories are large, so they batch saves by default.
+        self.save_every = save_every if save_every is not None else (64 if sparse_access else 1)
+        self._unsaved_adds = 0
 
         # Initialize DNC memory matrix
-        self.memory_matrix = np.zeros((memory_size, word_size))
-        self.usage_vector = np.zeros(memory_size)
-        self.precedence_vector = np.zeros(memory_size)
-        self.link_matrix = np.zeros((memory_size, memory_size))
-        self.write_weighting = np.zeros((num_write_heads, memory_size))
-        self.read_weighting = np.zeros((num_read_heads, memory_size))
-        self.read_vectors = np.zeros((num_read_heads, word_size))
-        self.controller_state = np.zeros(controller_size)
+        self._init_state()
 
         # Initialize storage
         self.items: List[Dict[str, Any]] = []
@@ -89,6 +152,45 @@ class DNCMemory(BaseMemory):
         self.last_backup = datetime.now()
         self.load()
 
+    def _init_state(self) -> None:
+        """Allocate the memory matrix, weightings and (in sparse mode) indexes."""
+        self.usage_vector = np.zeros(self.memory_size)
+        self.precedence_vector = np.zeros(self.memory_size)
+        self.read_vectors = np.zeros((self.num_read_heads, self.word_size))
+        self.controller_state = np.zeros(self.controller_size)
+        if self.sparse_access:
+            self.memory_matrix = np.zeros((self.memory_size, self.word_size), dtype=np.float32)
+            # Sparse link matrix: row location -> {column location: weight}
+            self.link_matrix: Any = {}
+            # Sparse weightings: one {location: weight} dict per head, at most top-K entries
+            self.write_weighting: Any = [{} for _ in range(self.num_write_heads)]
+            self.read_weighting: Any = [{} for _ in range(self.num_read_heads)]
+            self.content_index = LSHContentIndex(
+                self.word_size, num_tables=self.lsh_tables, num_bits=self.lsh_bits
+            )
+            # Min-heap of (usage, location) with lazy invalidation
+            self._usage_heap = [(0.0, location) for location in range(self.memory_size)]
+        else:
+            self.memory_matrix = np.zeros((self.memory_size, self.word_size))
+            self.link_matrix = np.zeros((self.memory_size, self.memory_size))
+            self.write_weighting = np.zeros((self.num_write_heads, self.memory_size))
+            self.read_weighting = np.zeros((self.num_read_heads, self.memory_size))
+
+    def _rebuild_sparse_indexes(self) -> None:
+        """Rebuild the usage heap and content index from the memory state."""
+        self._usage_heap = [(float(usage), location) for location, usage in enumerate(self.usage_vector)]
+        heapq.heapify(self._usage_heap)
+        self.content_index.clear()
+        for location in np.flatnonzero(np.any(self.memory_matrix, axis=1)):
+            self.content_index.add(int(location), self.memory_matrix[location])
+
+    @staticmethod
+    def _set_sparse_weight(weighting: Dict[int, float], location: int, weight: float, top_k: int) -> None:
+        """Set a weight in a sparse weighting, keeping only the top-K entries."""
+        weighting[location] = weight
+        if len(weighting) > top_k:
+            del weighting[min(weighting, key=weighting.get)]
+
     async def add_message(self, message: Dict[str, str]) -> None:
         """Add message to DNC memory."""
         # Create new item
@@ -143,7 +245,9 @@ class DNCMemory(BaseMemory):
 
         # Add to storage
         self.items.append(new_item)
-        await self.save()
+        self._unsaved_adds += 1
+        if self._unsaved_adds >= self.save_every:
+            await self.save()
 
     async def _update_memory_matrix(self, item: Dict[str, Any], embedding: List[float]) -> None:
         """Update DNC memory matrix with new item."""
@@ -157,10 +261,14 @@ class DNCMemory(BaseMemory):
             # Update memory matrix
             self.memory_matrix[location] = np.array(embedding)
             item["metadata"]["memory_location"] = location
+            if self.sparse_access:
+                self.content_index.add(location, self.memory_matrix[location])
 
             # Update usage vector
             if self.enable_usage_tracking:
                 self.usage_vector[location] += 1
+                if self.sparse_access:
+                    heapq.heappush(self._usage_heap, (float(self.usage_vector[location]), location))
                 self.usage_history[item["id"]] = [{
                     "timestamp": datetime.now().isoformat(),
                     "location": location,
@@ -170,11 +278,26 @@ class DNCMemory(BaseMemory):
             # Update link matrix if temporal linkage is enabled
             if self.enable_temporal_linkage and len(self.items) > 0:
                 prev_location = self.items[-1]["metadata"]["memory_location"]
-                self.link_matrix[prev_location, location] = 1
+                if self.sparse_access:
+                    row = self.link_matrix.setdefault(prev_location, {})
+                    row.pop(location, None)
+                    row[location] = 1.0
+                    if len(row) > self.sparse_top_k:
+                        # Drop the oldest link in the row
+                        del row[next(iter(row))]
+                else:
+                    self.link_matrix[prev_location, location] = 1
                 self.precedence_vector[location] = 1
 
             # Update write weighting
-            self.write_weighting[0, location] = 1
+            if self.sparse_access:
+                weighting = self.write_weighting[0]
+                weighting.pop(location, None)
+                weighting[location] = 1.0
+                if len(weighting) > self.sparse_top_k:
+                    del weighting[next(iter(weighting))]
+            else:
+                self.write_weighting[0, location] = 1
 
             # Update read weighting for content lookup
             if self.enable_content_lookup:
@@ -187,13 +310,24 @@ class DNCMemory(BaseMemory):
         """Find available memory location using dynamic allocation."""
         # Find least used memory location
         if self.enable_usage_tracking:
-            return np.argmin(self.usage_vector)
+            if self.sparse_access:
+                # Pop stale heap entries until the top reflects current usage
+                while self._usage_heap:
+                    usage, location = self._usage_heap[0]
+                    if usage == self.usage_vector[location]:
+                        return location
+                    heapq.heappop(self._usage_heap)
+            return int(np.argmin(self.usage_vector))
         else:
             # Use first available location
             return len(self.items) % self.memory_size
 
     async def _update_read_weighting(self, item: Dict[str, Any], embedding: List[float]) -> None:
         """Update read weighting based on content similarity."""
+        if self.sparse_access:
+            await self._update_sparse_read_weighting(item, embedding)
+            return
+
         try:
             # Calculate similarity with existing items
             similarities = []
@@ -210,7 +344,9 @@ class DNCMemory(BaseMemory):
             for head_idx in range(self.num_read_heads):
                 if head_idx < len(similarities):
                     item_idx, similarity = similarities[head_idx]
-                    location = self.items[item_idx]["metadata"]["memory_location"]
+                    # The item being added is not in self.items yet
+                    source = self.items[item_idx] if item_idx < len(self.items) else item
+                    location = source["metadata"]["memory_location"]
                     self.read_weighting[head_idx, location] = similarity
                     item["metadata"]["read_heads"].append({
                         "head": head_idx,
@@ -221,11 +357,43 @@ class DNCMemory(BaseMemory):
         except Exception as e:
             print(f"Error updating read weighting: {e}")
 
+    async def _update_sparse_read_weighting(self, item: Dict[str, Any], embedding: List[float]) -> None:
+        """Update top-K read weightings from approximate nearest neighbours."""
+        try:
+            query = np.asarray(embedding, dtype=np.float32)
+            candidates = np.fromiter(self.content_index.candidates(query), dtype=np.int64)
+            if candidates.size < self.num_read_heads:
+                # Too few collisions: fall back to scanning the written rows
+                candidates = np.flatnonzero(self.usage_vector)
+            if candidates.size == 0:
+                return
+
+            rows = self.memory_matrix[candidates]
+            norms = np.linalg.norm(rows, axis=1) * np.linalg.norm(query)
+            similarities = (rows @ query) / np.where(norms == 0, 1.0, norms)
+
+            top = min(self.num_read_heads, candidates.size)
+            best = np.argpartition(-similarities, top - 1)[:top]
+            best = best[np.argsort(-similarities[best])]
+
+            for head_idx, idx in enumerate(best):
+                location = int(candidates[idx])
+                similarity = float(similarities[idx])
+                self._set_sparse_weight(self.read_weighting[head_idx], location, similarity, self.sparse_top_k)
+                item["metadata"]["read_heads"].append({
+                    "head": head_idx,
+                    "location": location,
+                    "similarity": similarity
+                })
+
+        except Exception as e:
+            print(f"Error updating read weighting: {e}")
+
     async def _update_attention(self, item: Dict[str, Any]) -> None:
         """Update attention scores for items."""
         try:
             # Calculate attention score based on usage and recency
-            usage_score = item["metadata"]["usage_count"] / max(1, max(self.usage_vector))
+            usage_score = item["metadata"]["usage_count"] / max(1, self.usage_vector.max())
             recency_score = 1.0  # New items get full recency score
             attention_score = 0.7 * usage_score + 0.3 * recency_score
 
@@ -285,11 +453,10 @@ class DNCMemory(BaseMemory):
             original_size = self.memory_matrix.nbytes
             compressed_matrix = np.zeros_like(self.memory_matrix)
 
-            # Compress each row
-            for i in range(self.memory_size):
-                if np.any(self.memory_matrix[i]):
-                    # Use PCA or similar for compression
-                    compressed_matrix[i] = self.memory_matrix[i] * self.compression_threshold
+            # Compress each non-empty row
+            used_rows = np.any(self.memory_matrix, axis=1)
+            # Use PCA or similar for compression
+            compressed_matrix[used_rows] = self.memory_matrix[used_rows] * self.compression_threshold
 
             # Update memory matrix if compression is significant
             compressed_size = compressed_matrix.nbytes
@@ -345,9 +512,8 @@ class DNCMemory(BaseMemory):
                 "memory_matrix": self.memory_matrix.tolist(),
                 "usage_vector": self.usage_vector.tolist(),
                 "precedence_vector": self.precedence_vector.tolist(),
-                "link_matrix": self.link_matrix.tolist(),
-                "write_weighting": self.write_weighting.tolist(),
-                "read_weighting": self.read_weighting.tolist(),
+                "link_format": self._link_format(),
+                **{key: value.tolist() for key, value in self._serialize_links_and_weightings().items()},
                 "read_vectors": self.read_vectors.tolist(),
                 "controller_state": self.controller_state.tolist(),
                 "items": self.items,
@@ -381,14 +547,7 @@ class DNCMemory(BaseMemory):
 
     async def clear(self) -> None:
         """Clear all memory."""
-        self.memory_matrix = np.zeros((self.memory_size, self.word_size))
-        self.usage_vector = np.zeros(self.memory_size)
-        self.precedence_vector = np.zeros(self.memory_size)
-        self.link_matrix = np.zeros((self.memory_size, self.memory_size))
-        self.write_weighting = np.zeros((self.num_write_heads, self.memory_size))
-        self.read_weighting = np.zeros((self.num_read_heads, self.memory_size))
-        self.read_vectors = np.zeros((self.num_read_heads, self.word_size))
-        self.controller_state = np.zeros(self.controller_size)
+        self._init_state()
         self.items = []
         self.item_embeddings = []
         self.attention_scores = {}
@@ -399,22 +558,37 @@ class DNCMemory(BaseMemory):
         self.backup_history = []
         await self.save()
 
+    def _arrays_path(self) -> Path:
+        """Binary file holding the matrices and vectors next to the JSON file."""
+        return self.storage_path.with_suffix(".npz")
+
+    def _link_format(self) -> str:
+        return "sparse" if self.sparse_access else "dense"
+
     async def save(self) -> None:
         """Save memory to persistent storage."""
         if self.storage_path:
             self.storage_path.parent.mkdir(parents=True, exist_ok=True)
+            # Numeric state goes to a binary .npz; the JSON keeps items and histories
+            arrays_path = self._arrays_path()
+            tmp_path = arrays_path.with_name(arrays_path.name + ".tmp")
+            with open(tmp_path, 'wb') as f:
+                np.savez(
+                    f,
+                    memory_matrix=self.memory_matrix,
+                    usage_vector=self.usage_vector,
+                    precedence_vector=self.precedence_vector,
+                    read_vectors=self.read_vectors,
+                    controller_state=self.controller_state,
+                    item_embeddings=np.asarray(self.item_embeddings, dtype=float),
+                    **self._serialize_links_and_weightings()
+                )
+            tmp_path.replace(arrays_path)
             with open(self.storage_path, 'w') as f:
                 json.dump({
-                    "memory_matrix": self.memory_matrix.tolist(),
-                    "usage_vector": self.usage_vector.tolist(),
-                    "precedence_vector": self.precedence_vector.tolist(),
-                    "link_matrix": self.link_matrix.tolist(),
-                    "write_weighting": self.write_weighting.tolist(),
-                    "read_weighting": self.read_weighting.tolist(),
-                    "read_vectors": self.read_vectors.tolist(),
-                    "controller_state": self.controller_state.tolist(),
+                    "arrays_file": arrays_path.name,
+                    "link_format": self._link_format(),
                     "items": self.items,
-                    "item_embeddings": self.item_embeddings,
                     "attention_scores": self.attention_scores,
                     "usage_history": self.usage_history,
                     "learning_history": self.learning_history,
@@ -425,22 +599,28 @@ class DNCMemory(BaseMemory):
                     "last_analysis": self.last_analysis.isoformat(),
                     "last_backup": self.last_backup.isoformat()
                 }, f)
+        self._unsaved_adds = 0
 
     def load(self) -> None:
         """Load memory from persistent storage."""
         if self.storage_path and self.storage_path.exists():
             with open(self.storage_path, 'r') as f:
                 data = json.load(f)
-                self.memory_matrix = np.array(data.get("memory_matrix", []))
+                # Files written before the .npz split keep everything in the JSON
+                if "arrays_file" in data:
+                    with np.load(self.storage_path.with_name(data["arrays_file"])) as arrays:
+                        data.update({key: arrays[key] for key in arrays.files})
+                self.memory_matrix = np.array(
+                    data.get("memory_matrix", []),
+                    dtype=np.float32 if self.sparse_access else float
+                )
                 self.usage_vector = np.array(data.get("usage_vector", []))
                 self.precedence_vector = np.array(data.get("precedence_vector", []))
-                self.link_matrix = np.array(data.get("link_matrix", []))
-                self.write_weighting = np.array(data.get("write_weighting", []))
-                self.read_weighting = np.array(data.get("read_weighting", []))
+                self._deserialize_links_and_weightings(data)
                 self.read_vectors = np.array(data.get("read_vectors", []))
                 self.controller_state = np.array(data.get("controller_state", []))
                 self.items = data.get("items", [])
-                self.item_embeddings = data.get("item_embeddings", [])
+                self.item_embeddings = np.asarray(data.get("item_embeddings", [])).tolist()
                 self.attention_scores = data.get("attention_scores", {})
                 self.usage_history = data.get("usage_history", {})
                 self.learning_history = data.get("learning_history", {})
@@ -456,6 +636,90 @@ class DNCMemory(BaseMemory):
                 self.last_backup = datetime.fromisoformat(
                     data.get("last_backup", datetime.now().isoformat())
                 )
+                if self.sparse_access:
+                    self._rebuild_sparse_indexes()
+
+    @staticmethod
+    def _triples(entries) -> np.ndarray:
+        return np.array(list(entries), dtype=float).reshape(-1, 3)
+
+    def _serialize_links_and_weightings(self) -> Dict[str, np.ndarray]:
+        """
+        Serialize the link matrix and weightings.
+
+        Dense mode stores the matrices as-is; sparse mode stores (row, column,
+        weight) triples, where the row of a weighting is its head index.
+        """
+        if self.sparse_access:
+            return {
+                "link_matrix": self._triples(
+                    (row, col, weight)
+                    for row, cols in self.link_matrix.items()
+                    for col, weight in cols.items()
+                ),
+                "write_weighting": self._triples(
+                    (head, location, weight)
+                    for head, w in enumerate(self.write_weighting)
+                    for location, weight in w.items()
+                ),
+                "read_weighting": self._triples(
+                    (head, location, weight)
+                    for head, w in enumerate(self.read_weighting)
+                    for location, weight in w.items()
+                )
+            }
+        return {
+            "link_matrix": self.link_matrix,
+            "write_weighting": self.write_weighting,
+            "read_weighting": self.read_weighting
+        }
+
+    @staticmethod
+    def _as_triples(stored: Any, stored_format: str) -> np.ndarray:
+        """Return stored links or weightings as (row, column, weight) triples."""
+        values = np.asarray(stored, dtype=float)
+        if stored_format == "sparse":
+            return values.reshape(-1, 3)
+        if values.ndim != 2:
+            return np.zeros((0, 3))
+        rows, cols = np.nonzero(values)
+        return np.column_stack([rows, cols, values[rows, cols]])
+
+    def _deserialize_links_and_weightings(self, data: Dict[str, Any]) -> None:
+        """
+        Restore the link matrix and weightings saved by ``_serialize_links_and_weightings``.
+
+        The stored format may differ from the current mode, so both are
+        converted through triples; files without a format predate sparse mode.
+        """
+        stored_format = data.get("link_format", "dense")
+        links, write, read = (
+            self._as_triples(data.get(key, []), stored_format)
+            for key in ("link_matrix", "write_weighting", "read_weighting")
+        )
+        if self.sparse_access:
+            self.link_matrix = {}
+            for row, col, weight in links:
+                self._set_sparse_weight(
+                    self.link_matrix.setdefault(int(row), {}), int(col), float(weight), self.sparse_top_k
+                )
+            self.write_weighting = [{} for _ in range(self.num_write_heads)]
+            self.read_weighting = [{} for _ in range(self.num_read_heads)]
+            for weightings, triples in ((self.write_weighting, write), (self.read_weighting, read)):
+                for head, location, weight in triples:
+                    if int(head) < len(weightings):
+                        self._set_sparse_weight(weightings[int(head)], int(location), float(weight), self.sparse_top_k)
+        else:
+            self.link_matrix = self._dense_from_triples(links, self.memory_size)
+            self.write_weighting = self._dense_from_triples(write, self.num_write_heads)
+            self.read_weighting = self._dense_from_triples(read, self.num_read_heads)
+
+    def _dense_from_triples(self, triples: np.ndarray, num_rows: int) -> np.ndarray:
+        matrix = np.zeros((num_rows, self.memory_size))
+        rows, cols = triples[:, 0].astype(int), triples[:, 1].astype(int)
+        keep = (rows < num_rows) & (cols < self.memory_size)
+        matrix[rows[keep], cols[keep]] = triples[keep, 2]
+        return matrix
 
     async def get_dnc_stats(self) -> Dict[str, Any]:
         """Get statistics about DNC memory."""
@@ -2,14 +2,226 @@
 Event-sourced memory implementation.
 """
 
-from typing import List, Dict, Any, Optional, Set, Tuple
+from typing import List, Dict, Any, Optional, Set, Tuple, Iterator
 from datetime import datetime, timedelta
+from bisect import bisect_right
 import json
 from pathlib import Path
 import numpy as np
 from ..models.base import BaseLLM
 from .base import BaseMemory
 
+
+class EventStore:
+    """
+    Append-only event log with per-item and per-type indexes.
+
+    Events get a monotonically increasing ``seq``. When ``path`` is set,
+    events are appended as JSON lines to segment files under that directory;
+    removals are appended as tombstone records, and ``compact`` rewrites the
+    live events into fresh segments. ``replay`` rebuilds the store from disk.
+    """
+
+    def __init__(self, path: Optional[Path] = None, segment_size: int = 10000):
+        self.path = Path(path) if path else None
+        self.segment_size = segment_size
+        self._events: Dict[int, Dict[str, Any]] = {}  # seq -> event, in seq order
+        self._seqs: List[int] = []  # sorted, may hold removed seqs until compacted
+        self._by_item: Dict[str, Dict[int, None]] = {}  # item_id -> ordered seqs
+        self._by_type: Dict[str, Dict[int, None]] = {}  # type -> ordered seqs
+        self.next_seq = 0
+        self._segment = 0
+        self._segment_records = 0
+        self._dead_records = 0
+        self._pending: List[str] = []
+        self.removed_items: Dict[str, int] = {}  # item_id -> next_seq at removal, from replay
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self._events.values())
+
+    def append(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        """Append an event, assigning its ``seq`` and ``id``."""
+        event["seq"] = self.next_seq
+        event["id"] = f"event_{self.next_seq}"
+        self._index(event)
+        self._write(event)
+        return event
+
+    def _index(self, event: Dict[str, Any]) -> None:
+        """Add an event to the in-memory log and indexes."""
+        seq = event["seq"]
+        self._events[seq] = event
+        self._seqs.append(seq)
+        self._by_item.setdefault(event["item_id"], {})[seq] = None
+        self._by_type.setdefault(event["type"], {})[seq] = None
+        self.next_seq = max(self.next_seq, seq + 1)
+
+    def _unindex(self, seq: int) -> None:
+        """Drop an event from the in-memory log and indexes."""
+        event = self._events.pop(seq, None)
+        if event is None:
+            return
+        for index, key in ((self._by_item, event["item_id"]), (self._by_type, event["type"])):
+            seqs = index[key]
+            seqs.pop(seq, None)
+            if not seqs:
+                del index[key]
+        self._dead_records += 1
+        
+        # Drop stale seqs once they dominate the ordering list
+        if len(self._seqs) > 2 * len(self._events) + 1024:
+            self._seqs = list(self._events)
+
+    def get(self, seq: int) -> Optional[Dict[str, Any]]:
+        """Get an event by sequence number."""
+        return self._events.get(seq)
+
+    def by_item(self, item_id: str) -> List[Dict[str, Any]]:
+        """Get events for an item in log order."""
+        return [self._events[seq] for seq in self._by_item.get(item_id, ())]
+
+    def by_type(self, event_type: str) -> List[Dict[str, Any]]:
+        """Get events of a type in log order."""
+        return [self._events[seq] for seq in self._by_type.get(event_type, ())]
+
+    def count_for_item(self, item_id: str) -> int:
+        """Get the number of events for an item."""
+        return len(self._by_item.get(item_id, ()))
+
+    def types(self) -> Set[str]:
+        """Get the event types present in the log."""
+        return set(self._by_type)
+
+    def since(self, checkpoint: int) -> Iterator[Dict[str, Any]]:
+        """Iterate over events with ``seq`` greater than ``checkpoint``."""
+        for seq in self._seqs[bisect_right(self._seqs, checkpoint):]:
+            event = self._events.get(seq)
+            if event is not None:
+                yield event
+
+    def remove_item(self, item_id: str) -> None:
+        """Remove all events for an item."""
+        for seq in list(self._by_item.get(item_id, ())):
+            self._unindex(seq)
+        self._write({"op": "remove_item", "item_id": item_id, "next_seq": self.next_seq})
+
+    def trim_boundary(self, max_events: int) -> Optional[int]:
+        """Get the newest seq ``trim(max_events)`` would drop, or None."""
+        excess = len(self._events) - max_events
+        if excess <= 0:
+            return None
+        return [seq for seq, _ in zip(self._events, range(excess))][-1]
+
+    def trim(self, max_events: int) -> None:
+        """Drop the oldest events so at most ``max_events`` remain."""
+        excess = len(self._events) - max_events
+        if excess <= 0:
+            return
+        oldest = [seq for seq, _ in zip(self._events, range(excess))]
+        for seq in oldest:
+            self._unindex(seq)
+        self._write({"op": "trim", "upto_seq": oldest[-1], "next_seq": self.next_seq})
+
+    def clear(self) -> None:
+        """Remove all events and segment files."""
+        self._events = {}
+        self._seqs = []
+        self._by_item = {}
+        self._by_type = {}
+        self._pending = []
+        self._dead_records = 0
+        self._segment = 0
+        self._segment_records = 0
+        if self.path and self.path.exists():
+            for segment in self.path.glob("segment_*.jsonl"):
+                segment.unlink()
+
+    def _segment_path(self, index: int) -> Path:
+        return self.path / f"segment_{index:06d}.jsonl"
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        """Buffer a record for the current segment."""
+        if self.path is None:
+            return
+        if self._segment_records >= self.segment_size:
+            self.flush()
+            self._segment += 1
+            self._segment_records = 0
+        self._pending.append(json.dumps(record))
+        self._segment_records += 1
+        if "op" in record:
+            self._dead_records += 1
+
+    def flush(self) -> None:
+        """Append buffered records to the current segment file."""
+        if self.path is None or not self._pending:
+            return
+        self.path.mkdir(parents=True, exist_ok=True)
+        with open(self._segment_path(self._segment), "a") as f:
+            f.write("\n".join(self._pending) + "\n")
+        self._pending = []
+
+    def replay(self) -> None:
+        """Rebuild the log and indexes from the segment files."""
+        self._events = {}
+        self._seqs = []
+        self._by_item = {}
+        self._by_type = {}
+        self._pending = []
+        self._dead_records = 0
+        if self.path is None or not self.path.exists():
+            return
+        segments = sorted(self.path.glob("segment_*.jsonl"))
+        for segment in segments:
+            with open(segment, "r") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    # Ops carry next_seq so removed tail events never get their seq reused
+                    self.next_seq = max(self.next_seq, record.get("next_seq", 0))
+                    if record.get("op") == "remove_item":
+                        self.removed_items[record["item_id"]] = record["next_seq"]
+                        for seq in list(self._by_item.get(record["item_id"], ())):
+                            self._unindex(seq)
+                        self._dead_records += 1
+                    elif record.get("op") == "trim":
+                        while self._events and next(iter(self._events)) <= record["upto_seq"]:
+                            self._unindex(next(iter(self._events)))
+                        self._dead_records += 1
+                    elif record["seq"] not in self._events:
+                        self._index(record)
+        self._seqs = list(self._events)
+        if segments:
+            self._segment = int(segments[-1].stem.split("_")[1])
+            with open(segments[-1], "r") as f:
+                self._segment_records = sum(1 for _ in f)
+
+    def needs_compaction(self) -> bool:
+        """Whether dead records outnumber live events."""
+        return self._dead_records > max(len(self._events), self.segment_size)
+
+    def compact(self) -> None:
+        """Rewrite live events into fresh segments and delete the old ones."""
+        self._seqs = list(self._events)
+        self._dead_records = 0
+        if self.path is None:
+            return
+        self.flush()
+        old_segments = sorted(self.path.glob("segment_*.jsonl")) if self.path.exists() else []
+        self._segment += 1
+        self._segment_records = 0
+        for event in self._events.values():
+            self._write(event)
+        self.flush()
+        self._dead_records = 0
+        for segment in old_segments:
+            segment.unlink()
+
+
 class EventSourcedMemory(BaseMemory):
     """Memory that implements event-sourced memory."""
 
@@ -28,7 +240,9 @@ class EventSourcedMemory(BaseMemory):
         enable_causality_analysis: bool = True,
         causality_threshold: float = 0.6,
         enable_optimization: bool = True,
-        optimization_interval: int = 3600  # 1 hour
+        optimization_interval: int = 3600,  # 1 hour
+        segment_size: int = 10000,
+        snapshot_interval: int = 100
     ):
         super().__init__(memory_key)
         self.llm = llm
@@ -44,20 +258,39 @@ class EventSourcedMemory(BaseMemory):
         self.causality_threshold = causality_threshold
         self.enable_optimization = enable_optimization
         self.optimization_interval = optimization_interval
+        self.snapshot_interval = snapshot_interval
         
         # Initialize storage
         self.items: List[Dict[str, Any]] = []
-        self.events: List[Dict[str, Any]] = []  # Event log
+        self.event_store = EventStore(
+            self.storage_path.with_suffix(".events") if self.storage_path else None,
+            segment_size=segment_size
+        )
+        self.snapshot_seq = -1  # last event seq reflected in the snapshot
+        self.projection_checkpoints: Dict[str, int] = {"patterns": -1, "causality": -1}
         self.patterns: Dict[str, List[Dict[str, Any]]] = {}  # pattern_id -> pattern data
         self.causal_chains: Dict[str, List[Dict[str, Any]]] = {}  # chain_id -> causal chain
         self.last_analysis = datetime.now()
         self.last_optimization = datetime.now()
         self.load()
 
+    @property
+    def events(self) -> List[Dict[str, Any]]:
+        """Live events in log order."""
+        return list(self.event_store)
+
+    def get_item_events(self, item_id: str) -> List[Dict[str, Any]]:
+        """Get the events recorded for an item."""
+        return self.event_store.by_item(item_id)
+
+    def get_events_by_type(self, event_type: str) -> List[Dict[str, Any]]:
+        """Get the events of a given type."""
+        return self.event_store.by_type(event_type)
+
     async def add_message(self, message: Dict[str, str]) -> None:
         """Add message and create events."""
-        # Create new item
-        item_id = f"item_{len(self.items)}"
+        # Create new item (ids come from the log sequence so they are never reused)
+        item_id = f"item_{self.event_store.next_seq}"
         new_item = {
             "id": item_id,
             "content": message["content"],
@@ -87,13 +320,18 @@ class EventSourcedMemory(BaseMemory):
         # Maintain item limit
         await self._maintain_item_limit()
         
-        await self.save()
+        await self._checkpoint()
+
+    async def _checkpoint(self) -> None:
+        """Flush the event log and snapshot state every ``snapshot_interval`` events."""
+        self.event_store.flush()
+        if self.event_store.next_seq - 1 - self.snapshot_seq >= self.snapshot_interval:
+            await self.save()
 
     async def _create_events(self, item_id: str, item: Dict[str, Any]) -> None:
         """Create events for a new item."""
         # Create creation event
         creation_event = {
-            "id": f"event_{len(self.events)}",
             "type": "item_created",
             "timestamp": datetime.now().isoformat(),
             "item_id": item_id,
@@ -102,7 +340,7 @@ class EventSourcedMemory(BaseMemory):
                 "metadata": item["metadata"]
             }
         }
-        self.events.append(creation_event)
+        self.event_store.append(creation_event)
         
         # Create analysis events
         if self.enable_pattern_detection:
@@ -112,9 +350,7 @@ class EventSourcedMemory(BaseMemory):
             await self._create_causality_events(item_id, item)
         
         # Update item metadata
-        item["metadata"]["event_count"] = len([
-            e for e in self.events if e["item_id"] == item_id
-        ])
+        item["metadata"]["event_count"] = self.event_store.count_for_item(item_id)
 
     async def _create_pattern_events(self, item_id: str, item: Dict[str, Any]) -> None:
         """Create pattern detection events."""
@@ -136,7 +372,6 @@ class EventSourcedMemory(BaseMemory):
             # Create pattern events
             for i, pattern in enumerate(patterns["patterns"]):
                 pattern_event = {
-                    "id": f"event_{len(self.events)}",
                     "type": "pattern_detected",
                     "timestamp": datetime.now().isoformat(),
                     "item_id": item_id,
@@ -146,7 +381,7 @@ class EventSourcedMemory(BaseMemory):
                         "confidence": patterns["pattern_confidence"][i]
                     }
                 }
-                self.events.append(pattern_event)
+                self.event_store.append(pattern_event)
                 
                 # Update patterns
                 pattern_id = f"pattern_{len(self.patterns)}"
@@ -184,7 +419,6 @@ class EventSourcedMemory(BaseMemory):
             # Create causality events
             for i, cause in enumerate(causality["causes"]):
                 causality_event = {
-                    "id": f"event_{len(self.events)}",
                     "type": "causality_detected",
                     "timestamp": datetime.now().isoformat(),
                     "item_id": item_id,
@@ -194,7 +428,7 @@ class EventSourcedMemory(BaseMemory):
                         "confidence": causality["confidence"][i]
                     }
                 }
-                self.events.append(causality_event)
+                self.event_store.append(causality_event)
                 
                 # Update causal chains
                 chain_id = f"chain_{len(self.causal_chains)}"
@@ -226,10 +460,12 @@ class EventSourcedMemory(BaseMemory):
         self.last_analysis = datetime.now()
 
     async def _analyze_patterns(self) -> None:
-        """Analyze event patterns."""
-        # Group events by type
+        """Analyze event patterns in events recorded since the last checkpoint."""
+        checkpoint = self.projection_checkpoints["patterns"]
+        
+        # Group new events by type
         event_groups = {}
-        for event in self.events:
+        for event in self.event_store.since(checkpoint):
             if event["type"] not in event_groups:
                 event_groups[event["type"]] = []
             event_groups[event["type"]].append(event)
@@ -256,6 +492,7 @@ class EventSourcedMemory(BaseMemory):
                     pattern_id = f"pattern_{len(self.patterns)}"
                     self.patterns[pattern_id] = [
                         {
+                            "item_id": event["item_id"],
                             "event_id": event["id"],
                             "timestamp": event["timestamp"]
                         }
@@ -264,18 +501,22 @@ class EventSourcedMemory(BaseMemory):
                 
             except Exception as e:
                 print(f"Error analyzing patterns: {e}")
+        
+        self.projection_checkpoints["patterns"] = self.event_store.next_seq - 1
 
     async def _analyze_causality(self) -> None:
-        """Analyze event causality."""
-        # Group events by item
+        """Analyze causality for items with events recorded since the last checkpoint."""
+        checkpoint = self.projection_checkpoints["causality"]
+        
+        # Collect items touched since the checkpoint, with their full event history
         item_events = {}
-        for event in self.events:
+        for event in self.event_store.since(checkpoint):
             if event["item_id"] not in item_events:
-                item_events[event["item_id"]] = []
-            item_events[event["item_id"]].append(event)
+                item_events[event["item_id"]] = self.event_store.by_item(event["item_id"])
         
         # Analyze each item's events
         for item_id, events in item_events.items():
+
             try:
                 # Generate causality analysis prompt
                 prompt = f"""
@@ -296,6 +537,7 @@ class EventSourcedMemory(BaseMemory):
                     chain_id = f"chain_{len(self.causal_chains)}"
                     self.causal_chains[chain_id] = [
                         {
+                            "item_id": event["item_id"],
                             "event_id": event["id"],
                             "timestamp": event["timestamp"]
                         }
@@ -304,6 +546,8 @@ class EventSourcedMemory(BaseMemory):
                 
             except Exception as e:
                 print(f"Error analyzing causality: {e}")
+        
+        self.projection_checkpoints["causality"] = self.event_store.next_seq - 1
 
     async def _maintain_item_limit(self) -> None:
         """Maintain item and event limits."""
@@ -320,16 +564,13 @@ class EventSourcedMemory(BaseMemory):
             for item in items_to_remove:
                 await self._remove_item(item["id"])
         
-        # Check event limit
-        if len(self.events) > self.max_events:
-            # Sort events by timestamp
-            sorted_events = sorted(
-                self.events,
-                key=lambda x: datetime.fromisoformat(x["timestamp"])
-            )
-            
-            # Remove oldest events
-            self.events = sorted_events[len(self.events) - self.max_events:]
+        # Check event limit (the log is append-only, so seq order is time order)
+        boundary = self.event_store.trim_boundary(self.max_events)
+        if boundary is not None:
+            # Snapshot first so items created by the dropped events survive a reload
+            if boundary > self.snapshot_seq:
+                await self.save()
+            self.event_store.trim(self.max_events)
 
     async def _remove_item(self, item_id: str) -> None:
         """Remove an item and its associated events."""
@@ -337,18 +578,18 @@ class EventSourcedMemory(BaseMemory):
         self.items = [i for i in self.items if i["id"] != item_id]
         
         # Remove associated events
-        self.events = [e for e in self.events if e["item_id"] != item_id]
+        self.event_store.remove_item(item_id)
         
         # Remove from patterns
         for pattern_id, pattern_data in self.patterns.items():
             self.patterns[pattern_id] = [
-                p for p in pattern_data if p["item_id"] != item_id
+                p for p in pattern_data if p.get("item_id") != item_id
             ]
         
         # Remove from causal chains
         for chain_id, chain_data in self.causal_chains.items():
             self.causal_chains[chain_id] = [
-                c for c in chain_data if c["item_id"] != item_id
+                c for c in chain_data if c.get("item_id") != item_id
             ]
 
     def get_messages(self) -> List[Dict[str, str]]:
@@ -365,19 +606,30 @@ class EventSourcedMemory(BaseMemory):
     async def clear(self) -> None:
         """Clear all items and events."""
         self.items = []
-        self.events = []
+        self.event_store.clear()
+        self.snapshot_seq = -1
+        self.projection_checkpoints = {"patterns": -1, "causality": -1}
         self.patterns = {}
         self.causal_chains = {}
         await self.save()
 
     async def save(self) -> None:
-        """Save items and events to persistent storage."""
+        """Flush the event log and snapshot items and projections to persistent storage."""
+        self._write_snapshot()
+
+    def _write_snapshot(self) -> None:
+        """Flush the event log and write the snapshot file."""
         if self.storage_path:
+            if self.event_store.needs_compaction():
+                self.event_store.compact()
+            self.event_store.flush()
+            self.snapshot_seq = self.event_store.next_seq - 1
             self.storage_path.parent.mkdir(parents=True, exist_ok=True)
             with open(self.storage_path, 'w') as f:
                 json.dump({
                     "items": self.items,
-                    "events": self.events,
+                    "snapshot_seq": self.snapshot_seq,
+                    "projection_checkpoints": self.projection_checkpoints,
                     "patterns": self.patterns,
                     "causal_chains": self.causal_chains,
                     "last_analysis": self.last_analysis.isoformat(),
@@ -385,12 +637,25 @@ class EventSourcedMemory(BaseMemory):
                 }, f)
 
     def load(self) -> None:
-        """Load items and events from persistent storage."""
-        if self.storage_path and self.storage_path.exists():
+        """Load the latest snapshot and replay events recorded after it."""
+        if not self.storage_path:
+            return
+        self.event_store.replay()
+        migrated = False
+        if self.storage_path.exists():
             with open(self.storage_path, 'r') as f:
                 data = json.load(f)
                 self.items = data.get("items", [])
-                self.events = data.get("events", [])
+                self.snapshot_seq = data.get("snapshot_seq", -1)
+                self.projection_checkpoints.update(data.get("projection_checkpoints", {}))
+                
+                # Migrate snapshots that embedded the event log, unless a
+                # previous load already moved them into segments
+                if "snapshot_seq" not in data and self.event_store.next_seq == 0:
+                    for event in data.get("events", []):
+                        event.pop("id", None)
+                        self.event_store.append(event)
+                        migrated = True
                 self.patterns = data.get("patterns", {})
                 self.causal_chains = data.get("causal_chains", {})
                 self.last_analysis = datetime.fromisoformat(
@@ -399,15 +664,40 @@ class EventSourcedMemory(BaseMemory):
                 self.last_optimization = datetime.fromisoformat(
                     data.get("last_optimization", datetime.now().isoformat())
                 )
+        # Segments deleted by clear() take their seqs with them; never reissue
+        # seqs the snapshot already covers, or since() would skip new events
+        self.event_store.next_seq = max(self.event_store.next_seq, self.snapshot_seq + 1)
+        
+        # Replay item removals and creations that happened after the snapshot
+        self.items = [
+            item for item in self.items
+            if self.event_store.removed_items.get(item["id"], -1) <= self.snapshot_seq
+        ]
+        known_items = {item["id"] for item in self.items}
+        for event in self.event_store.since(self.snapshot_seq):
+            if event["type"] == "item_created" and event["item_id"] not in known_items:
+                self.items.append({
+                    "id": event["item_id"],
+                    "content": event["data"]["content"],
+                    "timestamp": event["timestamp"],
+                    "metadata": event["data"]["metadata"]
+                })
+                known_items.add(event["item_id"])
+        for item in self.items:
+            item["metadata"]["event_count"] = self.event_store.count_for_item(item["id"])
+        
+        if migrated:
+            # Rewrite the snapshot without the embedded log so it isn't imported again
+            self._write_snapshot()
 
     async def get_event_sourced_stats(self) -> Dict[str, Any]:
         """Get statistics about event-sourced memory."""
         stats = {
             "total_items": len(self.items),
             "event_stats": {
-                "total_events": len(self.events),
-                "event_types": len(set(e["type"] for e in self.events)),
-                "average_events_per_item": len(self.events) / len(self.items) if self.items else 0
+                "total_events": len(self.event_store),
+                "event_types": len(self.event_store.types()),
+                "average_events_per_item": len(self.event_store) / len(self.items) if self.items else 0
             },
             "pattern_stats": {
                 "total_patterns": len(self.patterns),
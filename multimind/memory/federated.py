@@ -2,8 +2,11 @@
 Differentially-Private Federated Memory implementation.
 """
 
-from typing import Dict, Any, Optional, List, Set, Tuple
+from typing import Dict, Any, Optional, List, Sequence, Set, Tuple
 from datetime import datetime, timedelta
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+import asyncio
 import numpy as np
 from collections import defaultdict
 import torch
@@ -11,6 +14,105 @@ from torch import nn
 from .base import BaseMemory
 from .vector_store import VectorStoreMemory
 
+def build_model() -> nn.Module:
+    """Build the autoencoder used for global and local models."""
+    return nn.Sequential(
+        nn.Linear(128, 256),
+        nn.ReLU(),
+        nn.Linear(256, 128)
+    )
+
+def _init_training_worker() -> None:
+    """Keep each worker process to one intra-op thread so clients don't oversubscribe cores."""
+    torch.set_num_threads(1)
+
+def train_local_state(
+    global_state: Dict[str, torch.Tensor],
+    data: np.ndarray,
+    epochs: int,
+    batch_size: int
+) -> Dict[str, torch.Tensor]:
+    """
+    Train a local model from the global state on one client's embeddings.
+
+    Module-level so it can run in thread or process pool workers.
+    """
+    local_model = build_model()
+    local_model.load_state_dict(global_state)
+    if len(data) == 0:
+        return local_model.state_dict()
+    
+    # Convert to tensors
+    data = torch.from_numpy(np.ascontiguousarray(data, dtype=np.float32))
+    
+    # Train
+    optimizer = torch.optim.Adam(local_model.parameters())
+    criterion = nn.MSELoss()
+    
+    for _ in range(epochs):
+        for i in range(0, len(data), batch_size):
+            batch = data[i:i + batch_size]
+            output = local_model(batch)
+            loss = criterion(output, batch)
+            
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+    
+    return local_model.state_dict()
+
+class EmbeddingMatrix:
+    """Growable per-client embedding matrix with cached row norms."""
+
+    def __init__(self, capacity: int = 64):
+        self.capacity = capacity
+        self.matrix: Optional[np.ndarray] = None
+        self.norms: Optional[np.ndarray] = None
+        self.ids: List[str] = []
+        self.rows: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, memory_id: str) -> bool:
+        return memory_id in self.rows
+
+    def __getitem__(self, memory_id: str) -> np.ndarray:
+        return self.matrix[self.rows[memory_id]]
+
+    def set(self, memory_id: str, embedding: np.ndarray) -> None:
+        """Insert or overwrite an embedding."""
+        embedding = np.asarray(embedding, dtype=np.float32)
+        if self.matrix is None:
+            self.matrix = np.empty((self.capacity, len(embedding)), dtype=np.float32)
+            self.norms = np.empty(self.capacity, dtype=np.float32)
+        row = self.rows.get(memory_id)
+        if row is None:
+            row = len(self.ids)
+            if row == len(self.matrix):
+                self.matrix = np.concatenate([self.matrix, np.empty_like(self.matrix)])
+                self.norms = np.concatenate([self.norms, np.empty_like(self.norms)])
+            self.ids.append(memory_id)
+            self.rows[memory_id] = row
+        self.matrix[row] = embedding
+        self.norms[row] = np.linalg.norm(embedding)
+
+    def data(self) -> np.ndarray:
+        """Get the filled rows."""
+        if self.matrix is None:
+            return np.empty((0, 0), dtype=np.float32)
+        return self.matrix[:len(self.ids)]
+
+    def top_k(self, query: np.ndarray, k: int) -> List[Tuple[str, float]]:
+        """Get the ``k`` most cosine-similar (memory_id, similarity) pairs."""
+        size = len(self.ids)
+        if size == 0 or k <= 0:
+            return []
+        similarities = (self.matrix[:size] @ query) / (self.norms[:size] * np.linalg.norm(query))
+        k = min(k, size)
+        top = np.argpartition(-similarities, k - 1)[:k]
+        return [(self.ids[i], float(similarities[i])) for i in top]
+
 class DPNoiseGenerator:
     """Differential Privacy noise generator."""
     def __init__(
@@ -40,6 +142,8 @@ class FederatedMemory(BaseMemory):
         aggregation_rounds: int = 10,
         local_epochs: int = 3,
         batch_size: int = 32,
+        executor_type: str = "thread",
+        max_workers: Optional[int] = None,
         **kwargs
     ):
         """Initialize federated memory."""
@@ -54,20 +158,19 @@ class FederatedMemory(BaseMemory):
         self.aggregation_rounds = aggregation_rounds
         self.local_epochs = local_epochs
         self.batch_size = batch_size
+        self.executor_type = executor_type
+        self.max_workers = max_workers
+        self._executor: Optional[Executor] = None
         
         # Component memories
         self.vector_memory = VectorStoreMemory()
         
         # Client memories
         self.client_memories: Dict[int, Dict[str, Dict[str, Any]]] = defaultdict(dict)
-        self.client_embeddings: Dict[int, Dict[str, np.ndarray]] = defaultdict(dict)
+        self.client_embeddings: Dict[int, EmbeddingMatrix] = defaultdict(EmbeddingMatrix)
         
         # Global model
-        self.global_model = nn.Sequential(
-            nn.Linear(128, 256),
-            nn.ReLU(),
-            nn.Linear(256, 128)
-        )
+        self.global_model = build_model()
         
         # Privacy components
         self.noise_generator = DPNoiseGenerator(
@@ -110,7 +213,7 @@ class FederatedMemory(BaseMemory):
         
         # Store in client memory
         self.client_memories[client_id][memory_id] = memory
-        self.client_embeddings[client_id][memory_id] = noisy_embedding
+        self.client_embeddings[client_id].set(memory_id, noisy_embedding)
         
         # Add to vector memory
         await self.vector_memory.add(memory_id, content, metadata)
@@ -149,23 +252,52 @@ class FederatedMemory(BaseMemory):
             return list(self.client_memories[client_id].values())
         return []
 
+    def _get_executor(self) -> Executor:
+        """Create the client training pool on first use."""
+        if self._executor is None:
+            if self.executor_type == "process":
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    initializer=_init_training_worker
+                )
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
     async def train_federated_model(self) -> None:
-        """Train the global model using federated learning."""
+        """Train the global model using federated learning, clients in parallel."""
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
         for round in range(self.aggregation_rounds):
-            # Train local models
-            local_updates = []
-            for client_id in range(self.num_clients):
-                if client_id in self.client_embeddings:
-                    # Train local model
-                    local_model = self._train_local_model(
-                        client_id,
-                        self.local_epochs
+            # Train local models concurrently from the same global state
+            global_state = {
+                key: value.detach().clone()
+                for key, value in self.global_model.state_dict().items()
+            }
+            client_ids = [
+                client_id for client_id in range(self.num_clients)
+                if client_id in self.client_embeddings
+            ]
+            local_updates = await asyncio.gather(*(
+                loop.run_in_executor(
+                    executor,
+                    partial(
+                        train_local_state,
+                        global_state,
+                        self.client_embeddings[client_id].data(),
+                        self.local_epochs,
+                        self.batch_size
                     )
-                    local_updates.append(local_model)
+                )
+                for client_id in client_ids
+            ))
             
-            # Aggregate updates with privacy
+            # Aggregate updates with privacy, weighting clients by their data size
             if local_updates:
-                self._aggregate_updates(local_updates)
+                self._aggregate_updates(
+                    local_updates,
+                    weights=[len(self.client_embeddings[client_id]) for client_id in client_ids]
+                )
                 
                 # Record aggregation
                 self.aggregation_history.append({
@@ -181,24 +313,18 @@ class FederatedMemory(BaseMemory):
         top_k: int = 5
     ) -> List[Dict[str, Any]]:
         """Find memories similar to the given embedding."""
-        similarities = []
-        
+        query = np.asarray(embedding, dtype=np.float32)
         if client_id is not None:
-            # Search in specific client
-            if client_id in self.client_embeddings:
-                for memory_id, client_embedding in self.client_embeddings[client_id].items():
-                    similarity = np.dot(embedding, client_embedding) / (
-                        np.linalg.norm(embedding) * np.linalg.norm(client_embedding)
-                    )
-                    similarities.append((client_id, memory_id, similarity))
+            client_ids = [client_id] if client_id in self.client_embeddings else []
         else:
-            # Search across all clients
-            for cid, client_embeddings in self.client_embeddings.items():
-                for memory_id, client_embedding in client_embeddings.items():
-                    similarity = np.dot(embedding, client_embedding) / (
-                        np.linalg.norm(embedding) * np.linalg.norm(client_embedding)
-                    )
-                    similarities.append((cid, memory_id, similarity))
+            client_ids = list(self.client_embeddings)
+        
+        # Batched top-k per client matrix, then merge
+        similarities = [
+            (cid, memory_id, similarity)
+            for cid in client_ids
+            for memory_id, similarity in self.client_embeddings[cid].top_k(query, top_k)
+        ]
         
         # Sort by similarity
         similarities.sort(key=lambda x: x[2], reverse=True)
@@ -229,55 +355,57 @@ class FederatedMemory(BaseMemory):
         self,
         client_id: int,
         epochs: int
-    ) -> nn.Module:
-        """Train a local model for a client."""
-        local_model = nn.Sequential(
-            nn.Linear(128, 256),
-            nn.ReLU(),
-            nn.Linear(256, 128)
+    ) -> Dict[str, torch.Tensor]:
+        """Train a local model for a client in the calling thread."""
+        return train_local_state(
+            self.global_model.state_dict(),
+            self.client_embeddings[client_id].data(),
+            epochs,
+            self.batch_size
         )
-        local_model.load_state_dict(self.global_model.state_dict())
-        
-        # Get client data
-        embeddings = list(self.client_embeddings[client_id].values())
-        if not embeddings:
-            return local_model
-            
-        # Convert to tensors
-        data = torch.FloatTensor(embeddings)
-        
-        # Train
-        optimizer = torch.optim.Adam(local_model.parameters())
-        criterion = nn.MSELoss()
-        
-        for _ in range(epochs):
-            for i in range(0, len(data), self.batch_size):
-                batch = data[i:i + self.batch_size]
-                output = local_model(batch)
-                loss = criterion(output, batch)
-                
-                optimizer.zero_grad()
-                loss.backward()
-                optimizer.step()
-        
-        return local_model
 
-    def _aggregate_updates(self, local_updates: List[nn.Module]) -> None:
-        """Aggregate local model updates with privacy."""
-        # Get model parameters
+    def _aggregate_updates(
+        self,
+        local_updates: List[Dict[str, torch.Tensor]],
+        weights: Optional[Sequence[float]] = None
+    ) -> None:
+        """
+        Aggregate local model state dicts with privacy (FedAvg over stacked parameters).
+
+        Each update is weighted by ``weights`` (e.g. client sample counts);
+        without weights, or if they sum to zero, updates count equally.
+        """
         global_params = self.global_model.state_dict()
+        keys = list(global_params)
         
-        # Average parameters with noise
-        for key in global_params:
-            param_sum = torch.zeros_like(global_params[key])
-            for local_model in local_updates:
-                param_sum += local_model.state_dict()[key]
-            
-            # Add noise to average
-            avg_param = param_sum / len(local_updates)
-            noisy_param = self.noise_generator.add_noise(avg_param.numpy())
-            
-            global_params[key] = torch.FloatTensor(noisy_param)
+        # Flatten each client's parameters into one row and average the stack
+        stacked = torch.stack([
+            torch.cat([update[key].reshape(-1) for key in keys])
+            for update in local_updates
+        ])
+        if weights is None or sum(weights) <= 0:
+            avg_params = stacked.mean(dim=0)
+        else:
+            weights = torch.tensor(weights, dtype=stacked.dtype)
+            avg_params = (weights / weights.sum()) @ stacked
+        
+        # Add noise to average
+        noisy_params = torch.from_numpy(
+            self.noise_generator.add_noise(avg_params.numpy()).astype(np.float32)
+        )
+        
+        # Split back into the state dict
+        offset = 0
+        for key in keys:
+            numel = global_params[key].numel()
+            global_params[key] = noisy_params[offset:offset + numel].reshape(global_params[key].shape)
+            offset += numel
         
         # Update global model
-        self.global_model.load_state_dict(global_params) 
\ No newline at end of file
+        self.global_model.load_state_dict(global_params)
+
+    async def close(self) -> None:
+        """Shut down the client training pool."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None 
\ No newline at end of file
@@ -4,6 +4,7 @@ Hierarchical Temporal Memory (HTM) implementation.
 
 from typing import Dict, Any, Optional, List, Tuple
 import numpy as np
+import scipy.sparse as sp
 import torch
 from torch import nn
 from .base import BaseMemory
@@ -66,11 +67,12 @@ class HTMMemory(BaseMemory):
         self.learning_rate = learning_rate
         
         # Initialize HTM components
-        self.columns = [HTMColumn(cells_per_column) for _ in range(num_columns)]
+        self._reset_state()
         self.input_sdr = SparseDistributedRepresentation(input_size, sparsity)
         self.memory_sdr = SparseDistributedRepresentation(num_columns, sparsity)
         
         # Memory tracking
+        self.messages: List[Dict[str, Any]] = []
         self.sequence_memories: List[List[int]] = []
         self.anomaly_scores: List[float] = []
         
@@ -79,6 +81,38 @@ class HTMMemory(BaseMemory):
         self.total_predictions = 0
         self.avg_anomaly_score = 0.0
 
+    def _reset_state(self) -> None:
+        """Reset column and synapse state."""
+        self.columns = [HTMColumn(self.cells_per_column) for _ in range(self.num_columns)]
+
+    async def add_message(self, message: Dict[str, str]) -> None:
+        """Add a message and learn its sequence."""
+        message_id = f"message_{len(self.messages)}"
+        self.messages.append(message)
+        await self.add_memory(message_id, message["content"], message)
+
+    def get_messages(self) -> List[Dict[str, str]]:
+        """Get all messages added to memory."""
+        return list(self.messages)
+
+    async def clear(self) -> None:
+        """Clear messages, stored sequences and learned state."""
+        self._reset_state()
+        self.messages = []
+        self.sequence_memories = []
+        self.anomaly_scores = []
+        self.total_sequences = 0
+        self.total_predictions = 0
+        self.avg_anomaly_score = 0.0
+
+    async def save(self) -> None:
+        """HTM state is held in memory only."""
+        pass
+
+    def load(self) -> None:
+        """HTM state is held in memory only."""
+        pass
+
     async def add_memory(
         self,
         memory_id: str,
@@ -99,7 +133,7 @@ class HTMMemory(BaseMemory):
         self.memory_sdr.encode(active_columns)
         
         # Store sequence
-        self.sequence_memories.append(active_columns)
+        self._store_sequence(active_columns)
         self.total_sequences += 1
         
         # Calculate anomaly score
@@ -156,7 +190,7 @@ class HTMMemory(BaseMemory):
             
             # Update sequence
             if self.sequence_memories:
-                self.sequence_memories[-1] = active_columns
+                self._replace_last_sequence(active_columns)
 
     async def get_stats(self) -> Dict[str, Any]:
         """Get memory statistics."""
@@ -168,6 +202,14 @@ class HTMMemory(BaseMemory):
             'predictive_columns': len([c for c in self.columns if any(c.predictive_cells)])
         }
 
+    def _store_sequence(self, active_columns: List[int]) -> None:
+        """Append a sequence of active columns."""
+        self.sequence_memories.append(active_columns)
+
+    def _replace_last_sequence(self, active_columns: List[int]) -> None:
+        """Replace the most recent sequence of active columns."""
+        self.sequence_memories[-1] = active_columns
+
     def _update_columns(self) -> List[int]:
         """Update HTM columns based on input."""
         active_columns = []
@@ -236,7 +278,7 @@ class HTMMemory(BaseMemory):
             for seq in self.sequence_memories
         ]
         
-        return 1.0 - np.mean(overlaps)
+        return float(1.0 - np.mean(overlaps))
 
     def _calculate_confidence(self, predicted_columns: List[int]) -> float:
         """Calculate prediction confidence."""
@@ -252,4 +294,208 @@ class HTMMemory(BaseMemory):
         """Convert sequence back to text."""
         # This would typically use a decoder model
         # For now, we'll return a placeholder
-        return f"Memory sequence with {len(sequence)} active columns" 
\ No newline at end of file
+        return f"Memory sequence with {len(sequence)} active columns" 
+
+
+_POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _popcount_rows(bits: np.ndarray) -> np.ndarray:
+    """Count set bits per row of a bit-packed uint8 matrix."""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(bits).sum(axis=1, dtype=np.int64)
+    return _POPCOUNT_TABLE[bits].sum(axis=1, dtype=np.int64)
+
+
+class ArrayHTMMemory(HTMMemory):
+    """
+    Array-backed Hierarchical Temporal Memory.
+
+    Cell states are boolean ``(num_columns, cells_per_column)`` matrices,
+    synapse permanences live in a sparse CSR matrix over a random potential
+    pool, and stored sequences are bit-packed SDRs deduplicated through a hash
+    index so overlaps are computed with a vectorized popcount.
+    """
+
+    def __init__(
+        self,
+        input_size: int = 1024,
+        num_columns: int = 2048,
+        cells_per_column: int = 4,
+        sparsity: float = 0.02,
+        learning_rate: float = 0.1,
+        potential_pct: float = 0.02,
+        connected_threshold: float = 0.5,
+        activation_threshold: int = 4,
+        permanence_decrement: float = 0.01,
+        seed: Optional[int] = None,
+        **kwargs
+    ):
+        """Initialize array-backed HTM memory."""
+        # Skip the per-column objects built by HTMMemory
+        BaseMemory.__init__(self, **kwargs)
+        
+        # HTM parameters
+        self.input_size = input_size
+        self.num_columns = num_columns
+        self.cells_per_column = cells_per_column
+        self.sparsity = sparsity
+        self.learning_rate = learning_rate
+        self.potential_pct = potential_pct
+        self.connected_threshold = connected_threshold
+        self.activation_threshold = activation_threshold
+        self.permanence_decrement = permanence_decrement
+        self.seed = seed
+        
+        self._reset_state()
+        self.input_sdr = SparseDistributedRepresentation(input_size, sparsity)
+        self.memory_sdr = SparseDistributedRepresentation(num_columns, sparsity)
+        
+        # Memory tracking
+        self.messages: List[Dict[str, Any]] = []
+        self.sequence_memories: List[List[int]] = []
+        self.anomaly_scores: List[float] = []
+        
+        # Statistics
+        self.total_sequences = 0
+        self.total_predictions = 0
+        self.avg_anomaly_score = 0.0
+
+    def _reset_state(self) -> None:
+        """Reset cell state, synapse permanences and the packed sequence store."""
+        num_columns = self.num_columns
+        
+        # Cell state matrices
+        self.active_cells = np.zeros((num_columns, self.cells_per_column), dtype=bool)
+        self.predictive_cells = np.zeros((num_columns, self.cells_per_column), dtype=bool)
+        self.previous_active = np.zeros(num_columns, dtype=bool)
+        
+        # Sparse synapse permanences: row = postsynaptic column, col = presynaptic column
+        self.permanences = sp.random(
+            num_columns, num_columns,
+            density=self.potential_pct,
+            format="csr",
+            dtype=np.float32,
+            random_state=self.seed
+        )
+        self._synapse_rows = np.repeat(
+            np.arange(num_columns), np.diff(self.permanences.indptr)
+        )
+        
+        # Bit-packed unique sequence SDRs, hash index and reference counts
+        self._packed_width = (num_columns + 7) // 8
+        self._sequence_bits = np.zeros((16, self._packed_width), dtype=np.uint8)
+        self._sequence_refs = np.zeros(16, dtype=np.int64)
+        self._num_unique = 0
+        self._sequence_index: Dict[bytes, int] = {}
+        # Per-column count of stored sequences containing that column
+        self._column_counts = np.zeros(num_columns, dtype=np.int64)
+
+    def _to_mask(self, columns: List[int]) -> np.ndarray:
+        mask = np.zeros(self.num_columns, dtype=bool)
+        mask[np.asarray(columns, dtype=np.int64)] = True
+        return mask
+
+    def _index_sequence(self, active_columns: List[int], delta: int) -> None:
+        """Add (delta=1) or release (delta=-1) a sequence in the packed store."""
+        mask = self._to_mask(active_columns)
+        packed = np.packbits(mask)
+        key = packed.tobytes()
+        row = self._sequence_index.get(key)
+        if row is None:
+            if delta < 0:
+                return
+            if self._num_unique == len(self._sequence_bits):
+                self._sequence_bits = np.vstack([self._sequence_bits, np.zeros_like(self._sequence_bits)])
+                self._sequence_refs = np.concatenate([self._sequence_refs, np.zeros_like(self._sequence_refs)])
+            row = self._num_unique
+            self._sequence_bits[row] = packed
+            self._sequence_index[key] = row
+            self._num_unique += 1
+        self._sequence_refs[row] += delta
+        self._column_counts[mask] += delta
+
+    def _store_sequence(self, active_columns: List[int]) -> None:
+        """Append a sequence and index its SDR."""
+        super()._store_sequence(active_columns)
+        self._index_sequence(active_columns, 1)
+
+    def _replace_last_sequence(self, active_columns: List[int]) -> None:
+        """Replace the most recent sequence and re-index its SDR."""
+        self._index_sequence(self.sequence_memories[-1], -1)
+        super()._replace_last_sequence(active_columns)
+        self._index_sequence(active_columns, 1)
+
+    def _update_columns(self) -> List[int]:
+        """Update all columns at once based on input."""
+        active = np.random.random(self.num_columns) < 0.1
+        
+        # Active columns fire all cells; the rest keep only their predictive cells
+        self.active_cells[active] = True
+        self.active_cells[~active] = self.predictive_cells[~active]
+        
+        self._learn_synapses(active)
+        self._update_predictive_cells(active)
+        self.previous_active = active
+        
+        return np.flatnonzero(active).tolist()
+
+    def _learn_synapses(self, active: np.ndarray) -> None:
+        """Hebbian update of synapses onto active columns from previously active ones."""
+        if not self.previous_active.any():
+            return
+        postsynaptic_active = active[self._synapse_rows]
+        presynaptic_active = self.previous_active[self.permanences.indices]
+        data = self.permanences.data
+        data[postsynaptic_active & presynaptic_active] += self.learning_rate
+        data[postsynaptic_active & ~presynaptic_active] -= self.permanence_decrement
+        np.clip(data, 0.0, 1.0, out=data)
+
+    def _update_predictive_cells(self, active: np.ndarray) -> None:
+        """Mark columns with enough connected synapses from active columns as predictive."""
+        contributing = (self.permanences.data >= self.connected_threshold) & active[self.permanences.indices]
+        overlap = np.bincount(self._synapse_rows[contributing], minlength=self.num_columns)
+        self.predictive_cells[:] = False
+        self.predictive_cells[overlap >= self.activation_threshold] = True
+
+    def _get_predictions(self) -> List[int]:
+        """Get predicted columns."""
+        return np.flatnonzero(self.predictive_cells.any(axis=1)).tolist()
+
+    def _find_best_sequence(self, predicted_columns: List[int]) -> Optional[List[int]]:
+        """Find the best matching stored sequence by packed-SDR overlap."""
+        if not self.sequence_memories or not predicted_columns:
+            return None
+        
+        query = np.packbits(self._to_mask(predicted_columns))
+        bits = self._sequence_bits[:self._num_unique]
+        overlaps = _popcount_rows(bits & query) / len(predicted_columns)
+        overlaps[self._sequence_refs[:self._num_unique] <= 0] = 0.0
+        
+        best_row = int(np.argmax(overlaps))
+        if overlaps[best_row] <= 0.5:
+            return None
+        return np.flatnonzero(np.unpackbits(bits[best_row], count=self.num_columns)).tolist()
+
+    def _calculate_anomaly_score(self, active_columns: List[int]) -> float:
+        """Calculate anomaly score as one minus the mean overlap with stored sequences."""
+        num_sequences = len(self.sequence_memories)
+        if not num_sequences:
+            return 1.0
+        if not active_columns:
+            return 1.0
+        
+        # Sum of overlaps over all sequences equals the summed column counts
+        total_overlap = self._column_counts[np.asarray(active_columns, dtype=np.int64)].sum()
+        return float(1.0 - total_overlap / (len(active_columns) * num_sequences))
+
+    async def get_stats(self) -> Dict[str, Any]:
+        """Get memory statistics."""
+        return {
+            'total_sequences': self.total_sequences,
+            'total_predictions': self.total_predictions,
+            'avg_anomaly_score': self.avg_anomaly_score,
+            'active_columns': int(self.active_cells.any(axis=1).sum()),
+            'predictive_columns': int(self.predictive_cells.any(axis=1).sum()),
+            'unique_sequences': int((self._sequence_refs[:self._num_unique] > 0).sum())
+        }
@@ -3,9 +3,16 @@ Advanced memory system with episodic and semantic memory support.
 """
 
 from typing import List, Dict, Any, Optional, Union, Tuple, Protocol, runtime_checkable
+from collections import OrderedDict
 from dataclasses import dataclass
 from enum import Enum
+from pathlib import Path
 import asyncio
+import os
+import pickle
+import shutil
+import tempfile
+import zlib
 import numpy as np
 from datetime import datetime
 import torch
@@ -20,7 +27,7 @@ class MemoryItem:
     importance: float
     tokens: int
     metadata: Dict[str, Any]
-    embedding: Optional[List[float]] = None
+    embedding: Optional[List[float]]
 
 @dataclass
 class EpisodicMemory(MemoryItem):
@@ -62,6 +69,439 @@ class MemoryCompressionStrategy(Enum):
     RELEVANCE = "relevance"
     HYBRID = "hybrid"
 
+MEMORY_TYPE_CODES = {
+    MemoryType.EPISODIC: 0,
+    MemoryType.SEMANTIC: 1,
+    MemoryType.WORKING: 2
+}
+
+def memory_type_of(item: MemoryItem) -> MemoryType:
+    """Get the memory type of an item."""
+    if isinstance(item, EpisodicMemory):
+        return MemoryType.EPISODIC
+    if isinstance(item, SemanticMemory):
+        return MemoryType.SEMANTIC
+    return MemoryType.WORKING
+
+class VectorTier:
+    """
+    Growable matrix of unit-norm embeddings with per-row scoring columns.
+
+    With ``path`` set the matrix is a memory-mapped file, so its pages are
+    only resident while being scanned.
+    """
+
+    def __init__(self, dim: int, path: Optional[Path] = None, capacity: int = 64):
+        self.dim = dim
+        self.path = path
+        self.size = 0
+        self.rows: Dict[int, int] = {}  # item id -> row
+        self.ids = np.empty(capacity, dtype=np.int64)
+        self.types = np.empty(capacity, dtype=np.int8)
+        self.timestamps = np.empty(capacity, dtype=np.float64)
+        self.importance = np.empty(capacity, dtype=np.float32)
+        self._generation = 0
+        self.matrix = self._allocate(capacity)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _allocate(self, capacity: int) -> np.ndarray:
+        if self.path is None:
+            return np.zeros((capacity, self.dim), dtype=np.float32)
+        self._generation += 1
+        return np.memmap(
+            self.path / f"vectors_{self._generation}.f32",
+            dtype=np.float32,
+            mode="w+",
+            shape=(capacity, self.dim)
+        )
+
+    def _grow(self) -> None:
+        capacity = 2 * len(self.ids)
+        matrix = self._allocate(capacity)
+        matrix[:self.size] = self.matrix[:self.size]
+        old_file = getattr(self.matrix, "filename", None)
+        self.matrix = matrix
+        if old_file:
+            Path(old_file).unlink()
+        for name in ("ids", "types", "timestamps", "importance"):
+            column = getattr(self, name)
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:self.size] = column[:self.size]
+            setattr(self, name, grown)
+
+    def add(self, item_id: int, vector: np.ndarray, type_code: int, timestamp: float, importance: float) -> None:
+        """Append a row."""
+        if self.size == len(self.ids):
+            self._grow()
+        row = self.size
+        self.matrix[row] = vector
+        self.ids[row] = item_id
+        self.types[row] = type_code
+        self.timestamps[row] = timestamp
+        self.importance[row] = importance
+        self.rows[item_id] = row
+        self.size += 1
+
+    def update(self, item_id: int, vector: np.ndarray, importance: float) -> None:
+        """Overwrite a row's embedding and importance."""
+        row = self.rows[item_id]
+        self.matrix[row] = vector
+        self.importance[row] = importance
+
+    def vector(self, item_id: int) -> np.ndarray:
+        """Get a copy of a row's embedding."""
+        return np.array(self.matrix[self.rows[item_id]])
+
+    def remove(self, item_id: int) -> None:
+        """Remove a row by moving the last row into its place."""
+        row = self.rows.pop(item_id)
+        last = self.size - 1
+        if row != last:
+            moved_id = int(self.ids[last])
+            self.matrix[row] = self.matrix[last]
+            self.ids[row] = moved_id
+            self.types[row] = self.types[last]
+            self.timestamps[row] = self.timestamps[last]
+            self.importance[row] = self.importance[last]
+            self.rows[moved_id] = row
+        self.size = last
+
+    def similarities(self, query: np.ndarray, type_codes: List[int]) -> Tuple[np.ndarray, ...]:
+        """Get (ids, similarities, importance, timestamps) for rows of the given types."""
+        mask = np.isin(self.types[:self.size], type_codes)
+        return (
+            self.ids[:self.size][mask],
+            (self.matrix[:self.size] @ query)[mask],
+            self.importance[:self.size][mask],
+            self.timestamps[:self.size][mask]
+        )
+
+class TieredMemoryStore:
+    """
+    Hot/warm/cold store for memory items.
+
+    Hot items are kept as objects with their embeddings in an in-memory
+    matrix. Warm items keep only their embeddings, in a memory-mapped file,
+    and are scanned on retrieval. Cold items are only on disk and are not
+    scanned unless asked. Warm and cold items are stored zlib-compressed in
+    a record file and rehydrated into the hot tier on access. Tiers are
+    demoted least-recently-used first.
+    
+    Each item keeps its record slot across promotions, and a demotion
+    rewrites the slot in place when the record still fits. Records that
+    outgrow their slot are appended, and the file is compacted once dead
+    bytes outweigh live ones. With an explicit ``storage_dir``, ``save``
+    (called by ``close``) writes an index so a new store over the same
+    directory restores every tier; a temporary directory is removed on
+    ``close``.
+    """
+
+    HOT = "hot"
+    WARM = "warm"
+    COLD = "cold"
+    COMPACT_MIN_BYTES = 1 << 20
+
+    def __init__(
+        self,
+        storage_dir: Optional[str] = None,
+        hot_capacity: int = 1000,
+        warm_capacity: int = 100000
+    ):
+        self._owns_storage_dir = storage_dir is None
+        self.storage_dir = Path(storage_dir) if storage_dir else Path(
+            tempfile.mkdtemp(prefix="multimind_memory_")
+        )
+        self.storage_dir.mkdir(parents=True, exist_ok=True)
+        self.hot_capacity = hot_capacity
+        self.warm_capacity = warm_capacity
+        
+        self.hot: Optional[VectorTier] = None
+        self.warm: Optional[VectorTier] = None
+        self._hot_items: "OrderedDict[int, MemoryItem]" = OrderedDict()  # LRU order
+        self._warm_order: "OrderedDict[int, None]" = OrderedDict()  # LRU order
+        self._cold: Dict[int, int] = {}  # item id -> type code
+        self._tokens: Dict[int, int] = {}  # item id -> token count
+        self.tiers: Dict[int, str] = {}
+        self.token_counts = {self.HOT: 0, self.WARM: 0, self.COLD: 0}
+        
+        # Record file for warm and cold items
+        self._records_path = self.storage_dir / "items.bin"
+        self._records_path.touch()
+        self._index_path = self.storage_dir / "index.pkl"
+        self._record_offsets: Dict[int, Tuple[int, int, int]] = {}  # item id -> (offset, length, slot size)
+        self._live_bytes = 0
+        self._dead_bytes = 0
+        self._next_id = 0
+        
+        # Warm vectors are rebuilt from the records, so old matrix files are stale
+        for path in self.storage_dir.glob("vectors_*.f32"):
+            path.unlink()
+        if self._index_path.exists():
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self.tiers)
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(self.token_counts.values())
+
+    @staticmethod
+    def normalize(embedding: List[float]) -> np.ndarray:
+        """Convert an embedding to a unit-norm float32 vector."""
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _ensure_tiers(self, dim: int) -> None:
+        if self.hot is None:
+            self.hot = VectorTier(dim)
+            self.warm = VectorTier(dim, path=self.storage_dir)
+
+    def add(self, item: MemoryItem) -> int:
+        """Add an item to the hot tier and return its id."""
+        vector = self.normalize(item.embedding)
+        self._ensure_tiers(len(vector))
+        item_id = self._next_id
+        self._next_id += 1
+        self._add_hot(item_id, item, vector)
+        self._rebalance()
+        return item_id
+
+    def _add_hot(self, item_id: int, item: MemoryItem, vector: np.ndarray) -> None:
+        self.hot.add(
+            item_id, vector, MEMORY_TYPE_CODES[memory_type_of(item)],
+            item.timestamp, item.importance
+        )
+        self._hot_items[item_id] = item
+        self._tokens[item_id] = item.tokens
+        self.tiers[item_id] = self.HOT
+        self.token_counts[self.HOT] += item.tokens
+
+    def replace(self, item_id: int, item: MemoryItem) -> None:
+        """Replace a hot item, e.g. with a compressed version."""
+        self.hot.update(item_id, self.normalize(item.embedding), item.importance)
+        self._hot_items[item_id] = item
+        self.token_counts[self.HOT] += item.tokens - self._tokens[item_id]
+        self._tokens[item_id] = item.tokens
+
+    def hot_items(self, memory_type: Optional[MemoryType] = None) -> List[Tuple[int, MemoryItem]]:
+        """Get (id, item) pairs in the hot tier, optionally of one type."""
+        return [
+            (item_id, item) for item_id, item in self._hot_items.items()
+            if memory_type is None or memory_type_of(item) == memory_type
+        ]
+
+    def _write_record(self, item_id: int, item: MemoryItem) -> None:
+        """Write an item's record, reusing its slot when the record fits."""
+        data = zlib.compress(pickle.dumps(item))
+        slot = self._record_offsets.get(item_id)
+        if slot is not None and len(data) <= slot[2]:
+            with open(self._records_path, "r+b") as f:
+                f.seek(slot[0])
+                f.write(data)
+            self._record_offsets[item_id] = (slot[0], len(data), slot[2])
+            return
+        
+        with open(self._records_path, "ab") as f:
+            offset = f.tell()
+            f.write(data)
+        self._record_offsets[item_id] = (offset, len(data), len(data))
+        self._live_bytes += len(data)
+        if slot is not None:
+            self._live_bytes -= slot[2]
+            self._dead_bytes += slot[2]
+        if self._dead_bytes > max(self._live_bytes, self.COMPACT_MIN_BYTES):
+            self.compact_records()
+
+    def _read_record(self, item_id: int) -> MemoryItem:
+        offset, length, _ = self._record_offsets[item_id]
+        with open(self._records_path, "rb") as f:
+            f.seek(offset)
+            return pickle.loads(zlib.decompress(f.read(length)))
+
+    def compact_records(self) -> None:
+        """Rewrite the record file without dead slots."""
+        compacted_path = self._records_path.with_suffix(".tmp")
+        offsets = {}
+        with open(self._records_path, "rb") as source, open(compacted_path, "wb") as target:
+            for item_id, (offset, length, _) in sorted(self._record_offsets.items(), key=lambda entry: entry[1][0]):
+                source.seek(offset)
+                offsets[item_id] = (target.tell(), length, length)
+                target.write(source.read(length))
+        os.replace(compacted_path, self._records_path)
+        self._record_offsets = offsets
+        self._live_bytes = sum(length for _, length, _ in offsets.values())
+        self._dead_bytes = 0
+
+    def _demote_hot(self) -> None:
+        item_id, item = self._hot_items.popitem(last=False)
+        self._write_record(item_id, item)
+        self.warm.add(
+            item_id, self.hot.vector(item_id), int(self.hot.types[self.hot.rows[item_id]]),
+            item.timestamp, item.importance
+        )
+        self.hot.remove(item_id)
+        self._warm_order[item_id] = None
+        self._move_tokens(item_id, self.HOT, self.WARM)
+
+    def _demote_warm(self) -> None:
+        item_id, _ = self._warm_order.popitem(last=False)
+        self._cold[item_id] = int(self.warm.types[self.warm.rows[item_id]])
+        self.warm.remove(item_id)
+        self._move_tokens(item_id, self.WARM, self.COLD)
+
+    def _move_tokens(self, item_id: int, source: str, target: str) -> None:
+        self.tiers[item_id] = target
+        self.token_counts[source] -= self._tokens[item_id]
+        self.token_counts[target] += self._tokens[item_id]
+
+    def _rebalance(self) -> None:
+        """Demote least-recently-used items until tiers fit their capacities."""
+        while len(self._hot_items) > self.hot_capacity:
+            self._demote_hot()
+        while len(self._warm_order) > self.warm_capacity:
+            self._demote_warm()
+
+    def get(self, item_id: int) -> MemoryItem:
+        """Get an item, rehydrating it into the hot tier if needed."""
+        tier = self.tiers[item_id]
+        if tier == self.HOT:
+            self._hot_items.move_to_end(item_id)
+            return self._hot_items[item_id]
+        
+        item = self._read_record(item_id)
+        if tier == self.WARM:
+            self.warm.remove(item_id)
+            del self._warm_order[item_id]
+        else:
+            del self._cold[item_id]
+        self.token_counts[tier] -= self._tokens[item_id]
+        self._add_hot(item_id, item, self.normalize(item.embedding))
+        self._rebalance()
+        return item
+
+    def similarities(
+        self,
+        query: np.ndarray,
+        memory_types: List[MemoryType],
+        include_cold: bool = False
+    ) -> Tuple[np.ndarray, ...]:
+        """
+        Get (ids, similarities, importance, timestamps) across tiers.
+
+        Cold items are only scored with ``include_cold``, which decompresses
+        every cold record.
+        """
+        if self.hot is None:
+            empty = np.empty(0)
+            return empty.astype(np.int64), empty, empty, empty
+        type_codes = [MEMORY_TYPE_CODES[t] for t in memory_types]
+        parts = [self.hot.similarities(query, type_codes), self.warm.similarities(query, type_codes)]
+        if include_cold:
+            cold_items = [
+                (item_id, self._read_record(item_id))
+                for item_id, code in self._cold.items() if code in type_codes
+            ]
+            if cold_items:
+                parts.append((
+                    np.array([item_id for item_id, _ in cold_items], dtype=np.int64),
+                    np.array([self.normalize(item.embedding) @ query for _, item in cold_items]),
+                    np.array([item.importance for _, item in cold_items]),
+                    np.array([item.timestamp for _, item in cold_items])
+                ))
+        return tuple(np.concatenate(columns) for columns in zip(*parts))
+
+    def clear(self) -> None:
+        """Remove all items and on-disk data."""
+        for path in self.storage_dir.glob("vectors_*.f32"):
+            path.unlink()
+        if self._index_path.exists():
+            self._index_path.unlink()
+        self.hot = None
+        self.warm = None
+        self._hot_items.clear()
+        self._warm_order.clear()
+        self._cold.clear()
+        self._tokens.clear()
+        self.tiers.clear()
+        self.token_counts = {self.HOT: 0, self.WARM: 0, self.COLD: 0}
+        self._records_path.write_bytes(b"")
+        self._record_offsets.clear()
+        self._live_bytes = 0
+        self._dead_bytes = 0
+
+    def save(self) -> None:
+        """Write hot items to the record file and persist the tier index."""
+        for item_id, item in self._hot_items.items():
+            self._write_record(item_id, item)
+        self.compact_records()
+        with open(self._index_path, "wb") as f:
+            pickle.dump({
+                "next_id": self._next_id,
+                "record_offsets": self._record_offsets,
+                "tiers": self.tiers,
+                "tokens": self._tokens,
+                "hot_order": list(self._hot_items),
+                "warm_order": list(self._warm_order),
+                "cold": self._cold
+            }, f)
+
+    def load(self) -> None:
+        """Restore tiers from the persisted index, rebuilding the vector tiers from records."""
+        with open(self._index_path, "rb") as f:
+            index = pickle.load(f)
+        self._next_id = index["next_id"]
+        self._record_offsets = index["record_offsets"]
+        self._live_bytes = sum(size for _, _, size in self._record_offsets.values())
+        self._dead_bytes = self._records_path.stat().st_size - self._live_bytes
+        
+        for item_id in index["hot_order"]:
+            item = self._read_record(item_id)
+            vector = self.normalize(item.embedding)
+            self._ensure_tiers(len(vector))
+            self._add_hot(item_id, item, vector)
+        for item_id in index["warm_order"]:
+            item = self._read_record(item_id)
+            vector = self.normalize(item.embedding)
+            self._ensure_tiers(len(vector))
+            self.warm.add(
+                item_id, vector, MEMORY_TYPE_CODES[memory_type_of(item)],
+                item.timestamp, item.importance
+            )
+            self._warm_order[item_id] = None
+            self._tokens[item_id] = item.tokens
+            self.tiers[item_id] = self.WARM
+            self.token_counts[self.WARM] += item.tokens
+        for item_id, type_code in index["cold"].items():
+            self._cold[item_id] = type_code
+            self._tokens[item_id] = index["tokens"][item_id]
+            self.tiers[item_id] = self.COLD
+            self.token_counts[self.COLD] += self._tokens[item_id]
+
+    def close(self) -> None:
+        """Persist the store, or remove it if it lives in a temporary directory."""
+        if not self._owns_storage_dir:
+            self.save()
+        # Drop the memory-mapped warm matrix before its directory goes away
+        self.hot = None
+        self.warm = None
+        if self._owns_storage_dir:
+            shutil.rmtree(self.storage_dir, ignore_errors=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get item and token counts per tier."""
+        return {
+            "items": {
+                self.HOT: len(self._hot_items),
+                self.WARM: len(self._warm_order),
+                self.COLD: len(self._cold)
+            },
+            "tokens": dict(self.token_counts)
+        }
+
 class AdvancedMemory:
     """Advanced memory system with multiple memory types and compression."""
 
@@ -70,6 +510,9 @@ class AdvancedMemory:
         model: BaseLLM,
         max_tokens: int = 4000,
         compression_threshold: float = 0.8,
+        storage_dir: Optional[str] = None,
+        hot_capacity: int = 1000,
+        warm_capacity: int = 100000,
         **kwargs
     ):
         """
@@ -77,8 +520,12 @@ class AdvancedMemory:
         
         Args:
             model: Language model
-            max_tokens: Maximum tokens for memory
+            max_tokens: Maximum tokens for hot memory
             compression_threshold: Threshold for memory compression
+            storage_dir: Directory for warm and cold tiers, restored on reopen
+                (temporary and removed on ``close`` if None)
+            hot_capacity: Maximum items kept in memory
+            warm_capacity: Maximum items in the memory-mapped warm tier
             **kwargs: Additional parameters
         """
         self.model = model
@@ -87,10 +534,12 @@ class AdvancedMemory:
         self.tokenizer = AutoTokenizer.from_pretrained("gpt2")
         self.embedding_model = AutoModel.from_pretrained("sentence-transformers/all-mpnet-base-v2")
         
-        # Initialize memory stores
-        self.episodic_memory: List[EpisodicMemory] = []
-        self.semantic_memory: List[SemanticMemory] = []
-        self.working_memory: List[WorkingMemory] = []
+        # Initialize tiered memory store
+        self.store = TieredMemoryStore(
+            storage_dir=storage_dir,
+            hot_capacity=hot_capacity,
+            warm_capacity=warm_capacity
+        )
         
         # Initialize compression state
         self.compression_state = {
@@ -101,6 +550,25 @@ class AdvancedMemory:
         
         self.kwargs = kwargs
 
+    @property
+    def episodic_memory(self) -> List[EpisodicMemory]:
+        """Hot episodic memory items."""
+        return [item for _, item in self.store.hot_items(MemoryType.EPISODIC)]
+
+    @property
+    def semantic_memory(self) -> List[SemanticMemory]:
+        """Hot semantic memory items."""
+        return [item for _, item in self.store.hot_items(MemoryType.SEMANTIC)]
+
+    @property
+    def working_memory(self) -> List[WorkingMemory]:
+        """Hot working memory items."""
+        return [item for _, item in self.store.hot_items(MemoryType.WORKING)]
+
+    def close(self) -> None:
+        """Persist the tiered store, or remove it if it is temporary."""
+        self.store.close()
+
     async def add_to_memory(
         self,
         content: str,
@@ -134,7 +602,6 @@ class AdvancedMemory:
                 embedding=embedding,
                 **kwargs
             )
-            self.episodic_memory.append(memory_item)
         
         elif memory_type == MemoryType.SEMANTIC:
             memory_item = await self._create_semantic_memory(
@@ -145,7 +612,6 @@ class AdvancedMemory:
                 embedding=embedding,
                 **kwargs
             )
-            self.semantic_memory.append(memory_item)
         
         else:
             memory_item = await self._create_working_memory(
@@ -156,7 +622,8 @@ class AdvancedMemory:
                 embedding=embedding,
                 **kwargs
             )
-            self.working_memory.append(memory_item)
+        
+        self.store.add(memory_item)
         
         # Check if compression is needed
         await self._check_compression()
@@ -166,6 +633,7 @@ class AdvancedMemory:
         query: str,
         memory_types: Optional[List[MemoryType]] = None,
         k: int = 5,
+        include_cold: bool = False,
         **kwargs
     ) -> List[MemoryItem]:
         """
@@ -175,6 +643,7 @@ class AdvancedMemory:
             query: Query to find relevant memories
             memory_types: Optional list of memory types to search
             k: Number of items to retrieve
+            include_cold: Also score items in the cold tier
             **kwargs: Additional parameters
             
         Returns:
@@ -183,49 +652,33 @@ class AdvancedMemory:
         if memory_types is None:
             memory_types = list(MemoryType)
         
-        # Get items from specified memory types
-        all_items = []
-        for memory_type in memory_types:
-            if memory_type == MemoryType.EPISODIC:
-                all_items.extend(self.episodic_memory)
-            elif memory_type == MemoryType.SEMANTIC:
-                all_items.extend(self.semantic_memory)
-            else:
-                all_items.extend(self.working_memory)
-        
-        if not all_items:
+        if len(self.store) == 0:
             return []
         
         # Generate query embedding
-        query_embedding = await self._generate_embedding(query)
+        query_embedding = self.store.normalize(await self._generate_embedding(query))
         
-        # Calculate relevance scores
-        scores = []
-        for item in all_items:
-            # Calculate semantic similarity
-            semantic_score = self._cosine_similarity(
-                query_embedding,
-                item.embedding
-            )
-            
-            # Calculate importance score
-            importance_score = item.importance
-            
-            # Calculate recency score
-            recency_score = self._calculate_recency_score(item)
-            
-            # Combine scores
-            combined_score = (
-                0.4 * semantic_score +
-                0.3 * importance_score +
-                0.3 * recency_score
-            )
-            
-            scores.append(combined_score)
+        # Score hot and warm tiers (and cold if requested) in one pass
+        ids, semantic_scores, importance_scores, timestamps = self.store.similarities(
+            query_embedding,
+            memory_types,
+            include_cold=include_cold
+        )
+        if len(ids) == 0:
+            return []
+        
+        recency_scores = np.exp(-(datetime.now().timestamp() - timestamps) / (24 * 3600))
+        scores = (
+            0.4 * semantic_scores +
+            0.3 * importance_scores +
+            0.3 * recency_scores
+        )
         
-        # Get top k items
-        top_k_indices = np.argsort(scores)[-k:][::-1]
-        return [all_items[i] for i in top_k_indices]
+        # Get top k items, rehydrating warm and cold hits
+        k = min(k, len(scores))
+        top_k = np.argpartition(-scores, k - 1)[:k]
+        top_k = top_k[np.argsort(-scores[top_k])]
+        return [self.store.get(int(ids[i])) for i in top_k]
 
     async def compress_memory(
         self,
@@ -239,15 +692,12 @@ class AdvancedMemory:
             strategy: Compression strategy to use
             **kwargs: Additional parameters
         """
-        # Get all memory items
-        all_items = (
-            self.episodic_memory +
-            self.semantic_memory +
-            self.working_memory
-        )
+        # Get hot memory items
+        hot_items = self.store.hot_items()
         
-        if not all_items:
+        if not hot_items:
             return
+        all_items = [item for _, item in hot_items]
         
         # Calculate compression scores
         compression_scores = []
@@ -274,26 +724,25 @@ class AdvancedMemory:
             compression_scores.append(score)
         
         # Sort items by compression score
-        sorted_items = [
-            item for _, item in sorted(
-                zip(compression_scores, all_items)
-            )
-        ]
+        order = np.argsort(compression_scores, kind="stable")
         
         # Compress items until under token budget
-        total_tokens = sum(item.tokens for item in all_items)
+        total_tokens = self.store.token_counts[TieredMemoryStore.HOT]
         compressed_items = []
+        tokens_saved = 0
         
-        for item in sorted_items:
+        for index in order:
             if total_tokens <= self.max_tokens:
                 break
+            item_id, item = hot_items[index]
             
             # Compress item
             compressed_item = await self._compress_item(item, **kwargs)
-            compressed_items.append(compressed_item)
+            compressed_items.append((item_id, compressed_item))
             
             # Update total tokens
             total_tokens -= (item.tokens - compressed_item.tokens)
+            tokens_saved += item.tokens - compressed_item.tokens
         
         # Update memory stores
         self._update_memory_stores(compressed_items)
@@ -301,10 +750,7 @@ class AdvancedMemory:
         # Update compression state
         self.compression_state["last_compression"] = datetime.now()
         self.compression_state["compression_count"] += 1
-        self.compression_state["total_tokens_compressed"] += (
-            sum(item.tokens for item in all_items) -
-            sum(item.tokens for item in compressed_items)
-        )
+        self.compression_state["total_tokens_compressed"] += tokens_saved
 
     async def _create_episodic_memory(
         self,
@@ -583,30 +1029,16 @@ class AdvancedMemory:
 
     def _update_memory_stores(
         self,
-        compressed_items: List[MemoryItem]
+        compressed_items: List[Tuple[int, MemoryItem]]
     ) -> None:
-        """Update memory stores with compressed items."""
-        # Clear existing stores
-        self.episodic_memory.clear()
-        self.semantic_memory.clear()
-        self.working_memory.clear()
-        
-        # Add compressed items to appropriate stores
-        for item in compressed_items:
-            if isinstance(item, EpisodicMemory):
-                self.episodic_memory.append(item)
-            elif isinstance(item, SemanticMemory):
-                self.semantic_memory.append(item)
-            else:
-                self.working_memory.append(item)
+        """Replace compressed items in the store, keeping the rest."""
+        for item_id, item in compressed_items:
+            self.store.replace(item_id, item)
 
     async def _check_compression(self) -> None:
         """Check if memory compression is needed."""
-        total_tokens = (
-            sum(item.tokens for item in self.episodic_memory) +
-            sum(item.tokens for item in self.semantic_memory) +
-            sum(item.tokens for item in self.working_memory)
-        )
+        # Running counter, so this check is O(1)
+        total_tokens = self.store.token_counts[TieredMemoryStore.HOT]
         
         if total_tokens > self.max_tokens * self.compression_threshold:
             await self.compress_memory() 
\ No newline at end of file
@@ -6,7 +6,10 @@ from typing import List, Dict, Any, Optional, Set, Tuple
 from datetime import datetime
 import json
 from pathlib import Path
+from collections import Counter
 import networkx as nx
+import numpy as np
+import scipy.sparse as sp
 from ..models.base import BaseLLM
 from .base import BaseMemory
 
@@ -20,7 +23,13 @@ class KnowledgeGraphMemory(BaseMemory):
         storage_path: Optional[str] = None,
         max_entities: int = 1000,
         entity_types: Optional[List[str]] = None,
-        relationship_types: Optional[List[str]] = None
+        relationship_types: Optional[List[str]] = None,
+        exact_betweenness_max_nodes: int = 2000,
+        betweenness_sample_size: int = 256,
+        pagerank_alpha: float = 0.85,
+        pagerank_tol: float = 1e-6,
+        pagerank_max_iter: int = 100,
+        community_refresh_ratio: float = 0.1
     ):
         super().__init__(memory_key)
         self.llm = llm
@@ -30,8 +39,22 @@ class KnowledgeGraphMemory(BaseMemory):
         self.relationship_types = relationship_types or [
             "WORKS_FOR", "LOCATED_IN", "PART_OF", "RELATED_TO", "OCCURRED_AT"
         ]
+        self.exact_betweenness_max_nodes = exact_betweenness_max_nodes
+        self.betweenness_sample_size = betweenness_sample_size
+        self.pagerank_alpha = pagerank_alpha
+        self.pagerank_tol = pagerank_tol
+        self.pagerank_max_iter = pagerank_max_iter
+        self.community_refresh_ratio = community_refresh_ratio
         self.graph = nx.DiGraph()
         self.messages: List[Dict[str, str]] = []
+        
+        # Graph analytics cache, invalidated by the mutation counter
+        self._graph_version = 0
+        self._analytics_cache: Dict[str, Tuple[int, Any]] = {}
+        self._last_pagerank: Dict[str, float] = {}
+        self._communities: Optional[List[Set[str]]] = None
+        self._dirty_nodes: Set[str] = set()
+        self._removed_nodes: Set[str] = set()
         self.load()
 
     async def add_message(self, message: Dict[str, str]) -> None:
@@ -62,6 +85,7 @@ class KnowledgeGraphMemory(BaseMemory):
         """Clear all messages and the graph."""
         self.messages.clear()
         self.graph.clear()
+        self.invalidate_analytics(full=True)
         await self.save()
 
     async def save(self) -> None:
@@ -83,6 +107,7 @@ class KnowledgeGraphMemory(BaseMemory):
                 graph_data = data.get("graph", {})
                 if graph_data:
                     self.graph = nx.node_link_graph(graph_data)
+                self.invalidate_analytics(full=True)
 
     async def _extract_entities_and_relationships(
         self,
@@ -132,13 +157,18 @@ class KnowledgeGraphMemory(BaseMemory):
         relationships: List[Tuple[str, str, str, str]]
     ) -> None:
         """Update the knowledge graph with new entities and relationships."""
+        touched = set()
+        
         # Add entities as nodes with their types
         for entity, entity_type in entities:
             if not self.graph.has_node(entity):
                 self.graph.add_node(entity, type=entity_type)
+                touched.add(entity)
         
         # Add relationships as edges with their types
         for source, rel, rel_type, target in relationships:
+            if not self.graph.has_edge(source, target):
+                touched.update((source, target))
             self.graph.add_edge(
                 source,
                 target,
@@ -146,6 +176,9 @@ class KnowledgeGraphMemory(BaseMemory):
                 type=rel_type,
                 timestamp=datetime.now().isoformat()
             )
+        
+        if touched:
+            self._mark_mutated(touched)
 
     def _trim_graph(self) -> None:
         """Trim the graph to maintain max_entities limit."""
@@ -153,15 +186,126 @@ class KnowledgeGraphMemory(BaseMemory):
         nodes_by_time = sorted(
             self.graph.nodes(data=True),
             key=lambda x: min(
-                edge["timestamp"]
-                for edge in self.graph.edges(x[0], data=True)
+                data["timestamp"]
+                for _, _, data in self.graph.edges(x[0], data=True)
             ) if self.graph.edges(x[0]) else datetime.now().isoformat()
         )
         
         # Remove oldest nodes until we're under the limit
+        removed = set()
         while len(self.graph.nodes) > self.max_entities:
             node, _ = nodes_by_time.pop(0)
+            neighbours = set(self.graph.predecessors(node)) | set(self.graph.successors(node))
             self.graph.remove_node(node)
+            removed.add(node)
+            self._dirty_nodes.update(neighbours)
+        
+        if removed:
+            self._removed_nodes.update(removed)
+            self._mark_mutated(set())
+
+    def _mark_mutated(self, touched: Set[str]) -> None:
+        """Record a graph mutation so cached analytics are recomputed."""
+        self._graph_version += 1
+        self._dirty_nodes.update(touched)
+
+    def invalidate_analytics(self, full: bool = False) -> None:
+        """
+        Invalidate cached graph analytics.
+
+        Call this after mutating ``self.graph`` directly. With ``full=True``
+        incremental state (PageRank warm start, communities) is dropped too.
+        """
+        self._graph_version += 1
+        self._analytics_cache.clear()
+        if full:
+            self._last_pagerank = {}
+            self._communities = None
+            self._dirty_nodes = set()
+            self._removed_nodes = set()
+
+    def _get_cached(self, name: str, compute) -> Any:
+        """Get an analytics result, recomputing it if the graph changed."""
+        cached = self._analytics_cache.get(name)
+        if cached is not None and cached[0] == self._graph_version:
+            return cached[1]
+        value = compute()
+        self._analytics_cache[name] = (self._graph_version, value)
+        return value
+
+    def _compute_betweenness(self) -> Dict[str, float]:
+        """Compute betweenness centrality, sampling pivots on large graphs."""
+        num_nodes = self.graph.number_of_nodes()
+        if num_nodes <= self.exact_betweenness_max_nodes:
+            return nx.betweenness_centrality(self.graph)
+        return nx.betweenness_centrality(
+            self.graph,
+            k=min(self.betweenness_sample_size, num_nodes),
+            seed=0
+        )
+
+    def _compute_pagerank(self) -> Dict[str, float]:
+        """Compute PageRank by power iteration on a CSR adjacency, warm-started from the last result."""
+        nodes = list(self.graph.nodes())
+        n = len(nodes)
+        adjacency = nx.to_scipy_sparse_array(self.graph, nodelist=nodes, weight=None, format="csr")
+        out_degree = np.asarray(adjacency.sum(axis=1)).ravel()
+        inv_degree = np.divide(1.0, out_degree, out=np.zeros(n), where=out_degree != 0)
+        transition = sp.csr_array(sp.diags(inv_degree) @ adjacency)
+        dangling = out_degree == 0
+        
+        x = np.array([self._last_pagerank.get(node, 1.0 / n) for node in nodes])
+        x /= x.sum()
+        teleport = np.full(n, 1.0 / n)
+        
+        for _ in range(self.pagerank_max_iter):
+            x_last = x
+            x = self.pagerank_alpha * (x @ transition + x[dangling].sum() * teleport) + (1 - self.pagerank_alpha) * teleport
+            if np.abs(x - x_last).sum() < n * self.pagerank_tol:
+                break
+        
+        pagerank = dict(zip(nodes, map(float, x)))
+        self._last_pagerank = pagerank
+        return pagerank
+
+    def _compute_communities(self) -> List[Set[str]]:
+        """Compute communities, updating the previous partition locally when few nodes changed."""
+        undirected = self.graph.to_undirected(as_view=True)
+        num_nodes = undirected.number_of_nodes()
+        changed = len(self._dirty_nodes) + len(self._removed_nodes)
+        
+        if self._communities is None or changed > self.community_refresh_ratio * num_nodes:
+            communities = [set(c) for c in nx.community.greedy_modularity_communities(undirected)]
+        else:
+            # Assign each changed node to the community most common among its neighbours
+            membership = {}
+            for idx, community in enumerate(self._communities):
+                for node in community:
+                    if node not in self._removed_nodes and undirected.has_node(node):
+                        membership[node] = idx
+            next_idx = len(self._communities)
+            for node in self._dirty_nodes:
+                if not undirected.has_node(node):
+                    continue
+                votes = Counter(
+                    membership[neighbour]
+                    for neighbour in undirected.neighbors(node)
+                    if neighbour in membership
+                )
+                if votes:
+                    membership[node] = votes.most_common(1)[0][0]
+                elif node not in membership:
+                    membership[node] = next_idx
+                    next_idx += 1
+            grouped: Dict[int, Set[str]] = {}
+            for node, idx in membership.items():
+                grouped.setdefault(idx, set()).add(node)
+            communities = sorted(grouped.values(), key=len, reverse=True)
+        
+        self._communities = communities
+        self._dirty_nodes = set()
+        self._removed_nodes = set()
+        return communities
 
     def get_entity_relationships(self, entity: str) -> List[Dict[str, Any]]:
         """Get all relationships for an entity."""
@@ -230,9 +374,9 @@ class KnowledgeGraphMemory(BaseMemory):
             return []
         
         # Calculate centrality metrics
-        degree_centrality = nx.degree_centrality(self.graph)
-        betweenness_centrality = nx.betweenness_centrality(self.graph)
-        pagerank = nx.pagerank(self.graph)
+        degree_centrality = self._get_cached("degree_centrality", lambda: nx.degree_centrality(self.graph))
+        betweenness_centrality = self._get_cached("betweenness_centrality", self._compute_betweenness)
+        pagerank = self._get_cached("pagerank", self._compute_pagerank)
         
         # Combine metrics
         entities = []
@@ -259,11 +403,8 @@ class KnowledgeGraphMemory(BaseMemory):
         if not self.graph.nodes:
             return []
         
-        # Convert to undirected graph for community detection
-        undirected = self.graph.to_undirected()
-        
         # Detect communities
-        communities = nx.community.greedy_modularity_communities(undirected)
+        communities = self._get_cached("communities", self._compute_communities)
         
         # Convert to lists of entity names
         return [list(community) for community in communities]
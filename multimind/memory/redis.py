@@ -2,10 +2,14 @@
 Redis-based memory implementation.
 """
 
-from typing import List, Dict, Any, Optional, Union
+from typing import List, Dict, Any, Optional, Tuple, Union, AsyncIterator
 from datetime import datetime
+import itertools
 import json
+import time
+import uuid
 import redis
+import redis.asyncio as aioredis
 from .base import BaseMemory
 
 class RedisMemory(BaseMemory):
@@ -28,15 +32,15 @@ class RedisMemory(BaseMemory):
             "timestamp": datetime.now().isoformat()
         }
         
-        # Add to Redis list
-        self.redis_client.rpush(
+        # Add to Redis list and set TTL in a single round trip
+        pipe = self.redis_client.pipeline(transaction=False)
+        pipe.rpush(
             self.memory_key,
             json.dumps(message_with_timestamp)
         )
-        
-        # Set TTL if specified
         if self.ttl:
-            self.redis_client.expire(self.memory_key, self.ttl)
+            pipe.expire(self.memory_key, self.ttl)
+        pipe.execute()
 
     def get_messages(self) -> List[Dict[str, str]]:
         """Get all messages from Redis."""
@@ -75,4 +79,180 @@ class RedisMemory(BaseMemory):
                 self.memory_key,
                 current_count - max_messages,
                 -1
-            ) 
\ No newline at end of file
+            ) 
+
+
+class AsyncRedisMemory(BaseMemory):
+    """
+    Memory that uses asyncio Redis for storage.
+
+    Messages are kept in a sorted set scored by their timestamp, so time-range
+    and paginated reads are served by Redis in O(log n + page) instead of
+    transferring the whole history. Writes are pipelined and connections are
+    drawn from a shared pool.
+    """
+
+    def __init__(
+        self,
+        redis_url: str,
+        memory_key: str = "chat_history",
+        ttl: Optional[int] = None,
+        max_connections: int = 50,
+        page_size: int = 100
+    ):
+        super().__init__(memory_key)
+        self.connection_pool = aioredis.ConnectionPool.from_url(
+            redis_url,
+            max_connections=max_connections
+        )
+        self.redis_client = aioredis.Redis(connection_pool=self.connection_pool)
+        self.ttl = ttl  # Time to live in seconds
+        self.page_size = page_size
+        self.messages_key = f"{memory_key}:messages"
+        self._sequence = itertools.count()
+
+    async def __aenter__(self) -> "AsyncRedisMemory":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Close the client and disconnect pooled connections."""
+        await self.redis_client.aclose()
+        await self.connection_pool.disconnect()
+
+    def _prepare(self, message: Dict[str, Any]) -> Tuple[Dict[str, Any], float]:
+        """
+        Stamp a message with a unique id and return it with its score.
+
+        The id leads the serialized member and sorts chronologically, so
+        messages sharing a score keep their insertion order. A caller-supplied
+        ``timestamp`` (ISO string or datetime) is kept and used as the score;
+        otherwise the current time is. Messages that already carry an ``id``
+        are rejected, as it would break that ordering and could collide.
+        """
+        if "id" in message:
+            raise ValueError("AsyncRedisMemory assigns message ids; remove the 'id' field")
+        timestamp = message.get("timestamp")
+        if timestamp is None:
+            timestamp = datetime.now()
+        elif isinstance(timestamp, str):
+            try:
+                timestamp = datetime.fromisoformat(timestamp)
+            except ValueError:
+                raise ValueError(f"Invalid message timestamp: {timestamp!r}")
+        elif not isinstance(timestamp, datetime):
+            raise ValueError(f"Invalid message timestamp: {timestamp!r}")
+        message_id = f"{time.time_ns():020d}{next(self._sequence) % 1000000:06d}{uuid.uuid4().hex[:8]}"
+        prepared = {"id": message_id, **message, "timestamp": timestamp.isoformat()}
+        return prepared, timestamp.timestamp()
+
+    async def add_message(self, message: Dict[str, str]) -> None:
+        """Add message to Redis."""
+        await self.add_messages([message])
+
+    async def add_messages(self, messages: List[Dict[str, str]]) -> None:
+        """Add several messages to Redis in a single pipelined round trip."""
+        if not messages:
+            return
+        
+        mapping = {}
+        for message in messages:
+            prepared, score = self._prepare(message)
+            mapping[json.dumps(prepared)] = score
+        
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            pipe.zadd(self.messages_key, mapping)
+            if self.ttl:
+                pipe.expire(self.messages_key, self.ttl)
+            await pipe.execute()
+
+    async def get_messages(
+        self,
+        offset: int = 0,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, str]]:
+        """Get messages in chronological order, optionally paginated."""
+        if limit is not None and limit <= 0:
+            return []
+        end = -1 if limit is None else offset + limit - 1
+        messages = await self.redis_client.zrange(self.messages_key, offset, end)
+        return [json.loads(msg) for msg in messages]
+
+    async def iter_messages(self, page_size: Optional[int] = None) -> AsyncIterator[Dict[str, str]]:
+        """Iterate over all messages, fetching one page per round trip."""
+        page_size = page_size or self.page_size
+        offset = 0
+        while True:
+            page = await self.get_messages(offset=offset, limit=page_size)
+            for message in page:
+                yield message
+            if len(page) < page_size:
+                break
+            offset += page_size
+
+    async def get_messages_between(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        start_exclusive: bool = False
+    ) -> List[Dict[str, str]]:
+        """Get messages with timestamps in ``[start, end]``, optionally paginated."""
+        min_score = "-inf" if start is None else start.timestamp()
+        if start is not None and start_exclusive:
+            min_score = f"({min_score}"
+        max_score = "+inf" if end is None else end.timestamp()
+        
+        if limit is None and offset == 0:
+            messages = await self.redis_client.zrangebyscore(self.messages_key, min_score, max_score)
+        else:
+            messages = await self.redis_client.zrangebyscore(
+                self.messages_key,
+                min_score,
+                max_score,
+                start=offset,
+                num=-1 if limit is None else limit
+            )
+        return [json.loads(msg) for msg in messages]
+
+    async def get_messages_since(
+        self,
+        timestamp: datetime,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, str]]:
+        """Get messages since a specific timestamp."""
+        return await self.get_messages_between(
+            start=timestamp,
+            limit=limit,
+            start_exclusive=True
+        )
+
+    async def get_recent_messages(self, count: int) -> List[Dict[str, str]]:
+        """Get the most recent messages in chronological order."""
+        if count <= 0:
+            return []
+        messages = await self.redis_client.zrange(self.messages_key, -count, -1)
+        return [json.loads(msg) for msg in messages]
+
+    async def clear(self) -> None:
+        """Clear all messages from Redis."""
+        await self.redis_client.delete(self.messages_key)
+
+    async def save(self) -> None:
+        """Save is handled automatically by Redis."""
+        pass
+
+    def load(self) -> None:
+        """Load is handled automatically by Redis."""
+        pass
+
+    async def get_message_count(self) -> int:
+        """Get the number of messages in memory."""
+        return await self.redis_client.zcard(self.messages_key)
+
+    async def trim_messages(self, max_messages: int) -> None:
+        """Trim the message set to the most recent ``max_messages``."""
+        await self.redis_client.zremrangebyrank(self.messages_key, 0, -(max_messages + 1))
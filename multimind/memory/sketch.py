@@ -2,82 +2,227 @@
 Compressed Sketch-Based Memory implementation using probabilistic data structures.
 """
 
-from typing import Dict, Any, Optional, List, Set, Tuple
+from typing import Dict, Any, Optional, List, Set, Tuple, Iterable, Sequence, Union
 from datetime import datetime, timedelta
+import io
 import numpy as np
 from collections import defaultdict
 import mmh3  # MurmurHash3 for hashing
 from .base import BaseMemory
 
+def _random_seed() -> int:
+    """Draw a random 32-bit hash seed."""
+    return int(np.random.randint(0, 2**32, dtype=np.uint64))
+
+
+def _hash_pairs(keys: Iterable[str], seed: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Hash keys with 128-bit MurmurHash3 and return its two 64-bit halves as arrays."""
+    pairs = np.array(
+        [mmh3.hash64(key, seed, signed=False) for key in keys],
+        dtype=np.uint64
+    ).reshape(-1, 2)
+    return pairs[:, 0], pairs[:, 1]
+
+
+def _double_hash_indices(
+    keys: Iterable[str],
+    seed: int,
+    num_hashes: int,
+    modulus: int
+) -> np.ndarray:
+    """
+    Compute ``num_hashes`` indices per key by double hashing.
+
+    Index ``i`` of a key is ``(h1 + i * h2) mod modulus`` (Kirsch-Mitzenmacher),
+    so each key is hashed once regardless of ``num_hashes``. Returns an array
+    of shape ``(num_hashes, len(keys))``.
+    """
+    h1, h2 = _hash_pairs(keys, seed)
+    i = np.arange(num_hashes, dtype=np.uint64)[:, None]
+    return ((h1[None, :] + i * h2[None, :]) % np.uint64(modulus)).astype(np.intp)
+
+
+def _dump_arrays(**arrays: Any) -> bytes:
+    """Serialize named arrays/scalars into compressed bytes."""
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, **arrays)
+    return buffer.getvalue()
+
+
+def _load_arrays(data: bytes) -> Dict[str, np.ndarray]:
+    """Deserialize bytes produced by ``_dump_arrays``."""
+    with np.load(io.BytesIO(data), allow_pickle=False) as arrays:
+        return {name: arrays[name] for name in arrays.files}
+
+
 class CountMinSketch:
     """Count-Min Sketch implementation for frequency estimation."""
-    def __init__(self, width: int = 1000, depth: int = 5):
+    def __init__(self, width: int = 1000, depth: int = 5, seed: Optional[int] = None):
         self.width = width
         self.depth = depth
         self.counts = np.zeros((depth, width), dtype=np.int32)
-        self.seeds = np.random.randint(0, 2**32, depth)
+        # Sketches built with the same seed and shape can be merged
+        self.seed = _random_seed() if seed is None else seed
+        self._rows = np.arange(depth)[:, None]
 
     def add(self, key: str, count: int = 1) -> None:
         """Add an element to the sketch."""
-        for i in range(self.depth):
-            hash_val = mmh3.hash(key, self.seeds[i]) % self.width
-            self.counts[i, hash_val] += count
+        self.add_many([key], count)
+
+    def add_many(self, keys: Sequence[str], counts: Union[int, Sequence[int]] = 1) -> None:
+        """Add a batch of elements, scatter-adding into the counters."""
+        if len(keys) == 0:
+            return
+        indices = _double_hash_indices(keys, self.seed, self.depth, self.width)
+        counts = np.broadcast_to(np.asarray(counts, dtype=np.int32), (self.depth, len(keys)))
+        np.add.at(self.counts, (np.broadcast_to(self._rows, indices.shape), indices), counts)
 
     def estimate(self, key: str) -> int:
         """Estimate the frequency of an element."""
-        return min(
-            self.counts[i, mmh3.hash(key, self.seeds[i]) % self.width]
-            for i in range(self.depth)
-        )
+        return int(self.estimate_many([key])[0])
+
+    def estimate_many(self, keys: Sequence[str]) -> np.ndarray:
+        """Estimate the frequencies of a batch of elements."""
+        if len(keys) == 0:
+            return np.zeros(0, dtype=self.counts.dtype)
+        indices = _double_hash_indices(keys, self.seed, self.depth, self.width)
+        return self.counts[self._rows, indices].min(axis=0)
+
+    def merge(self, other: "CountMinSketch") -> None:
+        """Merge another sketch built with the same shape and seed into this one."""
+        if (self.width, self.depth, self.seed) != (other.width, other.depth, other.seed):
+            raise ValueError("Cannot merge Count-Min sketches with different width, depth or seed")
+        self.counts += other.counts
+
+    def to_bytes(self) -> bytes:
+        """Serialize the sketch."""
+        return _dump_arrays(counts=self.counts, seed=np.uint64(self.seed))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "CountMinSketch":
+        """Deserialize a sketch produced by ``to_bytes``."""
+        arrays = _load_arrays(data)
+        depth, width = arrays["counts"].shape
+        sketch = cls(width, depth, seed=int(arrays["seed"]))
+        sketch.counts = arrays["counts"].astype(np.int32)
+        return sketch
 
 class BloomFilter:
     """Bloom Filter implementation for membership testing."""
-    def __init__(self, size: int = 10000, num_hashes: int = 7):
+    def __init__(self, size: int = 10000, num_hashes: int = 7, seed: Optional[int] = None):
         self.size = size
         self.num_hashes = num_hashes
         self.bits = np.zeros(size, dtype=bool)
-        self.seeds = np.random.randint(0, 2**32, num_hashes)
+        # Filters built with the same seed and shape can be merged
+        self.seed = _random_seed() if seed is None else seed
 
     def add(self, key: str) -> None:
         """Add an element to the filter."""
-        for i in range(self.num_hashes):
-            hash_val = mmh3.hash(key, self.seeds[i]) % self.size
-            self.bits[hash_val] = True
+        self.add_many([key])
+
+    def add_many(self, keys: Sequence[str]) -> None:
+        """Add a batch of elements to the filter."""
+        if len(keys) == 0:
+            return
+        indices = _double_hash_indices(keys, self.seed, self.num_hashes, self.size)
+        self.bits[indices.ravel()] = True
 
     def contains(self, key: str) -> bool:
         """Check if an element is in the filter."""
-        return all(
-            self.bits[mmh3.hash(key, self.seeds[i]) % self.size]
-            for i in range(self.num_hashes)
+        return bool(self.contains_many([key])[0])
+
+    def contains_many(self, keys: Sequence[str]) -> np.ndarray:
+        """Check a batch of elements, returning a boolean array."""
+        if len(keys) == 0:
+            return np.zeros(0, dtype=bool)
+        indices = _double_hash_indices(keys, self.seed, self.num_hashes, self.size)
+        return self.bits[indices].all(axis=0)
+
+    def merge(self, other: "BloomFilter") -> None:
+        """Union another filter built with the same shape and seed into this one."""
+        if (self.size, self.num_hashes, self.seed) != (other.size, other.num_hashes, other.seed):
+            raise ValueError("Cannot merge Bloom filters with different size, hash count or seed")
+        self.bits |= other.bits
+
+    def to_bytes(self) -> bytes:
+        """Serialize the filter."""
+        return _dump_arrays(
+            bits=np.packbits(self.bits),
+            size=np.int64(self.size),
+            num_hashes=np.int64(self.num_hashes),
+            seed=np.uint64(self.seed)
         )
 
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "BloomFilter":
+        """Deserialize a filter produced by ``to_bytes``."""
+        arrays = _load_arrays(data)
+        size = int(arrays["size"])
+        bloom = cls(size, int(arrays["num_hashes"]), seed=int(arrays["seed"]))
+        bloom.bits = np.unpackbits(arrays["bits"], count=size).astype(bool)
+        return bloom
+
 class HyperLogLog:
     """HyperLogLog implementation for cardinality estimation."""
-    def __init__(self, precision: int = 4):
+    def __init__(self, precision: int = 4, seed: int = 0):
         self.precision = precision
         self.m = 1 << precision
         self.M = np.zeros(self.m, dtype=np.int8)
         self.alpha = 0.7213 / (1 + 1.079 / self.m)
+        self.seed = seed
 
     def add(self, key: str) -> None:
         """Add an element to the counter."""
-        x = mmh3.hash(key)
-        j = x & (self.m - 1)
-        w = x >> self.precision
-        self.M[j] = max(self.M[j], self._count_leading_zeros(w))
+        self.add_many([key])
+
+    def add_many(self, keys: Sequence[str]) -> None:
+        """Add a batch of elements to the counter."""
+        if len(keys) == 0:
+            return
+        x, _ = _hash_pairs(keys, self.seed)
+        j = (x & np.uint64(self.m - 1)).astype(np.intp)
+        w = x >> np.uint64(self.precision)
+        rank = (64 - self.precision) - self._bit_length(w) + 1
+        np.maximum.at(self.M, j, rank.astype(self.M.dtype))
 
     def estimate(self) -> float:
         """Estimate the cardinality."""
-        E = self.alpha * self.m * self.m / np.sum(2.0 ** -self.M)
+        E = self.alpha * self.m * self.m / np.sum(2.0 ** -self.M.astype(float))
         if E <= 2.5 * self.m:
             V = np.sum(self.M == 0)
             if V > 0:
                 E = self.m * np.log(self.m / V)
         return E
 
-    def _count_leading_zeros(self, x: int) -> int:
-        """Count leading zeros in binary representation."""
-        return 32 - len(bin(x)[2:])
+    def merge(self, other: "HyperLogLog") -> None:
+        """Merge another counter with the same precision and seed into this one."""
+        if (self.precision, self.seed) != (other.precision, other.seed):
+            raise ValueError("Cannot merge HyperLogLog counters with different precision or seed")
+        np.maximum(self.M, other.M, out=self.M)
+
+    def to_bytes(self) -> bytes:
+        """Serialize the counter."""
+        return _dump_arrays(registers=self.M, seed=np.uint64(self.seed))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "HyperLogLog":
+        """Deserialize a counter produced by ``to_bytes``."""
+        arrays = _load_arrays(data)
+        registers = arrays["registers"]
+        hll = cls(int(np.log2(len(registers))), seed=int(arrays["seed"]))
+        hll.M = registers.astype(np.int8)
+        return hll
+
+    @staticmethod
+    def _bit_length(x: np.ndarray) -> np.ndarray:
+        """Exact bit length of each unsigned 64-bit value."""
+        x = x.copy()
+        length = np.zeros(x.shape, dtype=np.int64)
+        for shift in (32, 16, 8, 4, 2, 1):
+            mask = x >= (np.uint64(1) << np.uint64(shift))
+            length += mask * shift
+            x = np.where(mask, x >> np.uint64(shift), x)
+        return length + (x > 0)
 
 class SketchMemory(BaseMemory):
     """Memory implementation using compressed sketches."""
@@ -89,15 +234,20 @@ class SketchMemory(BaseMemory):
         bloom_size: int = 10000,
         bloom_hashes: int = 7,
         hll_precision: int = 4,
+        sketch_seed: Optional[int] = None,
         **kwargs
     ):
-        """Initialize sketch memory."""
+        """Initialize sketch memory.
+
+        Pass the same ``sketch_seed`` to every shard whose sketches should be
+        merged with ``merge_sketches``.
+        """
         super().__init__(**kwargs)
         
         # Initialize sketches
-        self.frequency_sketch = CountMinSketch(sketch_width, sketch_depth)
-        self.membership_filter = BloomFilter(bloom_size, bloom_hashes)
-        self.cardinality_counter = HyperLogLog(hll_precision)
+        self.frequency_sketch = CountMinSketch(sketch_width, sketch_depth, seed=sketch_seed)
+        self.membership_filter = BloomFilter(bloom_size, bloom_hashes, seed=sketch_seed)
+        self.cardinality_counter = HyperLogLog(hll_precision, seed=sketch_seed or 0)
         
         # Memory tracking
         self.memories: Dict[str, Dict[str, Any]] = {}
@@ -137,6 +287,38 @@ class SketchMemory(BaseMemory):
         # Update statistics
         self.total_adds += 1
 
+    async def add_memories(self, memories: List[Dict[str, Any]]) -> None:
+        """Add a batch of memories, updating the sketches with vectorized batch calls.
+
+        Each entry needs ``id`` and ``content`` and may carry ``metadata``.
+        """
+        if not memories:
+            return
+        
+        now = datetime.now()
+        for memory in memories:
+            self.memories[memory['id']] = {
+                'id': memory['id'],
+                'content': memory['content'],
+                'created_at': now,
+                'last_accessed': now,
+                'access_count': 0,
+                'metadata': memory.get('metadata') or {}
+            }
+        
+        # Update sketches
+        memory_ids = [memory['id'] for memory in memories]
+        self.frequency_sketch.add_many(memory_ids)
+        self.membership_filter.add_many(memory_ids)
+        self.cardinality_counter.add_many(memory_ids)
+        
+        # Update statistics
+        self.total_adds += len(memories)
+
+    async def contains_memories(self, memory_ids: List[str]) -> List[bool]:
+        """Check membership of several memory IDs against the Bloom filter."""
+        return self.membership_filter.contains_many(memory_ids).tolist()
+
     async def get_memory(self, memory_id: str) -> Optional[Dict[str, Any]]:
         """Get a memory by ID."""
         self.total_queries += 1
@@ -163,6 +345,30 @@ class SketchMemory(BaseMemory):
         """Estimate how many times a memory has been accessed."""
         return self.frequency_sketch.estimate(memory_id)
 
+    async def estimate_frequencies(self, memory_ids: List[str]) -> List[int]:
+        """Estimate access frequencies for several memories at once."""
+        return self.frequency_sketch.estimate_many(memory_ids).tolist()
+
+    def merge_sketches(self, other: "SketchMemory") -> None:
+        """Union another shard's sketches into this memory's sketches."""
+        self.frequency_sketch.merge(other.frequency_sketch)
+        self.membership_filter.merge(other.membership_filter)
+        self.cardinality_counter.merge(other.cardinality_counter)
+
+    def export_sketches(self) -> Dict[str, bytes]:
+        """Serialize the sketches, e.g. to ship them to an aggregating shard."""
+        return {
+            'frequency': self.frequency_sketch.to_bytes(),
+            'membership': self.membership_filter.to_bytes(),
+            'cardinality': self.cardinality_counter.to_bytes()
+        }
+
+    def import_sketches(self, data: Dict[str, bytes]) -> None:
+        """Replace the sketches with ones produced by ``export_sketches``."""
+        self.frequency_sketch = CountMinSketch.from_bytes(data['frequency'])
+        self.membership_filter = BloomFilter.from_bytes(data['membership'])
+        self.cardinality_counter = HyperLogLog.from_bytes(data['cardinality'])
+
     async def estimate_cardinality(self) -> float:
         """Estimate the total number of unique memories."""
         return self.cardinality_counter.estimate()
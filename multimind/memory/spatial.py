@@ -2,14 +2,112 @@
 Spatial memory implementation that manages spatial relationships and locations.
 """
 
-from typing import List, Dict, Any, Optional, Set, Tuple
+from typing import List, Dict, Any, Optional, Set, Tuple, Iterable
 from datetime import datetime, timedelta
+from collections import defaultdict
+import itertools
 import json
+import math
 from pathlib import Path
 import numpy as np
 from ..models.base import BaseLLM
 from .base import BaseMemory
 
+class SpatialGridIndex:
+    """
+    Uniform grid hash over location coordinates supporting radius queries.
+
+    Points are bucketed into cubic cells of side ``cell_size`` so that a radius
+    query only has to inspect the cells overlapping the query sphere. Axes on
+    which every indexed point sits in the origin cell (e.g. z for planar data,
+    or x/y/z for lat/lon data) collapse to a single cell during queries. The
+    index is maintained incrementally via ``insert``/``remove``.
+    """
+
+    AXES: Tuple[str, ...] = ("x", "y", "z", "lat", "lon")
+
+    def __init__(self, cell_size: float = 1.0):
+        self.cell_size = cell_size
+        self.cells: Dict[Tuple[int, ...], Set[str]] = defaultdict(set)
+        self.points: Dict[str, Tuple[float, ...]] = {}
+        # axis position -> number of points outside the origin cell on that axis
+        self.axis_usage: Dict[int, int] = defaultdict(int)
+
+    @classmethod
+    def to_point(cls, coordinates: Optional[Dict[str, Any]]) -> Optional[Tuple[float, ...]]:
+        """
+        Project a coordinates dict onto the indexed axes, or None if not numeric.
+
+        Keys outside ``AXES`` are dropped, which can only shorten distances, so
+        the projection never prunes a true neighbour.
+        """
+        if not coordinates or not isinstance(coordinates, dict):
+            return None
+        try:
+            return tuple(float(coordinates.get(axis, 0) or 0) for axis in cls.AXES)
+        except (TypeError, ValueError):
+            return None
+
+    def _cell(self, point: Tuple[float, ...]) -> Tuple[int, ...]:
+        return tuple(int(math.floor(c / self.cell_size)) for c in point)
+
+    def insert(self, location_id: str, point: Tuple[float, ...]) -> None:
+        """Insert or move a location in the index."""
+        self.remove(location_id)
+        self.points[location_id] = point
+        cell = self._cell(point)
+        self.cells[cell].add(location_id)
+        for axis, c in enumerate(cell):
+            if c:
+                self.axis_usage[axis] += 1
+
+    def remove(self, location_id: str) -> None:
+        """Remove a location from the index if present."""
+        point = self.points.pop(location_id, None)
+        if point is None:
+            return
+        cell = self._cell(point)
+        for axis, c in enumerate(cell):
+            if c:
+                self.axis_usage[axis] -= 1
+        bucket = self.cells.get(cell)
+        if bucket is not None:
+            bucket.discard(location_id)
+            if not bucket:
+                del self.cells[cell]
+
+    def clear(self) -> None:
+        """Remove all locations from the index."""
+        self.cells.clear()
+        self.points.clear()
+        self.axis_usage.clear()
+
+    def query_radius(self, point: Tuple[float, ...], radius: float) -> List[str]:
+        """Return ids of indexed locations within ``radius`` of ``point``."""
+        reach = int(math.ceil(radius / self.cell_size))
+        center = self._cell(point)
+        radius_sq = radius * radius
+        ranges = []
+        for axis, c in enumerate(center):
+            if self.axis_usage[axis]:
+                ranges.append(range(c - reach, c + reach + 1))
+            elif abs(c) <= reach:
+                # Every point is in the origin cell on this axis
+                ranges.append((0,))
+            else:
+                return []
+        results = []
+        for cell in itertools.product(*ranges):
+            for location_id in self.cells.get(cell, ()):
+                other = self.points[location_id]
+                if sum((a - b) ** 2 for a, b in zip(point, other)) <= radius_sq:
+                    results.append(location_id)
+        return results
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+
 class SpatialMemory(BaseMemory):
     """Memory that manages spatial relationships and locations."""
 
@@ -71,6 +169,7 @@ class SpatialMemory(BaseMemory):
         
         # Initialize spatial memory storage
         self.locations: List[Dict[str, Any]] = []
+        self.locations_by_id: Dict[str, Dict[str, Any]] = {}
         self.location_embeddings: List[List[float]] = []
         self.relationships: Dict[str, Dict[str, List[str]]] = {}  # location_id -> {relationship_type -> target_ids}
         self.clusters: Dict[str, List[str]] = {}  # cluster_id -> location_ids
@@ -83,12 +182,21 @@ class SpatialMemory(BaseMemory):
         self.last_cluster_update = datetime.now()
         self.last_evolution = datetime.now()
         self.last_validation = datetime.now()
+        
+        # Spatial index over coordinates for neighbour queries
+        search_radius = self._get_search_radius()
+        self.spatial_index = SpatialGridIndex(
+            cell_size=search_radius if search_radius and math.isfinite(search_radius) else 1.0
+        )
         self.load()
 
     async def add_message(self, message: Dict[str, str]) -> None:
         """Add message and analyze spatial information."""
-        # Create new location
-        location_id = f"location_{len(self.locations)}"
+        # Create new location; skip ids still held after evictions
+        index = len(self.locations)
+        while f"location_{index}" in self.locations_by_id:
+            index += 1
+        location_id = f"location_{index}"
         new_location = {
             "id": location_id,
             "content": message["content"],
@@ -109,6 +217,7 @@ class SpatialMemory(BaseMemory):
         
         # Add to storage
         self.locations.append(new_location)
+        self.locations_by_id[location_id] = new_location
         
         # Get location embedding
         embedding = await self.llm.embeddings(message["content"])
@@ -170,7 +279,7 @@ class SpatialMemory(BaseMemory):
 
     async def _analyze_spatial_info(self, location_id: str) -> None:
         """Analyze spatial information from a message."""
-        location = next(l for l in self.locations if l["id"] == location_id)
+        location = self.locations_by_id[location_id]
         
         try:
             # Generate analysis prompt
@@ -194,18 +303,65 @@ class SpatialMemory(BaseMemory):
             location["metadata"]["properties"] = analysis.get("properties", {})
             location["metadata"]["spatial_type"] = analysis.get("spatial_type")
             location["metadata"]["analysis_results"] = analysis
+            self._index_location(location)
             
         except Exception as e:
             print(f"Error analyzing spatial info: {e}")
 
+    def _get_search_radius(self) -> Optional[float]:
+        """
+        Get the coordinate distance beyond which no pair can reach the threshold.
+
+        Similarity averages coordinate, dimension and property similarity, each
+        at most 1, so a pair needs a coordinate similarity of at least
+        ``3 * distance_threshold - 2``. Returns None when that bound does not
+        restrict the search (threshold <= 2/3).
+        """
+        min_coord_similarity = 3 * self.distance_threshold - 2
+        if min_coord_similarity <= 0:
+            return None
+        if min_coord_similarity >= 1:
+            return 0.0
+        return math.sqrt(1.0 / min_coord_similarity - 1.0)
+
+    def _index_location(self, location: Dict[str, Any]) -> None:
+        """Insert, move or drop a location in the spatial index."""
+        point = SpatialGridIndex.to_point(location["metadata"].get("coordinates"))
+        if point is None:
+            self.spatial_index.remove(location["id"])
+        else:
+            self.spatial_index.insert(location["id"], point)
+
+    def _rebuild_spatial_index(self) -> None:
+        """Rebuild the spatial index from the stored locations."""
+        self.spatial_index.clear()
+        for location in self.locations:
+            self._index_location(location)
+
+    def _get_relationship_candidates(self, location: Dict[str, Any]) -> Iterable[Dict[str, Any]]:
+        """Get locations that could reach the similarity threshold with a location."""
+        search_radius = self._get_search_radius()
+        if search_radius is None:
+            # Coordinates alone cannot rule anything out
+            return (l for l in self.locations if l["id"] != location["id"])
+        
+        point = SpatialGridIndex.to_point(location["metadata"].get("coordinates"))
+        if point is None:
+            # Without coordinates the threshold is unreachable
+            return []
+        
+        return [
+            self.locations_by_id[other_id]
+            for other_id in self.spatial_index.query_radius(point, search_radius)
+            if other_id != location["id"] and other_id in self.locations_by_id
+        ]
+
     async def _find_relationships(self, location_id: str) -> None:
         """Find spatial relationships between locations."""
-        location = next(l for l in self.locations if l["id"] == location_id)
+        location = self.locations_by_id[location_id]
         
-        for other_location in self.locations:
-            if other_location["id"] == location_id:
-                continue
-            
+        candidates = []
+        for other_location in self._get_relationship_candidates(location):
             # Calculate spatial similarity
             similarity = self._calculate_spatial_similarity(
                 location["metadata"],
@@ -213,17 +369,20 @@ class SpatialMemory(BaseMemory):
             )
             
             if similarity >= self.distance_threshold:
-                # Determine relationship type
-                relationship_type = await self._determine_relationship_type(
-                    location,
-                    other_location,
-                    similarity
-                )
-                
-                if relationship_type:
-                    # Add bidirectional relationship
-                    self.relationships[location_id][relationship_type].append(other_location["id"])
-                    self.relationships[other_location["id"]][relationship_type].append(location_id)
+                candidates.append((other_location, similarity))
+        
+        if not candidates:
+            return
+        
+        # Determine relationship types for all neighbours in one request
+        relationship_types = await self._determine_relationship_types(location, candidates)
+        
+        for other_location, _ in candidates:
+            relationship_type = relationship_types.get(other_location["id"])
+            if relationship_type:
+                # Add bidirectional relationship
+                self.relationships[location_id][relationship_type].append(other_location["id"])
+                self.relationships[other_location["id"]][relationship_type].append(location_id)
 
     def _calculate_spatial_similarity(
         self,
@@ -299,6 +458,61 @@ class SpatialMemory(BaseMemory):
             print(f"Error determining relationship type: {e}")
             return None
 
+    async def _determine_relationship_types(
+        self,
+        location: Dict[str, Any],
+        candidates: List[Tuple[Dict[str, Any], float]]
+    ) -> Dict[str, str]:
+        """Determine relationship types between a location and several neighbours at once."""
+        if len(candidates) == 1:
+            other_location, similarity = candidates[0]
+            relationship_type = await self._determine_relationship_type(
+                location,
+                other_location,
+                similarity
+            )
+            return {other_location["id"]: relationship_type} if relationship_type else {}
+        
+        try:
+            neighbours = "\n".join(
+                f"""
+            {other['id']}: {other['content']}
+            Coordinates: {other['metadata']['coordinates']}
+            Dimensions: {other['metadata']['dimensions']}
+            Properties: {other['metadata']['properties']}
+            Similarity: {similarity}
+            """
+                for other, similarity in candidates
+            )
+            prompt = f"""
+            Determine the spatial relationship type between this location and each of its neighbours:
+            
+            Location: {location['content']}
+            Coordinates: {location['metadata']['coordinates']}
+            Dimensions: {location['metadata']['dimensions']}
+            Properties: {location['metadata']['properties']}
+            
+            Neighbours:
+            {neighbours}
+            
+            Available relationship types: {', '.join(self.relationship_types)}
+            
+            Return a JSON object mapping each neighbour id to the most appropriate
+            relationship type, or 'none' if no clear relationship exists.
+            """
+            response = await self.llm.generate(prompt)
+            types = json.loads(response)
+            
+            return {
+                other_id: str(relationship_type).strip().lower()
+                for other_id, relationship_type in types.items()
+                if str(relationship_type).strip().lower() in self.relationship_types
+            }
+            
+        except Exception as e:
+            print(f"Error determining relationship types: {e}")
+            return {}
+
     async def _update_clusters(self) -> None:
         """Update clusters of related locations."""
         # Clear existing clusters
@@ -337,15 +551,13 @@ class SpatialMemory(BaseMemory):
                     
                     # Update location metadata
                     for location_id in cluster:
-                        self.locations[self.locations.index(
-                            next(l for l in self.locations if l["id"] == location_id)
-                        )]["metadata"]["cluster_id"] = cluster_id
+                        self.locations_by_id[location_id]["metadata"]["cluster_id"] = cluster_id
         
         self.last_cluster_update = datetime.now()
 
     async def _update_learning_progress(self, location_id: str) -> None:
         """Update learning progress for a location."""
-        location = next(l for l in self.locations if l["id"] == location_id)
+        location = self.locations_by_id[location_id]
         
         # Calculate learning metrics
         relationship_count = sum(
@@ -378,7 +590,7 @@ class SpatialMemory(BaseMemory):
 
     async def _update_evolution(self, location_id: str) -> None:
         """Update evolution stage for a location."""
-        location = next(l for l in self.locations if l["id"] == location_id)
+        location = self.locations_by_id[location_id]
         
         # Calculate evolution metrics
         learning_progress = location["metadata"]["learning_progress"]
@@ -412,7 +624,7 @@ class SpatialMemory(BaseMemory):
 
     async def _validate_location(self, location_id: str) -> None:
         """Validate spatial information of a location."""
-        location = next(l for l in self.locations if l["id"] == location_id)
+        location = self.locations_by_id[location_id]
         
         try:
             # Generate validation prompt
@@ -472,6 +684,8 @@ class SpatialMemory(BaseMemory):
         location_idx = next(i for i, l in enumerate(self.locations) if l["id"] == location_id)
         self.locations.pop(location_idx)
         self.location_embeddings.pop(location_idx)
+        self.locations_by_id.pop(location_id, None)
+        self.spatial_index.remove(location_id)
         
         # Remove from relationships
         if location_id in self.relationships:
@@ -517,6 +731,7 @@ class SpatialMemory(BaseMemory):
     async def clear(self) -> None:
         """Clear all locations."""
         self.locations = []
+        self.locations_by_id = {}
         self.location_embeddings = []
         self.relationships = {}
         self.clusters = {}
@@ -524,6 +739,7 @@ class SpatialMemory(BaseMemory):
         self.location_history = []
         self.evolution_history = {}
         self.validation_history = {}
+        self.spatial_index.clear()
         await self.save()
 
     async def save(self) -> None:
@@ -552,6 +768,7 @@ class SpatialMemory(BaseMemory):
             with open(self.storage_path, 'r') as f:
                 data = json.load(f)
                 self.locations = data.get("locations", [])
+                self.locations_by_id = {l["id"]: l for l in self.locations}
                 self.relationships = data.get("relationships", {})
                 self.clusters = data.get("clusters", {})
                 self.learning_history = data.get("learning_history", {})
@@ -574,6 +791,8 @@ class SpatialMemory(BaseMemory):
                     data.get("last_validation", datetime.now().isoformat())
                 )
                 
+                self._rebuild_spatial_index()
+                
                 # Recreate embeddings
                 self.location_embeddings = []
                 for location in self.locations:
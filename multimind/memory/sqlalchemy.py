@@ -5,22 +5,56 @@ SQLAlchemy-based memory implementation.
 from typing import List, Dict, Any, Optional, Union
 from datetime import datetime
 import json
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, JSON
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import (
+    create_engine, MetaData, Table, Column, Index, Integer, String, Text,
+    DateTime, JSON, select, insert, delete, func
+)
 from .base import BaseMemory
 
-Base = declarative_base()
 
-class Message(Base):
-    """SQLAlchemy model for storing messages."""
-    __tablename__ = 'messages'
+def build_messages_table(metadata: MetaData, table_name: str = "messages") -> Table:
+    """
+    Build the messages table definition.
+
+    Rows are scoped by ``memory_key``; the composite indexes serve per-session
+    time-range queries and keyset pagination on ``id``.
+    """
+    return Table(
+        table_name,
+        metadata,
+        Column("id", Integer, primary_key=True, autoincrement=True),
+        Column("memory_key", String(255), nullable=False),
+        Column("role", String(64)),
+        Column("content", Text),
+        Column("timestamp", DateTime, nullable=False, default=datetime.utcnow),
+        Column("metadata", JSON),
+        Index(f"ix_{table_name}_memory_key_timestamp", "memory_key", "timestamp"),
+        Index(f"ix_{table_name}_memory_key_id", "memory_key", "id"),
+    )
+
+
+def _message_to_row(memory_key: str, message: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a message dict into a row for insertion."""
+    return {
+        "memory_key": memory_key,
+        "role": message["role"],
+        "content": message["content"],
+        "timestamp": datetime.utcnow(),
+        "metadata": message.get("metadata", {})
+    }
+
+
+def _row_to_message(row) -> Dict[str, Any]:
+    """Convert a selected row into a message dict."""
+    row = row._mapping
+    return {
+        "id": row["id"],
+        "role": row["role"],
+        "content": row["content"],
+        "timestamp": row["timestamp"].isoformat(),
+        "metadata": row["metadata"]
+    }
 
-    id = Column(Integer, primary_key=True)
-    role = Column(String)
-    content = Column(String)
-    timestamp = Column(DateTime, default=datetime.utcnow)
-    metadata = Column(JSON)
 
 class SQLAlchemyMemory(BaseMemory):
     """Memory that uses SQLAlchemy for database storage."""
@@ -29,52 +63,69 @@ class SQLAlchemyMemory(BaseMemory):
         self,
         database_url: str,
         memory_key: str = "chat_history",
-        table_name: str = "messages"
+        table_name: str = "messages",
+        engine_kwargs: Optional[Dict[str, Any]] = None
     ):
         super().__init__(memory_key)
-        self.engine = create_engine(database_url)
-        self.Session = sessionmaker(bind=self.engine)
-        Base.metadata.create_all(self.engine)
+        self.engine = create_engine(database_url, **(engine_kwargs or {}))
+        self.metadata = MetaData()
+        self.table = build_messages_table(self.metadata, table_name)
+        self.metadata.create_all(self.engine)
+
+    def _select(self):
+        """Select statement scoped to this memory's key."""
+        return select(self.table).where(self.table.c.memory_key == self.memory_key)
+
+    def _paginated(self, limit: Optional[int] = None, before: Optional[int] = None):
+        """
+        Build a keyset-paginated select.
+
+        Returns the ``limit`` most recent messages with id below ``before``;
+        callers reverse the rows into chronological order.
+        """
+        stmt = self._select()
+        if before is not None:
+            stmt = stmt.where(self.table.c.id < before)
+        stmt = stmt.order_by(self.table.c.id.desc())
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        return stmt
 
     def add_message(self, message: Dict[str, str]) -> None:
         """Add message to database."""
-        session = self.Session()
-        try:
-            db_message = Message(
-                role=message["role"],
-                content=message["content"],
-                metadata=message.get("metadata", {})
+        self.add_messages([message])
+
+    def add_messages(self, messages: List[Dict[str, str]]) -> None:
+        """Add several messages to the database in one executemany insert."""
+        if not messages:
+            return
+        with self.engine.begin() as conn:
+            conn.execute(
+                insert(self.table),
+                [_message_to_row(self.memory_key, message) for message in messages]
             )
-            session.add(db_message)
-            session.commit()
-        finally:
-            session.close()
-
-    def get_messages(self) -> List[Dict[str, str]]:
-        """Get all messages from database."""
-        session = self.Session()
-        try:
-            messages = session.query(Message).order_by(Message.timestamp).all()
-            return [
-                {
-                    "role": msg.role,
-                    "content": msg.content,
-                    "timestamp": msg.timestamp.isoformat(),
-                    "metadata": msg.metadata
-                }
-                for msg in messages
-            ]
-        finally:
-            session.close()
+
+    def get_messages(
+        self,
+        limit: Optional[int] = None,
+        before: Optional[int] = None
+    ) -> List[Dict[str, str]]:
+        """
+        Get messages from database in chronological order.
+
+        Pass ``limit`` to get the most recent messages and ``before`` (the
+        ``id`` of the oldest message already seen) to page further back.
+        """
+        with self.engine.connect() as conn:
+            rows = conn.execute(self._paginated(limit, before)).all()
+        return [_row_to_message(row) for row in reversed(rows)]
 
     def clear(self) -> None:
         """Clear all messages from database."""
-        session = self.Session()
-        try:
-            session.query(Message).delete()
-            session.commit()
-        finally:
-            session.close()
+        with self.engine.begin() as conn:
+            conn.execute(
+                delete(self.table).where(self.table.c.memory_key == self.memory_key)
+            )
 
     def save(self) -> None:
         """Save is handled automatically by SQLAlchemy."""
@@ -86,44 +137,120 @@ class SQLAlchemyMemory(BaseMemory):
 
     def get_messages_by_role(self, role: str) -> List[Dict[str, str]]:
         """Get messages by role."""
-        session = self.Session()
-        try:
-            messages = session.query(Message).filter_by(role=role).all()
-            return [
-                {
-                    "role": msg.role,
-                    "content": msg.content,
-                    "timestamp": msg.timestamp.isoformat(),
-                    "metadata": msg.metadata
-                }
-                for msg in messages
-            ]
-        finally:
-            session.close()
+        stmt = self._select().where(self.table.c.role == role).order_by(self.table.c.id)
+        with self.engine.connect() as conn:
+            return [_row_to_message(row) for row in conn.execute(stmt)]
 
     def get_messages_since(self, timestamp: datetime) -> List[Dict[str, str]]:
         """Get messages since a specific timestamp."""
-        session = self.Session()
-        try:
-            messages = session.query(Message).filter(
-                Message.timestamp > timestamp
-            ).all()
-            return [
-                {
-                    "role": msg.role,
-                    "content": msg.content,
-                    "timestamp": msg.timestamp.isoformat(),
-                    "metadata": msg.metadata
-                }
-                for msg in messages
-            ]
-        finally:
-            session.close()
+        stmt = self._select().where(
+            self.table.c.timestamp > timestamp
+        ).order_by(self.table.c.timestamp, self.table.c.id)
+        with self.engine.connect() as conn:
+            return [_row_to_message(row) for row in conn.execute(stmt)]
 
     def get_message_count(self) -> int:
         """Get the number of messages in memory."""
-        session = self.Session()
-        try:
-            return session.query(Message).count()
-        finally:
-            session.close() 
\ No newline at end of file
+        stmt = select(func.count()).select_from(self.table).where(
+            self.table.c.memory_key == self.memory_key
+        )
+        with self.engine.connect() as conn:
+            return conn.execute(stmt).scalar_one()
+
+    def close(self) -> None:
+        """Dispose of the engine's connection pool."""
+        self.engine.dispose()
+
+
+class AsyncSQLAlchemyMemory(SQLAlchemyMemory):
+    """Memory that uses an async SQLAlchemy engine for database storage."""
+
+    def __init__(
+        self,
+        database_url: str,
+        memory_key: str = "chat_history",
+        table_name: str = "messages",
+        engine_kwargs: Optional[Dict[str, Any]] = None
+    ):
+        # Imported lazily: the asyncio extension needs greenlet (sqlalchemy[asyncio])
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        BaseMemory.__init__(self, memory_key)
+        self.engine = create_async_engine(database_url, **(engine_kwargs or {}))
+        self.metadata = MetaData()
+        self.table = build_messages_table(self.metadata, table_name)
+        self._tables_created = False
+
+    async def _ensure_tables(self) -> None:
+        """Create the messages table on first use."""
+        if not self._tables_created:
+            async with self.engine.begin() as conn:
+                await conn.run_sync(self.metadata.create_all)
+            self._tables_created = True
+
+    async def add_message(self, message: Dict[str, str]) -> None:
+        """Add message to database."""
+        await self.add_messages([message])
+
+    async def add_messages(self, messages: List[Dict[str, str]]) -> None:
+        """Add several messages to the database in one executemany insert."""
+        if not messages:
+            return
+        await self._ensure_tables()
+        async with self.engine.begin() as conn:
+            await conn.execute(
+                insert(self.table),
+                [_message_to_row(self.memory_key, message) for message in messages]
+            )
+
+    async def get_messages(
+        self,
+        limit: Optional[int] = None,
+        before: Optional[int] = None
+    ) -> List[Dict[str, str]]:
+        """Get messages from database in chronological order, keyset-paginated."""
+        await self._ensure_tables()
+        async with self.engine.connect() as conn:
+            rows = (await conn.execute(self._paginated(limit, before))).all()
+        return [_row_to_message(row) for row in reversed(rows)]
+
+    async def clear(self) -> None:
+        """Clear all messages from database."""
+        await self._ensure_tables()
+        async with self.engine.begin() as conn:
+            await conn.execute(
+                delete(self.table).where(self.table.c.memory_key == self.memory_key)
+            )
+
+    async def save(self) -> None:
+        """Save is handled automatically by SQLAlchemy."""
+        pass
+
+    async def get_messages_by_role(self, role: str) -> List[Dict[str, str]]:
+        """Get messages by role."""
+        await self._ensure_tables()
+        stmt = self._select().where(self.table.c.role == role).order_by(self.table.c.id)
+        async with self.engine.connect() as conn:
+            return [_row_to_message(row) for row in await conn.execute(stmt)]
+
+    async def get_messages_since(self, timestamp: datetime) -> List[Dict[str, str]]:
+        """Get messages since a specific timestamp."""
+        await self._ensure_tables()
+        stmt = self._select().where(
+            self.table.c.timestamp > timestamp
+        ).order_by(self.table.c.timestamp, self.table.c.id)
+        async with self.engine.connect() as conn:
+            return [_row_to_message(row) for row in await conn.execute(stmt)]
+
+    async def get_message_count(self) -> int:
+        """Get the number of messages in memory."""
+        await self._ensure_tables()
+        stmt = select(func.count()).select_from(self.table).where(
+            self.table.c.memory_key == self.memory_key
+        )
+        async with self.engine.connect() as conn:
+            return (await conn.execute(stmt)).scalar_one()
+
+    async def close(self) -> None:
+        """Dispose of the engine's connection pool."""
+        await self.engine.dispose()
@@ -2,13 +2,147 @@
 Summary memory implementation for storing summarized conversations.
 """
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable, Awaitable, Tuple
 from datetime import datetime
+import hashlib
 import json
 from pathlib import Path
 from .base import BaseMemory
 from ..models.base import BaseLLM
 
+
+def _summary_node(content: str, message_count: int, children: List[Dict[str, Any]] = ()) -> Dict[str, Any]:
+    """Build a summary tree node with a hash over its content or children."""
+    digest = hashlib.sha1()
+    if children:
+        for child in children:
+            digest.update(child["hash"].encode("ascii"))
+    else:
+        digest.update(content.encode("utf-8"))
+    return {
+        "content": content,
+        "message_count": message_count,
+        "tokens": len(content.split()),
+        "hash": digest.hexdigest()
+    }
+
+
+class SummaryTree:
+    """
+    Append-only balanced tree of summaries.
+
+    Leaves sit at level 0 and every ``fanout`` consecutive complete nodes of a
+    level are merged into one parent, so an append summarizes at most one new
+    node per level (O(log n)) and finished nodes are never re-summarized.
+    Prefix summaries combine the O(fanout * log n) maximal nodes covering the
+    prefix and are cached by the hashes of those nodes.
+    """
+
+    def __init__(self, fanout: int = 4):
+        if fanout < 2:
+            raise ValueError("fanout must be at least 2")
+        self.fanout = fanout
+        self.levels: List[List[Dict[str, Any]]] = []  # complete nodes per level
+        self.offsets: List[int] = []  # position of levels[l][0] within its level
+        self._combined: Dict[Tuple[str, ...], str] = {}
+        self.merge_calls = 0
+
+    @property
+    def num_leaves(self) -> int:
+        return self.offsets[0] + len(self.levels[0]) if self.levels else 0
+
+    @property
+    def depth(self) -> int:
+        return len(self.levels)
+
+    def _level_size(self, level: int) -> int:
+        return self.offsets[level] + len(self.levels[level])
+
+    def _push(self, level: int, node: Dict[str, Any]) -> None:
+        if level == len(self.levels):
+            self.levels.append([])
+            self.offsets.append(0)
+        self.levels[level].append(node)
+
+    async def append(
+        self,
+        content: str,
+        message_count: int,
+        merge: Callable[[List[str]], Awaitable[str]]
+    ) -> int:
+        """Append a leaf summary, merging completed groups upwards. Returns merges made."""
+        self._push(0, _summary_node(content, message_count))
+        merges = 0
+        level = 0
+        while self._level_size(level) % self.fanout == 0:
+            children = self.levels[level][-self.fanout:]
+            merged = await merge([child["content"] for child in children])
+            self._push(level + 1, _summary_node(
+                merged,
+                sum(child["message_count"] for child in children),
+                children
+            ))
+            merges += 1
+            level += 1
+        self.merge_calls += merges
+        return merges
+
+    def cover(self, leaf_count: int) -> List[Dict[str, Any]]:
+        """Get the maximal complete nodes covering the first ``leaf_count`` leaves, oldest first."""
+        nodes = []
+        position = 0
+        for level in reversed(range(len(self.levels))):
+            span = self.fanout ** level
+            while position + span <= leaf_count:
+                index = position // span - self.offsets[level]
+                if not 0 <= index < len(self.levels[level]):
+                    break
+                nodes.append(self.levels[level][index])
+                position += span
+        return nodes
+
+    async def summarize_prefix(
+        self,
+        leaf_count: int,
+        combine: Callable[[List[str]], Awaitable[str]]
+    ) -> str:
+        """Get a summary of the first ``leaf_count`` leaves."""
+        nodes = self.cover(leaf_count)
+        if not nodes:
+            return ""
+        if len(nodes) == 1:
+            return nodes[0]["content"]
+        key = tuple(node["hash"] for node in nodes)
+        if key not in self._combined:
+            # Only the latest combination is worth keeping
+            self._combined = {key: await combine([node["content"] for node in nodes])}
+            self.merge_calls += 1
+        return self._combined[key]
+
+    async def summarize(self, combine: Callable[[List[str]], Awaitable[str]]) -> str:
+        """Get a summary of all leaves."""
+        return await self.summarize_prefix(self.num_leaves, combine)
+
+    def prune(self, leaf_count: int) -> None:
+        """Drop nodes no longer needed to cover prefixes of at least ``leaf_count`` leaves."""
+        for level in range(len(self.levels)):
+            boundary = (leaf_count // self.fanout ** (level + 1)) * self.fanout
+            drop = boundary - self.offsets[level]
+            if drop > 0:
+                del self.levels[level][:drop]
+                self.offsets[level] = boundary
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"fanout": self.fanout, "levels": self.levels, "offsets": self.offsets}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SummaryTree":
+        tree = cls(data.get("fanout", 4))
+        tree.levels = data.get("levels", [])
+        tree.offsets = data.get("offsets", [0] * len(tree.levels))
+        return tree
+
+
 class SummaryMemory(BaseMemory):
     """
     Memory that stores summarized versions of conversations.
@@ -36,7 +170,9 @@ class SummaryMemory(BaseMemory):
         compression_threshold: float = 0.8,
         enable_backup: bool = True,
         backup_interval: int = 3600,  # 1 hour
-        max_backups: int = 5
+        max_backups: int = 5,
+        enable_summary_tree: bool = True,
+        tree_fanout: int = 4
     ):
         """Initialize summary memory."""
         super().__init__(memory_key)
@@ -53,6 +189,7 @@ class SummaryMemory(BaseMemory):
         self.enable_backup = enable_backup
         self.backup_interval = backup_interval
         self.max_backups = max_backups
+        self.enable_summary_tree = enable_summary_tree
 
         # Initialize storage
         self.summaries: List[Dict[str, Any]] = []
@@ -61,6 +198,11 @@ class SummaryMemory(BaseMemory):
         self.last_summary: Optional[datetime] = None
         self.last_backup = datetime.now()
         self.backup_history: List[Dict[str, Any]] = []
+        
+        # Summary tree over every leaf summary; the first tree_folded leaves
+        # are represented in self.summaries by one history entry
+        self.summary_tree = SummaryTree(tree_fanout)
+        self.tree_folded: int = 0
 
         # Load if storage path exists
         if self.storage_path and self.storage_path.exists():
@@ -119,9 +261,13 @@ class SummaryMemory(BaseMemory):
         self.summaries.append(summary_entry)
         if self.enable_metadata:
             self.summary_metadata[str(len(self.summaries) - 1)] = metadata or {}
+        if self.enable_summary_tree:
+            await self.summary_tree.append(summary, len(messages), self._merge_contents)
 
-        # Trim if needed
-        if len(self.summaries) > self.max_summaries:
+        # Trim if needed (the tree folds old summaries instead of dropping them)
+        if self.enable_summary_tree and len(self.summaries) > self.max_summaries:
+            await self._fold_into_tree()
+        elif len(self.summaries) > self.max_summaries:
             self.summaries = self.summaries[-self.max_summaries:]
             if self.enable_metadata:
                 new_metadata = {}
@@ -184,15 +330,54 @@ Summary:"""
         self.compression_llm = llm
         self.compression_custom_fn = custom_fn
 
-    async def _compress_summaries(self) -> None:
-        """Compress summaries to reduce storage (adaptive/LLM-based/user-configurable)."""
-        if not self.enable_compression or not self.summaries:
+    async def _merge_contents(self, contents: List[str]) -> str:
+        """Merge summary texts with the configured compression strategy."""
+        combined_content, _ = await self._combine_summaries([{"content": c} for c in contents])
+        return combined_content
+
+    async def _fold_into_tree(self) -> None:
+        """
+        Fold the oldest half of the leaf summaries into a single history entry.
+
+        The entry's content comes from the summary tree's cached nodes, so this
+        costs at most one LLM call regardless of history length.
+        """
+        has_history = bool(self.summaries) and self.summaries[0].get("method") == "summary_tree"
+        leaves = len(self.summaries) - int(has_history)
+        if self.summary_tree.num_leaves != self.tree_folded + leaves:
+            # Summaries predate the tree (e.g. loaded from an older save)
+            self.enable_summary_tree = False
+            await self._compress_summaries()
             return
-        n = len(self.summaries)
-        if n < 2:
+        half = leaves // 2
+        if half < 1:
             return
-        half = n // 2
-        to_compress = self.summaries[:half]
+        self.tree_folded += half
+        content = await self.summary_tree.summarize_prefix(self.tree_folded, self._merge_contents)
+        self.summary_tree.prune(self.tree_folded)
+        history_entry = {
+            "content": f"Combined summary: {content}",
+            "timestamp": datetime.now().isoformat(),
+            "message_count": sum(
+                node["message_count"] for node in self.summary_tree.cover(self.tree_folded)
+            ),
+            "method": "summary_tree",
+            "leaf_count": self.tree_folded
+        }
+        first_kept = int(has_history) + half
+        self.summaries = [history_entry] + self.summaries[first_kept:]
+        if self.enable_metadata:
+            new_metadata = {"0": {}}
+            for i in range(1, len(self.summaries)):
+                new_metadata[str(i)] = self.summary_metadata.get(str(i + first_kept - 1), {})
+            self.summary_metadata = new_metadata
+
+    async def get_tree_summary(self) -> str:
+        """Get a summary of the whole conversation from the summary tree."""
+        return await self.summary_tree.summarize(self._merge_contents)
+
+    async def _combine_summaries(self, to_compress: List[Dict[str, Any]]) -> Tuple[str, str]:
+        """Combine summary entries with the configured strategy; returns (content, method)."""
         combined_content = None
         method_used = self.compression_strategy if hasattr(self, 'compression_strategy') else 'concat'
         if hasattr(self, 'compression_strategy'):
@@ -240,6 +425,21 @@ Summary:"""
         else:
             combined_content = " ".join([s["content"] for s in to_compress])[:512] + "..."
             method_used = 'concat_default'
+        return combined_content, method_used
+
+    async def _compress_summaries(self) -> None:
+        """Compress summaries to reduce storage (adaptive/LLM-based/user-configurable)."""
+        if not self.enable_compression or not self.summaries:
+            return
+        if self.enable_summary_tree:
+            await self._fold_into_tree()
+            return
+        n = len(self.summaries)
+        if n < 2:
+            return
+        half = n // 2
+        to_compress = self.summaries[:half]
+        combined_content, method_used = await self._combine_summaries(to_compress)
         summary_entry = {
             "content": f"Combined summary: {combined_content}",
             "timestamp": datetime.now().isoformat(),
@@ -299,6 +499,8 @@ Summary:"""
         self.summary_metadata = {}
         self.message_count = 0
         self.last_summary = None
+        self.summary_tree = SummaryTree(self.summary_tree.fanout)
+        self.tree_folded = 0
         if self.storage_path and self.storage_path.exists():
             self.storage_path.unlink()
 
@@ -313,7 +515,9 @@ Summary:"""
             "message_count": self.message_count,
             "last_summary": self.last_summary.isoformat() if self.last_summary else None,
             "last_backup": self.last_backup.isoformat(),
-            "backup_history": self.backup_history
+            "backup_history": self.backup_history,
+            "summary_tree": self.summary_tree.to_dict(),
+            "tree_folded": self.tree_folded
         }
 
         self.storage_path.parent.mkdir(parents=True, exist_ok=True)
@@ -335,6 +539,9 @@ Summary:"""
             self.last_summary = datetime.fromisoformat(data["last_summary"]) if data["last_summary"] else None
             self.last_backup = datetime.fromisoformat(data["last_backup"])
             self.backup_history = data["backup_history"]
+            if "summary_tree" in data:
+                self.summary_tree = SummaryTree.from_dict(data["summary_tree"])
+                self.tree_folded = data.get("tree_folded", 0)
         except Exception as e:
             print(f"Error loading summaries: {e}")
             self.clear()
@@ -352,5 +559,9 @@ Summary:"""
             "enable_compression": self.enable_compression,
             "enable_backup": self.enable_backup,
             "last_backup": self.last_backup.isoformat(),
-            "backup_count": len(self.backup_history)
+            "backup_count": len(self.backup_history),
+            "enable_summary_tree": self.enable_summary_tree,
+            "tree_depth": self.summary_tree.depth,
+            "tree_leaves": self.summary_tree.num_leaves,
+            "tree_merge_calls": self.summary_tree.merge_calls
         } 
\ No newline at end of file
@@ -2,14 +2,217 @@
 Temporal memory implementation that manages time-based information and temporal relationships.
 """
 
-from typing import List, Dict, Any, Optional, Set, Tuple
+from typing import List, Dict, Any, Optional, Set, Tuple, Union
 from datetime import datetime, timedelta
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
 import json
 from pathlib import Path
 import numpy as np
 from ..models.base import BaseLLM
 from .base import BaseMemory
 
+TimeValue = Union[datetime, str, float, int]
+
+
+@lru_cache(maxsize=65536)
+def _parse_epoch(value: str) -> Optional[float]:
+    """Parse an ISO timestamp into epoch seconds, or None if it is not parseable."""
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def to_epoch(value: Optional[TimeValue]) -> Optional[float]:
+    """Convert a datetime, ISO string or epoch number into epoch seconds."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        return _parse_epoch(value)
+    return None
+
+
+class TemporalIntervalIndex:
+    """
+    Index of event intervals kept as sorted start and end arrays.
+
+    Lookups use bisection on the arrays, so time-window, before/after and
+    overlap queries cost O(log n) plus the size of the scanned range. Overlap
+    queries widen the start range by the longest indexed duration.
+    """
+
+    def __init__(self):
+        self.intervals: Dict[str, Tuple[float, float]] = {}
+        self.start_keys: List[float] = []
+        self.start_ids: List[str] = []
+        self.end_keys: List[float] = []
+        self.end_ids: List[str] = []
+        self.max_duration = 0.0
+
+    @staticmethod
+    def _insert_sorted(keys: List[float], ids: List[str], key: float, item_id: str) -> None:
+        idx = bisect_right(keys, key)
+        keys.insert(idx, key)
+        ids.insert(idx, item_id)
+
+    @staticmethod
+    def _remove_sorted(keys: List[float], ids: List[str], key: float, item_id: str) -> None:
+        idx = bisect_left(keys, key)
+        while idx < len(keys) and keys[idx] == key:
+            if ids[idx] == item_id:
+                del keys[idx]
+                del ids[idx]
+                return
+            idx += 1
+
+    def insert(self, item_id: str, start: float, end: Optional[float] = None) -> None:
+        """Insert or update an interval; point events use ``end=None``."""
+        self.remove(item_id)
+        if end is None or end < start:
+            end = start
+        self.intervals[item_id] = (start, end)
+        self._insert_sorted(self.start_keys, self.start_ids, start, item_id)
+        self._insert_sorted(self.end_keys, self.end_ids, end, item_id)
+        self.max_duration = max(self.max_duration, end - start)
+
+    def remove(self, item_id: str) -> None:
+        """Remove an interval if present."""
+        interval = self.intervals.pop(item_id, None)
+        if interval is None:
+            return
+        start, end = interval
+        self._remove_sorted(self.start_keys, self.start_ids, start, item_id)
+        self._remove_sorted(self.end_keys, self.end_ids, end, item_id)
+        if not self.intervals:
+            self.max_duration = 0.0
+
+    def clear(self) -> None:
+        """Remove all intervals."""
+        self.__init__()
+
+    def starting_between(self, t0: float, t1: float) -> List[str]:
+        """Get ids of intervals starting in ``[t0, t1]``, ordered by start."""
+        lo = bisect_left(self.start_keys, t0)
+        hi = bisect_right(self.start_keys, t1)
+        return self.start_ids[lo:hi]
+
+    def overlapping(self, t0: float, t1: float) -> List[str]:
+        """Get ids of intervals intersecting ``[t0, t1]``, ordered by start."""
+        return [
+            item_id
+            for item_id in self.starting_between(t0 - self.max_duration, t1)
+            if self.intervals[item_id][1] >= t0
+        ]
+
+    def within(self, t0: float, t1: float) -> List[str]:
+        """Get ids of intervals fully contained in ``[t0, t1]``, ordered by start."""
+        return [
+            item_id
+            for item_id in self.starting_between(t0, t1)
+            if self.intervals[item_id][1] <= t1
+        ]
+
+    def ending_before(self, t: float) -> List[str]:
+        """Get ids of intervals that end strictly before ``t``, ordered by end."""
+        return self.end_ids[:bisect_left(self.end_keys, t)]
+
+    def starting_after(self, t: float) -> List[str]:
+        """Get ids of intervals that start strictly after ``t``, ordered by start."""
+        return self.start_ids[bisect_right(self.start_keys, t):]
+
+    def __len__(self) -> int:
+        return len(self.intervals)
+
+
+class TemporalAttributeIndex:
+    """
+    Buckets of event ids by temporal type and duration.
+
+    Relationship similarity rewards events that share a type or duration, so
+    these buckets bound the candidates for the groups that no time window can
+    restrict. Buckets are insertion-ordered dicts to keep lookups deterministic.
+    """
+
+    def __init__(self):
+        self.keys: Dict[str, Tuple[Any, Any]] = {}
+        self.by_type: Dict[Any, Dict[str, None]] = {}
+        self.by_duration: Dict[Any, Dict[str, None]] = {}
+        self.by_type_duration: Dict[Tuple[Any, Any], Dict[str, None]] = {}
+
+    @staticmethod
+    def make_keys(metadata: Dict[str, Any]) -> Tuple[Any, Any]:
+        """Get hashable (type, duration) keys; a missing duration never matches."""
+        def hashable(value):
+            try:
+                hash(value)
+                return value
+            except TypeError:
+                return json.dumps(value, sort_keys=True, default=str)
+
+        duration = metadata.get("duration")
+        return hashable(metadata.get("temporal_type")), hashable(duration) if duration else None
+
+    def _buckets(self, keys: Tuple[Any, Any]) -> List[Tuple[Dict[Any, Dict[str, None]], Any]]:
+        type_key, duration_key = keys
+        buckets = [(self.by_type, type_key)]
+        if duration_key is not None:
+            buckets.append((self.by_duration, duration_key))
+            buckets.append((self.by_type_duration, keys))
+        return buckets
+
+    def insert(self, event_id: str, metadata: Dict[str, Any]) -> None:
+        """Insert or re-bucket an event."""
+        self.remove(event_id)
+        keys = self.make_keys(metadata)
+        self.keys[event_id] = keys
+        for buckets, key in self._buckets(keys):
+            buckets.setdefault(key, {})[event_id] = None
+
+    def remove(self, event_id: str) -> None:
+        """Remove an event if present."""
+        keys = self.keys.pop(event_id, None)
+        if keys is None:
+            return
+        for buckets, key in self._buckets(keys):
+            bucket = buckets.get(key)
+            if bucket is not None:
+                bucket.pop(event_id, None)
+                if not bucket:
+                    del buckets[key]
+
+    def clear(self) -> None:
+        """Remove all events."""
+        self.__init__()
+
+    def matches(self, event_id: str, keys: Tuple[Any, Any]) -> int:
+        """Count how many of type and duration an indexed event shares with ``keys``."""
+        other_type, other_duration = self.keys[event_id]
+        type_key, duration_key = keys
+        return (other_type == type_key) + (duration_key is not None and other_duration == duration_key)
+
+    def sharing(self, keys: Tuple[Any, Any], matches: int) -> List[str]:
+        """Get ids of events sharing at least ``matches`` of type and duration with ``keys``."""
+        type_key, duration_key = keys
+        if matches <= 0:
+            return list(self.keys)
+        if matches == 1:
+            ids = dict(self.by_type.get(type_key, {}))
+            if duration_key is not None:
+                ids.update(self.by_duration.get(duration_key, {}))
+            return list(ids)
+        if duration_key is None:
+            return []
+        return list(self.by_type_duration.get(keys, {}))
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+
 class TemporalMemory(BaseMemory):
     """Memory that manages time-based information and temporal relationships."""
 
@@ -71,6 +274,7 @@ class TemporalMemory(BaseMemory):
         
         # Initialize temporal memory storage
         self.events: List[Dict[str, Any]] = []
+        self.events_by_id: Dict[str, Dict[str, Any]] = {}
         self.event_embeddings: List[List[float]] = []
         self.relationships: Dict[str, Dict[str, List[str]]] = {}  # event_id -> {relationship_type -> target_ids}
         self.patterns: Dict[str, List[str]] = {}  # pattern_id -> event_ids
@@ -83,12 +287,19 @@ class TemporalMemory(BaseMemory):
         self.last_pattern_update = datetime.now()
         self.last_evolution = datetime.now()
         self.last_validation = datetime.now()
+        
+        # Interval index over parsed event times, plus type/duration buckets
+        self.interval_index = TemporalIntervalIndex()
+        self.attribute_index = TemporalAttributeIndex()
         self.load()
 
     async def add_message(self, message: Dict[str, str]) -> None:
         """Add message and analyze temporal information."""
-        # Create new event
-        event_id = f"event_{len(self.events)}"
+        # Create new event; skip ids still held after evictions
+        index = len(self.events)
+        while f"event_{index}" in self.events_by_id:
+            index += 1
+        event_id = f"event_{index}"
         new_event = {
             "id": event_id,
             "content": message["content"],
@@ -111,6 +322,8 @@ class TemporalMemory(BaseMemory):
         
         # Add to storage
         self.events.append(new_event)
+        self.events_by_id[event_id] = new_event
+        self._index_event(new_event)
         
         # Get event embedding
         embedding = await self.llm.embeddings(message["content"])
@@ -170,7 +383,7 @@ class TemporalMemory(BaseMemory):
 
     async def _analyze_temporal_info(self, event_id: str) -> None:
         """Analyze temporal information from a message."""
-        event = next(e for e in self.events if e["id"] == event_id)
+        event = self.events_by_id[event_id]
         
         try:
             # Generate analysis prompt
@@ -198,17 +411,122 @@ class TemporalMemory(BaseMemory):
             event["metadata"]["importance"] = analysis.get("importance", 0.0)
             event["metadata"]["recurrence"] = analysis.get("recurrence")
             event["metadata"]["analysis_results"] = analysis
+            self._index_event(event)
             
         except Exception as e:
             print(f"Error analyzing temporal info: {e}")
 
+    def _index_event(self, event: Dict[str, Any]) -> None:
+        """Insert, update or drop an event in the interval and attribute indexes."""
+        self.attribute_index.insert(event["id"], event["metadata"])
+        start = to_epoch(event["metadata"].get("start_time"))
+        if start is None:
+            self.interval_index.remove(event["id"])
+        else:
+            self.interval_index.insert(
+                event["id"],
+                start,
+                to_epoch(event["metadata"].get("end_time"))
+            )
+
+    def _rebuild_interval_index(self) -> None:
+        """Rebuild the interval and attribute indexes from the stored events."""
+        self.interval_index.clear()
+        self.attribute_index.clear()
+        for event in self.events:
+            self._index_event(event)
+
+    def _get_relationship_window(self, matches: int = 0) -> Optional[float]:
+        """
+        Get the start-time distance (seconds) beyond which a pair cannot reach the threshold.
+
+        ``matches`` is how many of duration and type the pair shares, each
+        worth a similarity of 1; importance similarity is at most 1, so the
+        pair needs a time similarity of at least
+        ``4 * temporal_threshold - 1 - matches``. Returns None when that bound
+        does not restrict the search.
+        """
+        min_time_similarity = 4 * self.temporal_threshold - 1 - matches
+        if min_time_similarity <= 0:
+            return None
+        if min_time_similarity >= 1:
+            return 0.0
+        return 86400 * (1.0 / min_time_similarity - 1.0)
+
+    def _get_relationship_candidates(self, event: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Get events that could reach the similarity threshold with an event.
+
+        Events are grouped by how many of duration and type they share with
+        the event. A group is skipped when even perfect time and importance
+        similarity fall short, searched within a start-time window when the
+        threshold bounds time similarity, and otherwise taken from the
+        attribute buckets. With the default threshold this means events with
+        the same type and duration, plus events sharing one of them and
+        starting within six hours.
+        """
+        keys = TemporalAttributeIndex.make_keys(event["metadata"])
+        start = to_epoch(event["metadata"].get("start_time"))
+        candidate_ids: Dict[str, None] = {}
+        for matches in (2, 1, 0):
+            if matches + 2 < 4 * self.temporal_threshold:
+                continue
+            window = self._get_relationship_window(matches)
+            if window is None:
+                candidate_ids.update(dict.fromkeys(self.attribute_index.sharing(keys, matches)))
+            elif start is not None:
+                # Without a start time, time similarity is 0 and no window applies
+                candidate_ids.update(
+                    (other_id, None)
+                    for other_id in self.interval_index.starting_between(start - window, start + window)
+                    if self.attribute_index.matches(other_id, keys) >= matches
+                )
+        candidate_ids.pop(event["id"], None)
+        return [self.events_by_id[other_id] for other_id in candidate_ids if other_id in self.events_by_id]
+
+    @staticmethod
+    def _query_epoch(value: TimeValue) -> float:
+        """Convert a query bound into epoch seconds."""
+        epoch = to_epoch(value)
+        if epoch is None:
+            raise ValueError(f"Invalid time value: {value!r}")
+        return epoch
+
+    def _resolve_events(self, event_ids: List[str]) -> List[Dict[str, Any]]:
+        """Map indexed event ids back to stored events, preserving order."""
+        return [self.events_by_id[event_id] for event_id in event_ids if event_id in self.events_by_id]
+
+    def events_between(self, t0: TimeValue, t1: TimeValue) -> List[Dict[str, Any]]:
+        """Get events whose time span intersects ``[t0, t1]``, ordered by start time."""
+        return self._resolve_events(self.interval_index.overlapping(self._query_epoch(t0), self._query_epoch(t1)))
+
+    def events_within(self, t0: TimeValue, t1: TimeValue) -> List[Dict[str, Any]]:
+        """Get events that start and end inside ``[t0, t1]``, ordered by start time."""
+        return self._resolve_events(self.interval_index.within(self._query_epoch(t0), self._query_epoch(t1)))
+
+    def events_before(self, t: TimeValue) -> List[Dict[str, Any]]:
+        """Get events that end before ``t``, ordered by end time."""
+        return self._resolve_events(self.interval_index.ending_before(self._query_epoch(t)))
+
+    def events_after(self, t: TimeValue) -> List[Dict[str, Any]]:
+        """Get events that start after ``t``, ordered by start time."""
+        return self._resolve_events(self.interval_index.starting_after(self._query_epoch(t)))
+
+    def events_during(self, event_id: str) -> List[Dict[str, Any]]:
+        """Get events contained within the time span of another event."""
+        interval = self.interval_index.intervals.get(event_id)
+        if interval is None:
+            return []
+        return [
+            e for e in self._resolve_events(self.interval_index.within(*interval))
+            if e["id"] != event_id
+        ]
+
     async def _find_relationships(self, event_id: str) -> None:
         """Find temporal relationships between events."""
-        event = next(e for e in self.events if e["id"] == event_id)
+        event = self.events_by_id[event_id]
         
-        for other_event in self.events:
-            if other_event["id"] == event_id:
-                continue
+        for other_event in self._get_relationship_candidates(event):
             
             # Calculate temporal similarity
             similarity = self._calculate_temporal_similarity(
@@ -237,10 +555,10 @@ class TemporalMemory(BaseMemory):
         """Calculate similarity between two temporal events."""
         # Calculate time similarity if available
         time_similarity = 0.0
-        if metadata1["start_time"] and metadata2["start_time"]:
-            time1 = datetime.fromisoformat(metadata1["start_time"])
-            time2 = datetime.fromisoformat(metadata2["start_time"])
-            time_diff = abs((time1 - time2).total_seconds())
+        time1 = to_epoch(metadata1["start_time"])
+        time2 = to_epoch(metadata2["start_time"])
+        if time1 is not None and time2 is not None:
+            time_diff = abs(time1 - time2)
             time_similarity = 1.0 / (1.0 + time_diff / 86400)  # Normalize by day
         
         # Calculate duration similarity if available
@@ -338,7 +656,7 @@ class TemporalMemory(BaseMemory):
 
     async def _update_learning_progress(self, event_id: str) -> None:
         """Update learning progress for an event."""
-        event = next(e for e in self.events if e["id"] == event_id)
+        event = self.events_by_id[event_id]
         
         # Calculate learning metrics
         relationship_count = sum(
@@ -371,7 +689,7 @@ class TemporalMemory(BaseMemory):
 
     async def _update_evolution(self, event_id: str) -> None:
         """Update evolution stage for an event."""
-        event = next(e for e in self.events if e["id"] == event_id)
+        event = self.events_by_id[event_id]
         
         # Calculate evolution metrics
         learning_progress = event["metadata"]["learning_progress"]
@@ -405,7 +723,7 @@ class TemporalMemory(BaseMemory):
 
     async def _validate_event(self, event_id: str) -> None:
         """Validate temporal information of an event."""
-        event = next(e for e in self.events if e["id"] == event_id)
+        event = self.events_by_id[event_id]
         
         try:
             # Generate validation prompt
@@ -467,6 +785,9 @@ class TemporalMemory(BaseMemory):
         event_idx = next(i for i, e in enumerate(self.events) if e["id"] == event_id)
         self.events.pop(event_idx)
         self.event_embeddings.pop(event_idx)
+        self.events_by_id.pop(event_id, None)
+        self.interval_index.remove(event_id)
+        self.attribute_index.remove(event_id)
         
         # Remove from relationships
         if event_id in self.relationships:
@@ -512,6 +833,7 @@ class TemporalMemory(BaseMemory):
     async def clear(self) -> None:
         """Clear all events."""
         self.events = []
+        self.events_by_id = {}
         self.event_embeddings = []
         self.relationships = {}
         self.patterns = {}
@@ -519,6 +841,8 @@ class TemporalMemory(BaseMemory):
         self.event_history = []
         self.evolution_history = {}
         self.validation_history = {}
+        self.interval_index.clear()
+        self.attribute_index.clear()
         await self.save()
 
     async def save(self) -> None:
@@ -547,6 +871,7 @@ class TemporalMemory(BaseMemory):
             with open(self.storage_path, 'r') as f:
                 data = json.load(f)
                 self.events = data.get("events", [])
+                self.events_by_id = {e["id"]: e for e in self.events}
                 self.relationships = data.get("relationships", {})
                 self.patterns = data.get("patterns", {})
                 self.learning_history = data.get("learning_history", {})
@@ -569,6 +894,8 @@ class TemporalMemory(BaseMemory):
                     data.get("last_validation", datetime.now().isoformat())
                 )
                 
+                self._rebuild_interval_index()
+                
                 # Recreate embeddings
                 self.event_embeddings = []
                 for event in self.events:
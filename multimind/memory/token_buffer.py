@@ -3,8 +3,12 @@ Token-aware memory buffer that can be used with any LLM application, including R
 This implementation is similar to LangChain's token buffer but with additional features.
 """
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterable, Set
 from datetime import datetime
+from collections import Counter, deque
+import asyncio
+import heapq
+import itertools
 import tiktoken
 from .base import BaseMemory
 
@@ -29,10 +33,16 @@ class TokenBufferMemory(BaseMemory):
         # Initialize tokenizer
         self.tokenizer = tiktoken.encoding_for_model(token_model)
         
-        # Memory storage
-        self.messages: List[Dict[str, Any]] = []
+        # Memory storage, oldest first
+        self.messages: deque = deque()
         self.total_tokens = 0
         self.relevance_scores: Dict[str, float] = {}
+        
+        # Inverted index: token id -> entry ids of messages containing it
+        self._token_index: Dict[int, Set[int]] = {}
+        self._entries: Dict[int, Dict[str, Any]] = {}
+        self._entry_ids = itertools.count()
+        self._lock = asyncio.Lock()
 
     async def add_message(
         self,
@@ -40,24 +50,29 @@ class TokenBufferMemory(BaseMemory):
         metadata: Optional[Dict[str, Any]] = None
     ) -> None:
         """Add a message to memory, pruning if necessary."""
-        # Calculate tokens
+        # Calculate tokens and the token set used for relevance, once per message
         content = message.get("content", "")
         tokens = len(self.tokenizer.encode(content))
+        token_set = frozenset(self.tokenizer.encode(content.lower()))
         
-        # Add message
-        self.messages.append({
-            "message": message,
-            "metadata": metadata or {},
-            "tokens": tokens,
-            "timestamp": datetime.now()
-        })
-        
-        # Update total tokens
-        self.total_tokens += tokens
-        
-        # Prune if needed
-        if self.total_tokens > self.max_tokens:
-            await self._prune_memory()
+        async with self._lock:
+            entry = {
+                "entry_id": next(self._entry_ids),
+                "message": message,
+                "metadata": metadata or {},
+                "tokens": tokens,
+                "token_set": token_set,
+                "timestamp": datetime.now()
+            }
+            self.messages.append(entry)
+            self._index_entry(entry)
+            
+            # Update total tokens
+            self.total_tokens += tokens
+            
+            # Prune if needed
+            if self.total_tokens > self.max_tokens:
+                await self._prune_memory()
 
     async def get_messages(
         self,
@@ -67,28 +82,63 @@ class TokenBufferMemory(BaseMemory):
         """Get messages, optionally filtered by query and token limit."""
         if not query:
             # Return all messages if no query
-            messages = [m["message"] for m in self.messages]
             if max_tokens:
-                return self._limit_tokens(messages, max_tokens)
-            return messages
+                return self._limit_tokens(self.messages, max_tokens)
+            return [m["message"] for m in self.messages]
             
         # Filter by relevance if query provided
         relevant_messages = []
         current_tokens = 0
         max_tokens = max_tokens or self.max_tokens
         
-        for msg in self.messages:
+        for msg in self._find_relevant(query):
             if current_tokens >= max_tokens:
                 break
-                
-            # Calculate relevance (simplified)
-            relevance = self._calculate_relevance(query, msg["message"]["content"])
-            if relevance >= self.relevance_threshold:
-                relevant_messages.append(msg["message"])
-                current_tokens += msg["tokens"]
+            relevant_messages.append(msg["message"])
+            current_tokens += msg["tokens"]
         
         return relevant_messages
 
+    def _index_entry(self, entry: Dict[str, Any]) -> None:
+        """Add an entry to the inverted token index."""
+        self._entries[entry["entry_id"]] = entry
+        for token in entry["token_set"]:
+            self._token_index.setdefault(token, set()).add(entry["entry_id"])
+
+    def _unindex_entry(self, entry: Dict[str, Any]) -> None:
+        """Remove an entry from the inverted token index."""
+        self._entries.pop(entry["entry_id"], None)
+        for token in entry["token_set"]:
+            postings = self._token_index.get(token)
+            if postings is not None:
+                postings.discard(entry["entry_id"])
+                if not postings:
+                    del self._token_index[token]
+
+    def _find_relevant(self, query: str) -> List[Dict[str, Any]]:
+        """Get entries whose relevance to the query meets the threshold, oldest first."""
+        query_set = frozenset(self.tokenizer.encode(query.lower()))
+        
+        if self.relevance_threshold <= 0:
+            # Every message qualifies, including ones sharing no tokens
+            return list(self.messages)
+        if not query_set:
+            return []
+        
+        # Only messages sharing a token with the query can score above zero
+        overlaps = Counter()
+        for token in query_set:
+            overlaps.update(self._token_index.get(token, ()))
+        
+        relevant = []
+        for entry_id in sorted(overlaps):
+            entry = self._entries[entry_id]
+            intersection = overlaps[entry_id]
+            union = len(query_set) + len(entry["token_set"]) - intersection
+            if intersection / union >= self.relevance_threshold:
+                relevant.append(entry)
+        return relevant
+
     async def _prune_memory(self) -> None:
         """Prune memory based on strategy."""
         if self.prune_strategy == "oldest":
@@ -101,71 +151,71 @@ class TokenBufferMemory(BaseMemory):
     async def _prune_oldest(self) -> None:
         """Prune oldest messages first."""
         while self.total_tokens > self.max_tokens and self.messages:
-            oldest = self.messages.pop(0)
+            oldest = self.messages.popleft()
+            self._unindex_entry(oldest)
             self.total_tokens -= oldest["tokens"]
 
+    def _prune_by_score(self, scores: Iterable[tuple]) -> None:
+        """Drop the lowest-scored entries until within the token budget, keeping order."""
+        heap = list(scores)
+        heapq.heapify(heap)
+        
+        removed = set()
+        while self.total_tokens > self.max_tokens and heap:
+            _, entry_id = heapq.heappop(heap)
+            entry = self._entries[entry_id]
+            self._unindex_entry(entry)
+            self.total_tokens -= entry["tokens"]
+            removed.add(entry_id)
+        
+        if removed:
+            self.messages = deque(m for m in self.messages if m["entry_id"] not in removed)
+
     async def _prune_least_relevant(self) -> None:
         """Prune least relevant messages first."""
-        # Sort by relevance
-        self.messages.sort(key=lambda x: self.relevance_scores.get(x["message"]["id"], 0))
-        
-        while self.total_tokens > self.max_tokens and self.messages:
-            least_relevant = self.messages.pop(0)
-            self.total_tokens -= least_relevant["tokens"]
+        self._prune_by_score(
+            (self.relevance_scores.get(m["message"].get("id"), 0), m["entry_id"])
+            for m in self.messages
+        )
 
     async def _prune_hybrid(self) -> None:
         """Hybrid pruning based on both age and relevance."""
         # Calculate combined scores
+        now = datetime.now()
+        scores = []
         for msg in self.messages:
-            age = (datetime.now() - msg["timestamp"]).total_seconds()
-            relevance = self.relevance_scores.get(msg["message"]["id"], 0.5)
+            age = (now - msg["timestamp"]).total_seconds()
+            relevance = self.relevance_scores.get(msg["message"].get("id"), 0.5)
             msg["score"] = (0.7 * relevance) - (0.3 * (age / 3600))  # age in hours
-            
-        # Sort by combined score
-        self.messages.sort(key=lambda x: x["score"])
+            scores.append((msg["score"], msg["entry_id"]))
         
-        while self.total_tokens > self.max_tokens and self.messages:
-            lowest_score = self.messages.pop(0)
-            self.total_tokens -= lowest_score["tokens"]
-
-    def _calculate_relevance(self, query: str, content: str) -> float:
-        """Calculate relevance score between query and content."""
-        # This is a simplified implementation
-        # In practice, you would use embeddings or other similarity metrics
-        query_tokens = set(self.tokenizer.encode(query.lower()))
-        content_tokens = set(self.tokenizer.encode(content.lower()))
-        
-        if not query_tokens or not content_tokens:
-            return 0.0
-            
-        intersection = len(query_tokens.intersection(content_tokens))
-        union = len(query_tokens.union(content_tokens))
-        
-        return intersection / union if union > 0 else 0.0
+        self._prune_by_score(scores)
 
     def _limit_tokens(
         self,
-        messages: List[Dict[str, str]],
+        entries: Iterable[Dict[str, Any]],
         max_tokens: int
     ) -> List[Dict[str, str]]:
-        """Limit messages to token count."""
+        """Limit messages to token count using the cached per-message counts."""
         result = []
         current_tokens = 0
         
-        for msg in messages:
-            content = msg.get("content", "")
-            tokens = len(self.tokenizer.encode(content))
+        for entry in entries:
+            tokens = entry["tokens"]
             
             if current_tokens + tokens > max_tokens:
                 break
                 
-            result.append(msg)
+            result.append(entry["message"])
             current_tokens += tokens
             
         return result
 
     async def clear(self) -> None:
         """Clear all messages."""
-        self.messages = []
-        self.total_tokens = 0
-        self.relevance_scores = {} 
\ No newline at end of file
+        async with self._lock:
+            self.messages = deque()
+            self.total_tokens = 0
+            self.relevance_scores = {}
+            self._token_index = {}
+            self._entries = {}
@@ -4,12 +4,118 @@ Versioned and snapshot memory implementation.
 
 from typing import List, Dict, Any, Optional, Set, Tuple
 from datetime import datetime, timedelta
+from collections import defaultdict
+import base64
+import difflib
 import json
+import zlib
 from pathlib import Path
 import numpy as np
 from ..models.base import BaseLLM
 from .base import BaseMemory
 
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+def _compress_text(text: str) -> Tuple[str, str]:
+    """Compress text with zstd if available, else zlib; return (codec, base64 payload)."""
+    data = text.encode("utf-8")
+    if zstandard is not None:
+        return "zstd", base64.b64encode(zstandard.ZstdCompressor().compress(data)).decode("ascii")
+    return "zlib", base64.b64encode(zlib.compress(data)).decode("ascii")
+
+
+def _decompress_text(codec: str, payload: str) -> str:
+    """Invert ``_compress_text``."""
+    data = base64.b64decode(payload)
+    if codec == "zstd":
+        if zstandard is None:
+            raise ImportError("zstandard is required to read zstd-compressed versions")
+        return zstandard.ZstdDecompressor().decompress(data).decode("utf-8")
+    return zlib.decompress(data).decode("utf-8")
+
+
+def compute_line_delta(old_content: str, new_content: str) -> List[List[Any]]:
+    """
+    Compute a line-level delta turning ``old_content`` into ``new_content``.
+
+    Each op is ``[i1, i2, lines]``: replace old lines ``i1:i2`` with ``lines``.
+    Unchanged ranges are implicit.
+    """
+    old_lines = old_content.splitlines(keepends=True)
+    new_lines = new_content.splitlines(keepends=True)
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    return [
+        [i1, i2, new_lines[j1:j2]]
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes()
+        if tag != "equal"
+    ]
+
+
+def apply_line_delta(old_content: str, delta: List[List[Any]]) -> str:
+    """Apply a delta produced by ``compute_line_delta``."""
+    old_lines = old_content.splitlines(keepends=True)
+    result = []
+    position = 0
+    for i1, i2, lines in delta:
+        result.extend(old_lines[position:i1])
+        result.extend(lines)
+        position = i2
+    result.extend(old_lines[position:])
+    return "".join(result)
+
+
+class MinHashIndex:
+    """
+    MinHash signatures with LSH banding for Jaccard candidate generation.
+
+    Sets whose signatures agree on every row of at least one band become
+    candidate pairs, so similar items are found without comparing all pairs.
+    """
+
+    _PRIME = (1 << 31) - 1
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.a = rng.integers(1, self._PRIME, num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, self._PRIME, num_perm, dtype=np.uint64)
+
+    def signature(self, tokens: Set[str]) -> np.ndarray:
+        """Compute the MinHash signature of a token set."""
+        if not tokens:
+            return np.full(self.num_perm, self._PRIME, dtype=np.uint64)
+        hashes = np.fromiter(
+            (zlib.crc32(token.encode("utf-8")) for token in tokens),
+            dtype=np.uint64,
+            count=len(tokens)
+        ) % np.uint64(self._PRIME)
+        permuted = (self.a[:, None] * hashes[None, :] + self.b[:, None]) % np.uint64(self._PRIME)
+        return permuted.min(axis=1)
+
+    def candidate_pairs(self, signatures: Dict[Any, np.ndarray]) -> Set[Tuple[Any, Any]]:
+        """Get key pairs (ordered as in ``signatures``) sharing at least one band."""
+        order = {key: idx for idx, key in enumerate(signatures)}
+        pairs = set()
+        for band in range(self.bands):
+            buckets = defaultdict(list)
+            start = band * self.rows
+            for key, sig in signatures.items():
+                buckets[sig[start:start + self.rows].tobytes()].append(key)
+            for keys in buckets.values():
+                for i, k1 in enumerate(keys):
+                    for k2 in keys[i + 1:]:
+                        pairs.add((k1, k2) if order[k1] < order[k2] else (k2, k1))
+        return pairs
+
+
 class VersionedMemory(BaseMemory):
     """Memory that implements versioned/snapshot memory."""
 
@@ -39,7 +145,9 @@ class VersionedMemory(BaseMemory):
         enable_conflict_resolution: bool = True,
         conflict_threshold: float = 0.5,
         enable_version_graph: bool = True,
-        graph_update_interval: int = 3600  # 1 hour
+        graph_update_interval: int = 3600,  # 1 hour
+        enable_delta_storage: bool = True,
+        keyframe_interval: int = 10
     ):
         super().__init__(memory_key)
         self.llm = llm
@@ -66,9 +174,16 @@ class VersionedMemory(BaseMemory):
         self.conflict_threshold = conflict_threshold
         self.enable_version_graph = enable_version_graph
         self.graph_update_interval = graph_update_interval
+        self.enable_delta_storage = enable_delta_storage
+        self.keyframe_interval = keyframe_interval
         
         # Initialize storage
         self.items: List[Dict[str, Any]] = []
+        self._items_by_id: Dict[str, Dict[str, Any]] = {}  # item_id -> item
+        self._minhash = MinHashIndex()
+        self._minhash_cache: Dict[Tuple[str, int], np.ndarray] = {}  # (item_id, version) -> signature
+        self._materialized: Dict[str, Tuple[int, int, str]] = {}  # item_id -> (index, version, content)
+        self._history_sizes: Dict[str, List[int]] = {}  # item_id -> [materialized size, stored size]
         self.versions: Dict[str, List[Dict[str, Any]]] = {}  # item_id -> version history
         self.snapshots: List[Dict[str, Any]] = []  # List of snapshots
         self.differentials: Dict[str, Dict[str, Any]] = {}  # snapshot_id -> differential
@@ -108,6 +223,7 @@ class VersionedMemory(BaseMemory):
         
         # Add to storage
         self.items.append(new_item)
+        self._items_by_id[item_id] = new_item
         
         # Initialize version history
         self.versions[item_id] = [{
@@ -118,11 +234,139 @@ class VersionedMemory(BaseMemory):
             "parent": None,
             "metadata": {}
         }]
+        self._history_sizes[item_id] = [len(message["content"]), len(message["content"])]
         
         # Initialize metadata
         if self.enable_metadata_tracking:
             await self._initialize_metadata(item_id)
         
+        await self._process_version(item_id)
+        
+        # Maintain item limit
+        await self._maintain_item_limit()
+        
+        await self.save()
+
+    async def add_version(
+        self,
+        item_id: str,
+        content: str,
+        branch: str = "main",
+        parent: Optional[int] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> int:
+        """
+        Record a new version of an existing item.
+
+        ``parent`` defaults to the latest version. With delta storage enabled
+        the version is stored as a compressed line delta against the previous
+        stored version, with a full keyframe every ``keyframe_interval``
+        versions. Returns the new version number.
+        """
+        item = self._items_by_id[item_id]
+        version_history = self.versions[item_id]
+        previous = version_history[-1]
+        version_number = previous["version"] + 1
+        
+        version = {
+            "version": version_number,
+            "timestamp": datetime.now().isoformat(),
+            "branch": branch,
+            "parent": previous["version"] if parent is None else parent,
+            "metadata": metadata or {}
+        }
+        if self.enable_delta_storage and len(version_history) % self.keyframe_interval:
+            delta = compute_line_delta(item["content"], content)
+            version["codec"], version["delta"] = _compress_text(json.dumps(delta))
+        else:
+            version["content"] = content
+        # Keep the outgoing latest content so the steps below needn't replay deltas
+        self._materialized[item_id] = (len(version_history) - 1, previous["version"], item["content"])
+        version_history.append(version)
+        sizes = self._history_sizes.get(item_id)
+        if sizes is not None:
+            sizes[0] += len(content)
+            sizes[1] += self._stored_size(version)
+        
+        # Update item
+        item["content"] = content
+        item["metadata"]["version"] = version_number
+        item["metadata"]["branch"] = branch
+        
+        await self._process_version(item_id)
+        await self.save()
+        return version_number
+
+    def get_version_content(self, item_id: str, version: int) -> Optional[str]:
+        """Get the full content of a version, replaying deltas from the nearest keyframe."""
+        version_history = self.versions.get(item_id, [])
+        index = next(
+            (idx for idx, v in enumerate(version_history) if v["version"] == version),
+            None
+        )
+        if index is None:
+            return None
+        return self._content_at(item_id, index)
+
+    def get_version_history(self, item_id: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Get the version history of an item with materialized content.
+
+        With ``limit`` only the most recent versions are returned, replaying
+        deltas from the nearest keyframe before them.
+        """
+        version_history = self.versions.get(item_id, [])
+        start = 0 if limit is None else max(0, len(version_history) - limit)
+        keyframe = start
+        while keyframe > 0 and "content" not in version_history[keyframe]:
+            keyframe -= 1
+        
+        history = []
+        content = None
+        for index in range(keyframe, len(version_history)):
+            v = version_history[index]
+            if "content" in v:
+                content = v["content"]
+            else:
+                content = apply_line_delta(content, json.loads(_decompress_text(v["codec"], v["delta"])))
+            if index >= start:
+                entry = {key: value for key, value in v.items() if key not in ("delta", "codec")}
+                entry["content"] = content
+                history.append(entry)
+        return history
+
+    def _content_at(self, item_id: str, index: int) -> str:
+        """
+        Reconstruct the content stored at a position in an item's version history.
+
+        Replay starts from the nearest keyframe, or from the last materialized
+        version when that is closer.
+        """
+        version_history = self.versions[item_id]
+        keyframe = index
+        while "content" not in version_history[keyframe]:
+            keyframe -= 1
+        content = version_history[keyframe]["content"]
+        
+        cached = self._materialized.get(item_id)
+        if cached is not None:
+            cached_index, cached_version, cached_content = cached
+            if (
+                keyframe < cached_index <= index
+                and version_history[cached_index]["version"] == cached_version
+            ):
+                keyframe, content = cached_index, cached_content
+        
+        for v in version_history[keyframe + 1:index + 1]:
+            content = apply_line_delta(content, json.loads(_decompress_text(v["codec"], v["delta"])))
+        return content
+
+    @staticmethod
+    def _stored_size(version: Dict[str, Any]) -> int:
+        return len(version["content"]) if "content" in version else len(version["delta"])
+
+    async def _process_version(self, item_id: str) -> None:
+        """Run snapshot, differential, compression, analysis, graph, merge and conflict steps."""
         # Create snapshot if needed
         if (datetime.now() - self.last_snapshot).total_seconds() >= self.snapshot_interval:
             await self._create_snapshot()
@@ -150,15 +394,10 @@ class VersionedMemory(BaseMemory):
         # Check for conflicts if enabled
         if self.enable_conflict_resolution:
             await self._detect_conflicts(item_id)
-        
-        # Maintain item limit
-        await self._maintain_item_limit()
-        
-        await self.save()
 
     async def _initialize_metadata(self, item_id: str) -> None:
         """Initialize metadata for an item."""
-        item = next(i for i in self.items if i["id"] == item_id)
+        item = self._items_by_id[item_id]
         
         try:
             # Generate metadata prompt
@@ -214,7 +453,7 @@ class VersionedMemory(BaseMemory):
 
     async def _create_differential(self, item_id: str) -> None:
         """Create differential for an item."""
-        item = next(i for i in self.items if i["id"] == item_id)
+        item = self._items_by_id[item_id]
         version_history = self.versions[item_id]
         
         if len(version_history) > 1:
@@ -231,8 +470,8 @@ class VersionedMemory(BaseMemory):
                     "timestamp": datetime.now().isoformat(),
                     "changes": {
                         "content_changes": self._calculate_content_changes(
-                            previous_version["content"],
-                            current_version["content"]
+                            self._content_at(item_id, len(version_history) - 2),
+                            item["content"]
                         ),
                         "metadata_changes": self._calculate_metadata_changes(
                             previous_version.get("metadata", {}),
@@ -249,12 +488,20 @@ class VersionedMemory(BaseMemory):
 
     def _calculate_content_changes(self, old_content: str, new_content: str) -> Dict[str, Any]:
         """Calculate changes between content versions."""
-        # This is a simplified version - in practice, you'd want to use a proper diff algorithm
-        return {
-            "added": len(new_content) - len(old_content),
-            "changed": sum(1 for a, b in zip(old_content, new_content) if a != b),
-            "deleted": len(old_content) - len(new_content)
-        }
+        # Token-level diff: counts of inserted, replaced and removed tokens
+        changes = {"added": 0, "changed": 0, "deleted": 0}
+        matcher = difflib.SequenceMatcher(None, old_content.split(), new_content.split(), autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == "insert":
+                changes["added"] += j2 - j1
+            elif tag == "delete":
+                changes["deleted"] += i2 - i1
+            elif tag == "replace":
+                changed = min(i2 - i1, j2 - j1)
+                changes["changed"] += changed
+                changes["added"] += (j2 - j1) - changed
+                changes["deleted"] += (i2 - i1) - changed
+        return changes
 
     def _calculate_metadata_changes(self, old_metadata: Dict[str, Any], new_metadata: Dict[str, Any]) -> Dict[str, Any]:
         """Calculate changes between metadata versions."""
@@ -283,11 +530,23 @@ class VersionedMemory(BaseMemory):
 
     async def _compress_version(self, item_id: str) -> None:
         """Compress version history for an item."""
-        item = next(i for i in self.items if i["id"] == item_id)
+        item = self._items_by_id[item_id]
         version_history = self.versions[item_id]
         
         if len(version_history) > 1:
             try:
+                if self.enable_delta_storage:
+                    # Deltas already keep history compact; just record the ratio
+                    sizes = self._history_sizes.get(item_id)
+                    if sizes is None:
+                        # Running totals are rebuilt once per item after a load
+                        sizes = self._history_sizes[item_id] = [
+                            sum(len(v["content"]) for v in self.get_version_history(item_id)),
+                            sum(self._stored_size(v) for v in version_history)
+                        ]
+                    item["metadata"]["compression_ratio"] = sizes[1] / max(1, sizes[0])
+                    return
+                
                 # Calculate compression ratio
                 original_size = sum(len(v["content"]) for v in version_history)
                 compressed_size = len(version_history[-1]["content"])
@@ -308,8 +567,7 @@ class VersionedMemory(BaseMemory):
 
     async def _analyze_version(self, item_id: str) -> None:
         """Analyze version history for an item."""
-        item = next(i for i in self.items if i["id"] == item_id)
-        version_history = self.versions[item_id]
+        item = self._items_by_id[item_id]
         
         try:
             # Generate version analysis prompt
@@ -319,7 +577,7 @@ class VersionedMemory(BaseMemory):
             {item['content']}
             
             Version history:
-            {json.dumps(version_history, indent=2)}
+            {json.dumps(self.get_version_history(item_id, limit=self.keyframe_interval), indent=2)}
             
             Return a JSON object with:
             1. analysis: dict of string -> any
@@ -337,7 +595,7 @@ class VersionedMemory(BaseMemory):
 
     async def _update_version_graph(self, item_id: str) -> None:
         """Update version graph for an item."""
-        item = next(i for i in self.items if i["id"] == item_id)
+        item = self._items_by_id[item_id]
         version_history = self.versions[item_id]
         
         try:
@@ -363,31 +621,41 @@ class VersionedMemory(BaseMemory):
 
     async def _detect_merges(self, item_id: str) -> None:
         """Detect potential merges for an item."""
-        item = next(i for i in self.items if i["id"] == item_id)
+        item = self._items_by_id[item_id]
         version_history = self.versions[item_id]
         
         try:
             # Check for parallel versions
-            parallel_versions = [
-                v for v in version_history
+            parallel_versions = {
+                v["version"]: index for index, v in enumerate(version_history)
                 if v["version"] > 1 and v["parent"] == version_history[-2]["version"]
-            ]
+            }
             
             if len(parallel_versions) > 1:
-                # Calculate similarity between parallel versions
+                # Generate candidate pairs with MinHash LSH, then verify exactly;
+                # content is only reconstructed for uncached or candidate versions
+                contents = {}
+                
+                def content_of(version: int) -> str:
+                    if version not in contents:
+                        contents[version] = self._content_at(item_id, parallel_versions[version])
+                    return contents[version]
+                
+                signatures = {}
+                for version in parallel_versions:
+                    key = (item_id, version)
+                    if key not in self._minhash_cache:
+                        self._minhash_cache[key] = self._minhash.signature(set(content_of(version).split()))
+                    signatures[version] = self._minhash_cache[key]
+                
                 similarities = []
-                for v1 in parallel_versions:
-                    for v2 in parallel_versions:
-                        if v1["version"] < v2["version"]:
-                            similarity = self._calculate_similarity(
-                                v1["content"],
-                                v2["content"]
-                            )
-                            similarities.append({
-                                "v1": v1["version"],
-                                "v2": v2["version"],
-                                "similarity": similarity
-                            })
+                for v1, v2 in sorted(self._minhash.candidate_pairs(signatures)):
+                    similarity = self._calculate_similarity(content_of(v1), content_of(v2))
+                    similarities.append({
+                        "v1": min(v1, v2),
+                        "v2": max(v1, v2),
+                        "similarity": similarity
+                    })
                 
                 # Check for potential merges
                 for sim in similarities:
@@ -409,26 +677,25 @@ class VersionedMemory(BaseMemory):
 
     async def _detect_conflicts(self, item_id: str) -> None:
         """Detect potential conflicts for an item."""
-        item = next(i for i in self.items if i["id"] == item_id)
+        item = self._items_by_id[item_id]
         version_history = self.versions[item_id]
         
         try:
             # Check for conflicting changes
             if len(version_history) > 1:
                 current_version = version_history[-1]
-                previous_version = version_history[-2]
                 
                 # Calculate conflict score
                 conflict_score = self._calculate_conflict_score(
-                    previous_version["content"],
-                    current_version["content"]
+                    self._content_at(item_id, len(version_history) - 2),
+                    item["content"]
                 )
                 
                 if conflict_score > self.conflict_threshold:
                     conflict_id = f"conflict_{item_id}_{current_version['version']}"
                     self.conflicts[conflict_id] = [{
                         "version": current_version["version"],
-                        "content": current_version["content"],
+                        "content": item["content"],
                         "conflict_score": conflict_score,
                         "conflict_type": "content_conflict"
                     }]
@@ -463,6 +730,12 @@ class VersionedMemory(BaseMemory):
         """Remove an item and its associated data."""
         # Remove from items
         self.items = [i for i in self.items if i["id"] != item_id]
+        self._items_by_id.pop(item_id, None)
+        self._minhash_cache = {
+            key: sig for key, sig in self._minhash_cache.items() if key[0] != item_id
+        }
+        self._materialized.pop(item_id, None)
+        self._history_sizes.pop(item_id, None)
         
         # Remove from versions
         if item_id in self.versions:
@@ -490,16 +763,16 @@ class VersionedMemory(BaseMemory):
         
         # Remove from merge points
         merges_to_remove = [
-            merge_id for merge_id, versions in self.merge_points.items()
-            if any(v.startswith(item_id) for v in versions)
+            merge_id for merge_id in self.merge_points
+            if merge_id.startswith(f"merge_{item_id}_")
         ]
         for merge_id in merges_to_remove:
             del self.merge_points[merge_id]
         
         # Remove from conflicts
         conflicts_to_remove = [
-            conflict_id for conflict_id, conflicts in self.conflicts.items()
-            if any(c["version"].startswith(item_id) for c in conflicts)
+            conflict_id for conflict_id in self.conflicts
+            if conflict_id.startswith(f"conflict_{item_id}_")
         ]
         for conflict_id in conflicts_to_remove:
             del self.conflicts[conflict_id]
@@ -507,7 +780,7 @@ class VersionedMemory(BaseMemory):
         # Remove from version graph
         versions_to_remove = [
             version_id for version_id in self.version_graph
-            if version_id.startswith(item_id)
+            if version_id.startswith(f"{item_id}_v")
         ]
         for version_id in versions_to_remove:
             del self.version_graph[version_id]
@@ -526,6 +799,10 @@ class VersionedMemory(BaseMemory):
     async def clear(self) -> None:
         """Clear all items."""
         self.items = []
+        self._items_by_id = {}
+        self._minhash_cache = {}
+        self._materialized = {}
+        self._history_sizes = {}
         self.versions = {}
         self.snapshots = []
         self.differentials = {}
@@ -566,6 +843,9 @@ class VersionedMemory(BaseMemory):
             with open(self.storage_path, 'r') as f:
                 data = json.load(f)
                 self.items = data.get("items", [])
+                self._items_by_id = {item["id"]: item for item in self.items}
+                self._materialized = {}
+                self._history_sizes = {}
                 self.versions = data.get("versions", {})
                 self.snapshots = data.get("snapshots", [])
                 self.differentials = data.get("differentials", {})
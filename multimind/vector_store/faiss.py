@@ -71,7 +71,8 @@ class FAISSBackend(VectorStoreBackend):
         
         results = []
         for i, (distance, idx) in enumerate(zip(distances[0], indices[0])):
-            if idx < len(self.metadata):
+            # FAISS pads with -1 when the index holds fewer than k vectors
+            if 0 <= idx < len(self.metadata):
                 id = f"vec_{idx}"
                 results.append(SearchResult(
                     id=id,
@@ -0,0 +1,68 @@
+import time
+from multimind.core.chat import ChatManager, ChatSession, SQLiteSessionStore
+
+
+def test_sqlite_store_persists_sessions_and_messages(tmp_path):
+    manager = ChatManager(storage_dir=tmp_path)
+    assert isinstance(manager.store, SQLiteSessionStore)
+    session = manager.create_session(model="openai", system_prompt="be brief", metadata={"user": "u1"})
+    session.add_message("user", "hi")
+    session.add_message("assistant", "hello", model="openai", metadata={"tokens": 3})
+    manager.store.close()
+
+    reopened = ChatManager(storage_dir=tmp_path)
+    loaded = reopened.get_session(session.session_id)
+    assert loaded.system_prompt == "be brief"
+    assert loaded.metadata == {"user": "u1"}
+    assert [(m.role, m.content, m.model) for m in loaded.messages] == [
+        ("user", "hi", None), ("assistant", "hello", "openai")
+    ]
+    assert loaded.messages[1].metadata == {"tokens": 3}
+    assert reopened.list_sessions()[0]["message_count"] == 2
+
+
+def test_active_sessions_are_a_bounded_lru(tmp_path):
+    manager = ChatManager(storage_dir=tmp_path, max_active_sessions=2)
+    first, second = manager.create_session(model="m"), manager.create_session(model="m")
+    manager.get_session(first.session_id)
+    third = manager.create_session(model="m")
+    assert list(manager.active_sessions) == [first.session_id, third.session_id]
+
+    # Evicted sessions reload from the store and keep recording messages
+    reloaded = manager.get_session(second.session_id)
+    assert reloaded is not second
+    reloaded.add_message("user", "still here")
+    assert len(manager.active_sessions) == 2
+    assert manager.store.load_session(second.session_id).messages[0].content == "still here"
+
+
+def test_list_sessions_paginates_by_most_recent_update(tmp_path):
+    manager = ChatManager(storage_dir=tmp_path)
+    sessions = []
+    for i in range(5):
+        sessions.append(manager.create_session(model=f"m{i}"))
+        time.sleep(0.001)
+    sessions[0].add_message("user", "bump")
+
+    order = [s.session_id for s in [sessions[0]] + sessions[:0:-1]]
+    assert [s["session_id"] for s in manager.list_sessions()] == order
+    assert [s["session_id"] for s in manager.list_sessions(limit=2, offset=1)] == order[1:3]
+    assert manager.list_sessions(limit=2, offset=4)[0]["session_id"] == order[4]
+    assert manager.count_sessions() == 5
+
+
+def test_legacy_json_sessions_are_migrated_or_deleted(tmp_path):
+    legacy = [ChatSession(session_id=f"legacy{i}", model="m") for i in range(3)]
+    for session in legacy:
+        session.add_message("user", f"from {session.session_id}")
+        session.save(tmp_path)
+
+    manager = ChatManager(storage_dir=tmp_path)
+    assert manager.delete_session("legacy0")
+    assert not (tmp_path / "chat_legacy0.json").exists()
+    assert not manager.delete_session("legacy0")
+
+    assert manager.migrate_json_sessions() == 2
+    assert not list(tmp_path.glob("chat_*.json"))
+    assert manager.count_sessions() == 2
+    assert manager.get_session("legacy1").messages[0].content == "from legacy1"
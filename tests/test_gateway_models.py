@@ -0,0 +1,133 @@
+import asyncio
+import json
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from multimind.core.config import GatewayConfig, ModelConfig
+from multimind.core.http_pool import http_pool
+from multimind.core.models import ModelHandler, ModelResponse
+from multimind.gateway import models
+from multimind.gateway.models import HandlerRegistry, OllamaHandler
+
+
+class FakeClient:
+    def __init__(self):
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeHandler(ModelHandler):
+    def __init__(self, model_config):
+        super().__init__(model_config)
+        self._client = FakeClient()
+
+    async def chat(self, messages, **kwargs):
+        return ModelResponse(content="ok", model=self.config.model_name)
+
+    async def generate(self, prompt, **kwargs):
+        return await self.chat([{"role": "user", "content": prompt}])
+
+
+@pytest.fixture
+def gateway_config(monkeypatch):
+    monkeypatch.setitem(models.MODEL_HANDLERS, "openai", FakeHandler)
+    return GatewayConfig(
+        openai=ModelConfig(api_key="key", model_name="gpt"),
+        anthropic=ModelConfig(model_name="claude"),
+        ollama=ModelConfig(api_base="http://localhost:11434", model_name="mistral"),
+        huggingface=ModelConfig(model_name="mistral")
+    )
+
+
+def test_registry_validate_reports_configured_models(gateway_config):
+    registry = HandlerRegistry(gateway_config)
+    assert registry.validate() == {
+        "openai": True, "anthropic": False, "ollama": True, "huggingface": True
+    }
+
+
+def test_registry_builds_each_handler_once(gateway_config):
+    registry = HandlerRegistry(gateway_config)
+    handler = registry.get("openai")
+    assert registry.get("OpenAI") is handler
+    with pytest.raises(ValueError):
+        registry.get("unknown")
+
+
+def test_registry_rebuilds_and_closes_on_config_change(gateway_config):
+    registry = HandlerRegistry(gateway_config)
+    handler = registry.get("openai")
+    gateway_config.openai.api_key = "rotated"
+    replacement = registry.get("openai")
+    assert replacement is not handler
+    assert replacement.config.api_key == "rotated"
+    assert handler._client.closed and not replacement._client.closed
+
+
+@pytest.mark.asyncio
+async def test_registry_closes_replaced_handlers_in_the_background(gateway_config):
+    registry = HandlerRegistry(gateway_config)
+    handler = registry.get("openai")
+    gateway_config.openai.api_key = None
+    registry.reload()
+    assert registry.status["openai"] is False
+    await registry.close()
+    assert handler._client.closed
+
+
+@pytest.mark.asyncio
+async def test_registry_waits_for_leases_before_closing_replaced_handlers(gateway_config):
+    registry = HandlerRegistry(gateway_config)
+    async with registry.lease("openai") as handler:
+        streaming = registry.acquire("openai")
+        gateway_config.openai.api_key = "rotated"
+        replacement = registry.get("openai")
+        assert replacement is not handler
+        await asyncio.sleep(0)
+        assert not handler._client.closed
+
+    # The stream still holds the old handler
+    await asyncio.sleep(0)
+    assert not handler._client.closed
+    registry.release(streaming)
+    await asyncio.sleep(0)
+    assert handler._client.closed and not replacement._client.closed
+    assert not registry._leases
+
+
+@pytest_asyncio.fixture
+async def ollama_server():
+    async def generate(request):
+        data = await request.json()
+        if not data["stream"]:
+            return web.json_response({"response": "hello", "done": True})
+        response = web.StreamResponse()
+        await response.prepare(request)
+        for word in ("one ", "two ", "three ", "four "):
+            await asyncio.sleep(0.4)
+            await response.write(json.dumps({"response": word}).encode() + b"\n")
+        await response.write_eof()
+        return response
+
+    app = web.Application()
+    app.router.add_post("/api/generate", generate)
+    server = TestServer(app)
+    await server.start_server()
+    yield server
+    await http_pool.close()
+    await server.close()
+
+
+@pytest.mark.asyncio
+async def test_ollama_stream_may_outlast_the_request_timeout(ollama_server):
+    handler = OllamaHandler(ModelConfig(
+        model_name="llama", api_base=str(ollama_server.make_url("")).rstrip("/"), timeout=1
+    ))
+    messages = [{"role": "user", "content": "count"}]
+    # 1.6s of streaming against a 1s timeout; each gap between chunks is well inside it
+    chunks = [chunk async for chunk in handler.chat_stream(messages)]
+    assert "".join(chunks) == "one two three four "
+    assert (await handler.chat(messages)).content == "hello"
@@ -0,0 +1,110 @@
+import json
+import pytest
+from fastapi.testclient import TestClient
+from multimind.core.chat import ChatManager
+from multimind.core.models import ModelHandler, ModelResponse
+from multimind.core.monitoring import ModelMonitor
+from multimind.gateway import api
+
+
+class FakeStreamHandler(ModelHandler):
+    def __init__(self, chunks, error=None):
+        super().__init__(None)
+        self.chunks = chunks
+        self.error = error
+
+    async def chat(self, messages, **kwargs):
+        return ModelResponse(content="".join(self.chunks), model="fake")
+
+    async def generate(self, prompt, **kwargs):
+        return await self.chat([{"role": "user", "content": prompt}])
+
+    async def chat_stream(self, messages, **kwargs):
+        for chunk in self.chunks:
+            yield chunk
+        if self.error:
+            raise RuntimeError(self.error)
+
+
+@pytest.fixture
+def gateway(tmp_path, monkeypatch):
+    """Test client whose 'openai' model streams from a fake handler."""
+    state = {"handler": FakeStreamHandler(["Hel", "lo"])}
+    monkeypatch.setattr(api.handler_registry, "status", {"openai": True})
+    monkeypatch.setattr(api.handler_registry, "get", lambda model: state["handler"])
+    monkeypatch.setattr(api, "monitor", ModelMonitor())
+    monkeypatch.setattr(api, "chat_manager", ChatManager(storage_dir=tmp_path))
+    client = TestClient(api.app)
+    client.state = state
+    return client
+
+
+def _chat(client, **extra):
+    return client.post("/v1/chat", json={
+        "model": "openai",
+        "messages": [{"role": "user", "content": "hi"}],
+        "stream": True,
+        **extra
+    })
+
+
+def test_chat_stream_sse_framing(gateway):
+    response = _chat(gateway)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.text == (
+        'data: {"content": "Hel", "model": "openai"}\n\n'
+        'data: {"content": "lo", "model": "openai"}\n\n'
+        "data: [DONE]\n\n"
+    )
+
+
+def test_chat_stream_ndjson_framing(gateway):
+    response = _chat(gateway, stream_format="ndjson")
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines == [
+        {"content": "Hel", "model": "openai"},
+        {"content": "lo", "model": "openai"},
+        {"done": True, "model": "openai"}
+    ]
+
+
+def test_chat_stream_reports_errors_in_band(gateway):
+    gateway.state["handler"] = FakeStreamHandler(["partial"], error="provider went away")
+    response = _chat(gateway)
+    assert response.status_code == 200
+    assert response.text.endswith('event: error\ndata: {"error": "provider went away"}\n\n')
+    assert "[DONE]" not in response.text
+    assert not api.handler_registry._leases
+
+
+def test_session_stream_persists_the_reply(gateway):
+    session = api.chat_manager.create_session(model="openai")
+    response = gateway.post(
+        f"/v1/sessions/{session.session_id}/messages/stream",
+        json={"role": "user", "content": "hi"}
+    )
+    assert response.text.endswith("data: [DONE]\n\n")
+    stored = api.chat_manager.load_session(session.session_id)
+    assert [(m.role, m.content) for m in stored.messages] == [("user", "hi"), ("assistant", "Hello")]
+
+
+def test_session_stream_is_rate_limited_like_chat(gateway):
+    api.monitor.set_rate_limits("openai", requests_per_minute=0, tokens_per_minute=0)
+    session = api.chat_manager.create_session(model="openai")
+    assert _chat(gateway).status_code == 429
+    response = gateway.post(
+        f"/v1/sessions/{session.session_id}/messages/stream",
+        json={"role": "user", "content": "hi"}
+    )
+    assert response.status_code == 429
+    assert api.chat_manager.get_session(session.session_id).messages == []
+
+
+def test_list_sessions_validates_pagination(gateway):
+    for i in range(3):
+        api.chat_manager.create_session(model="openai")
+    assert len(gateway.get("/v1/sessions", params={"limit": 2, "offset": 2}).json()) == 1
+    for params in ({"limit": 0}, {"limit": 1001}, {"offset": -1}):
+        assert gateway.get("/v1/sessions", params=params).status_code == 422
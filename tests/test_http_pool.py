@@ -0,0 +1,50 @@
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from multimind.core.http_pool import HTTPClientPool
+
+
+@pytest_asyncio.fixture
+async def server():
+    peers = []
+
+    async def handler(request):
+        peers.append(request.transport.get_extra_info("peername"))
+        return web.json_response({"ok": True})
+
+    app = web.Application()
+    app.router.add_get("/ping", handler)
+    test_server = TestServer(app)
+    await test_server.start_server()
+    test_server.peers = peers
+    yield test_server
+    await test_server.close()
+
+
+@pytest.mark.asyncio
+async def test_requests_reuse_a_keep_alive_connection(server):
+    base_url = str(server.make_url(""))
+    async with HTTPClientPool() as pool:
+        for _ in range(3):
+            session = pool.get_session(base_url)
+            async with session.get(f"{base_url}/ping") as response:
+                assert (await response.json()) == {"ok": True}
+        assert pool.get_session(base_url + "/") is session
+    # One client socket served every request
+    assert len(server.peers) == 3
+    assert len(set(server.peers)) == 1
+
+
+@pytest.mark.asyncio
+async def test_close_closes_sessions(server):
+    base_url = str(server.make_url(""))
+    pool = HTTPClientPool()
+    session = pool.get_session(base_url)
+    async with session.get(f"{base_url}/ping") as response:
+        assert response.status == 200
+    await pool.close()
+    assert session.closed
+    replacement = pool.get_session(base_url)
+    assert replacement is not session and not replacement.closed
+    await pool.close()
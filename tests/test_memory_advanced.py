@@ -1,3 +1,4 @@
+import signal
 import pytest
 from multimind.memory.procedural import ProceduralMemory
 from multimind.memory.semantic import SemanticMemory
@@ -20,4 +21,836 @@ def test_semantic_memory_basic():
     class DummyLLM:
         pass
     mem = SemanticMemory(DummyLLM(), max_concepts=3)
-    assert mem is not None 
\ No newline at end of file
+    assert mem is not None
+
+def test_spatial_grid_index_radius_query():
+    from multimind.memory.spatial import SpatialGridIndex
+    index = SpatialGridIndex(cell_size=3.0)
+    index.insert("a", (0.0, 0.0, 0.0))
+    index.insert("b", (2.0, 2.0, 0.0))
+    index.insert("c", (10.0, 0.0, 0.0))
+    assert sorted(index.query_radius((0.0, 0.0, 0.0), 3.0)) == ["a", "b"]
+    index.remove("b")
+    assert index.query_radius((0.0, 0.0, 0.0), 3.0) == ["a"]
+    assert SpatialGridIndex.to_point({"x": "north"}) is None
+
+def test_spatial_grid_index_prunes_lat_lon():
+    from multimind.memory.spatial import SpatialGridIndex
+    index = SpatialGridIndex(cell_size=1.0)
+    index.insert("paris", SpatialGridIndex.to_point({"lat": 48.85, "lon": 2.35}))
+    index.insert("versailles", SpatialGridIndex.to_point({"lat": 48.80, "lon": 2.13}))
+    index.insert("tokyo", SpatialGridIndex.to_point({"lat": 35.68, "lon": 139.69}))
+    near = index.query_radius(SpatialGridIndex.to_point({"lat": 48.86, "lon": 2.29}), 1.0)
+    assert sorted(near) == ["paris", "versailles"]
+
+def test_temporal_interval_index_queries():
+    from multimind.memory.temporal import TemporalIntervalIndex
+    index = TemporalIntervalIndex()
+    index.insert("a", 0.0, 10.0)
+    index.insert("b", 5.0)
+    index.insert("c", 20.0, 30.0)
+    assert index.overlapping(8.0, 25.0) == ["a", "c"]
+    assert index.within(0.0, 12.0) == ["a", "b"]
+    assert index.ending_before(15.0) == ["b", "a"]
+    assert index.starting_after(5.0) == ["c"]
+    index.remove("a")
+    assert index.overlapping(8.0, 25.0) == ["c"]
+
+def test_temporal_relationship_candidates_are_windowed():
+    import asyncio
+    import json
+    from multimind.memory.temporal import TemporalMemory
+
+    analyses = iter([
+        {"start_time": "2024-01-01T09:00:00", "temporal_type": "meeting", "duration": "1h", "importance": 0.5},
+        {"start_time": "2024-01-01T11:00:00", "temporal_type": "meeting", "duration": "2h", "importance": 0.5},
+        {"start_time": "2024-01-03T09:00:00", "temporal_type": "meeting", "duration": "2h", "importance": 0.5},
+        {"start_time": "2024-03-01T09:00:00", "temporal_type": "meeting", "duration": "1h", "importance": 0.5},
+        {"start_time": "2024-01-01T10:00:00", "temporal_type": "deadline", "importance": 0.5},
+    ])
+
+    class DummyLLM:
+        async def embeddings(self, text):
+            return [0.0]
+
+        async def generate(self, prompt):
+            return json.dumps(next(analyses))
+
+    async def run():
+        mem = TemporalMemory(
+            DummyLLM(), analysis_interval=-1, enable_relationships=False, enable_patterns=False,
+            enable_learning=False, enable_evolution=False, enable_validation=False
+        )
+        for i in range(5):
+            await mem.add_message({"content": f"event {i}"})
+        return mem
+
+    mem = asyncio.run(run())
+    # Same type and duration at any distance, same type only within the window
+    candidates = mem._get_relationship_candidates(mem.events_by_id["event_0"])
+    assert [e["id"] for e in candidates] == ["event_3", "event_1"]
+    assert [e["id"] for e in mem.events_between("2024-01-01T10:30:00", "2024-01-02")] == ["event_1"]
+
+def test_event_store_indexes_and_replay(tmp_path):
+    from multimind.memory.event_sourced import EventStore
+    store = EventStore(tmp_path / "events", segment_size=2)
+    for i, item_id in enumerate(["a", "b", "a"]):
+        store.append({"type": "item_created" if i < 2 else "updated", "item_id": item_id, "data": {}})
+    assert [e["seq"] for e in store.by_item("a")] == [0, 2]
+    assert [e["seq"] for e in store.since(0)] == [1, 2]
+    store.remove_item("b")
+    store.flush()
+    replayed = EventStore(tmp_path / "events")
+    replayed.replay()
+    assert [e["seq"] for e in replayed] == [0, 2]
+    assert replayed.types() == {"item_created", "updated"}
+
+def test_event_sourced_legacy_snapshot_migrates_once(tmp_path):
+    import asyncio
+    import json
+    from multimind.memory.event_sourced import EventSourcedMemory
+
+    storage = tmp_path / "memory.json"
+    item = {"id": "item_0", "content": "hello", "timestamp": "2024-01-01T00:00:00", "metadata": {}}
+    storage.write_text(json.dumps({
+        "items": [item],
+        "events": [{
+            "id": "event_0", "type": "item_created", "timestamp": item["timestamp"],
+            "item_id": "item_0", "data": {"content": "hello", "metadata": {}}
+        }]
+    }))
+
+    def open_memory():
+        return EventSourcedMemory(
+            None, storage_path=str(storage),
+            enable_pattern_detection=False, enable_causality_analysis=False
+        )
+
+    mem = open_memory()
+    assert "events" not in json.loads(storage.read_text())
+    asyncio.run(mem.add_message({"content": "world"}))
+
+    # Restart before the next snapshot: segments hold the migrated event once
+    restarted = open_memory()
+    assert [e["item_id"] for e in restarted.get_events_by_type("item_created")] == ["item_0", "item_1"]
+    assert [m["content"] for m in restarted.get_messages()][-2:] == ["hello", "world"]
+
+def test_event_sourced_keeps_events_added_after_clear_and_restart(tmp_path):
+    import asyncio
+    from multimind.memory.event_sourced import EventSourcedMemory
+
+    def open_memory():
+        return EventSourcedMemory(
+            None, storage_path=str(tmp_path / "memory.json"),
+            enable_pattern_detection=False, enable_causality_analysis=False
+        )
+
+    async def run():
+        mem = open_memory()
+        for i in range(5):
+            await mem.add_message({"content": f"old {i}"})
+        await mem.clear()
+
+        restarted = open_memory()
+        for i in range(5):
+            await restarted.add_message({"content": f"new {i}"})
+        restarted.event_store.flush()
+
+        reloaded = open_memory()
+        assert [m["content"] for m in reloaded.get_messages()] == [f"new {i}" for i in range(5)]
+
+    asyncio.run(run())
+
+def _fake_async_redis_memory(**kwargs):
+    fakeredis = pytest.importorskip("fakeredis")
+    from multimind.memory.redis import AsyncRedisMemory
+    mem = AsyncRedisMemory("redis://localhost:6379/0", **kwargs)
+    mem.redis_client = fakeredis.FakeAsyncRedis()
+    return mem
+
+def test_async_redis_memory_pipelined_adds_keep_order():
+    import asyncio
+    from datetime import datetime
+
+    async def run():
+        async with _fake_async_redis_memory(page_size=2) as mem:
+            await mem.add_messages([{"role": "user", "content": f"m{i}"} for i in range(5)])
+            # Members sharing a score keep their insertion order
+            same_time = datetime(2024, 1, 1, 12, 0)
+            await mem.add_messages([{"content": f"tie{i}", "timestamp": same_time} for i in range(3)])
+            await mem.add_message({"content": "tie3", "timestamp": same_time.isoformat()})
+
+            contents = [m["content"] for m in await mem.get_messages()]
+            assert contents == [f"tie{i}" for i in range(4)] + [f"m{i}" for i in range(5)]
+            assert [m["content"] async for m in mem.iter_messages()] == contents
+            assert [m["content"] for m in await mem.get_messages(offset=3, limit=2)] == ["tie3", "m0"]
+            assert [m["content"] for m in await mem.get_recent_messages(2)] == ["m3", "m4"]
+            assert await mem.get_message_count() == 9
+            assert len({m["id"] for m in await mem.get_messages()}) == 9
+
+            await mem.trim_messages(3)
+            assert [m["content"] for m in await mem.get_messages()] == ["m2", "m3", "m4"]
+
+    asyncio.run(run())
+
+def test_async_redis_memory_time_range_reads():
+    import asyncio
+    from datetime import datetime, timedelta
+
+    async def run():
+        async with _fake_async_redis_memory() as mem:
+            base = datetime(2024, 1, 1)
+            times = [base + timedelta(hours=i) for i in range(5)]
+            await mem.add_messages([{"content": f"h{i}", "timestamp": times[i]} for i in (3, 0, 4, 1, 2)])
+
+            stored = await mem.get_messages()
+            assert [m["content"] for m in stored] == [f"h{i}" for i in range(5)]
+            assert stored[0]["timestamp"] == times[0].isoformat()
+            between = await mem.get_messages_between(times[1], times[3])
+            assert [m["content"] for m in between] == ["h1", "h2", "h3"]
+            paged = await mem.get_messages_between(times[1], offset=1, limit=2)
+            assert [m["content"] for m in paged] == ["h2", "h3"]
+            assert [m["content"] for m in await mem.get_messages_since(times[2])] == ["h3", "h4"]
+            assert [m["content"] for m in await mem.get_messages_since(times[0], limit=1)] == ["h1"]
+
+    asyncio.run(run())
+
+def test_async_redis_memory_empty_reads_and_invalid_messages():
+    import asyncio
+    from datetime import datetime
+
+    async def run():
+        async with _fake_async_redis_memory() as mem:
+            await mem.add_messages([])
+            assert await mem.get_messages() == []
+            assert await mem.get_messages(limit=0) == []
+            assert await mem.get_recent_messages(0) == []
+            assert await mem.get_messages_between(datetime(2024, 1, 1)) == []
+            assert [m async for m in mem.iter_messages()] == []
+            assert await mem.get_message_count() == 0
+
+            with pytest.raises(ValueError):
+                await mem.add_message({"id": "mine", "content": "x"})
+            with pytest.raises(ValueError):
+                await mem.add_message({"content": "x", "timestamp": "yesterday"})
+            assert await mem.get_message_count() == 0
+
+    asyncio.run(run())
+
+def test_versioned_memory_rebuilds_versions_from_delta_chain(tmp_path):
+    import asyncio
+    from multimind.memory.versioned import VersionedMemory
+
+    def open_memory():
+        return VersionedMemory(
+            None, storage_path=str(tmp_path / "versions.json"), keyframe_interval=3,
+            enable_compression=False, enable_version_analysis=False
+        )
+
+    contents = ["line a\nline b\n"]
+    for i in range(7):
+        lines = contents[-1].splitlines(keepends=True)
+        lines[i % len(lines)] = f"edit {i}\n"
+        contents.append("".join(lines + [f"added {i}\n"] * (i % 2)))
+
+    async def run():
+        mem = open_memory()
+        await mem.add_message({"content": contents[0]})
+        for content in contents[1:]:
+            await mem.add_version("item_0", content)
+
+        stored = mem.versions["item_0"]
+        assert [index for index, v in enumerate(stored) if "content" in v] == [0, 3, 6]
+        assert all("delta" in v for index, v in enumerate(stored) if index % 3)
+
+        # Rebuild from keyframes and deltas alone, without the materialized cache
+        reloaded = open_memory()
+        assert [reloaded.get_version_content("item_0", v) for v in range(1, 9)] == contents
+        assert [v["content"] for v in reloaded.get_version_history("item_0")] == contents
+        assert [v["content"] for v in reloaded.get_version_history("item_0", limit=4)] == contents[-4:]
+        assert reloaded.get_version_content("item_0", 99) is None
+
+    asyncio.run(run())
+
+def test_minhash_candidates_cover_similar_sets():
+    from multimind.memory.versioned import MinHashIndex
+    index = MinHashIndex()
+    words = [f"w{i}" for i in range(40)]
+    sets = {
+        "base": set(words),
+        "near": set(words[:38] + ["x1", "x2"]),
+        "half": set(words[:20] + [f"y{i}" for i in range(20)]),
+        "other": {f"z{i}" for i in range(40)}
+    }
+    pairs = index.candidate_pairs({key: index.signature(tokens) for key, tokens in sets.items()})
+    assert ("base", "near") in pairs
+    assert not any("other" in pair for pair in pairs)
+    assert all(a < b for a, b in ((list(sets).index(x), list(sets).index(y)) for x, y in pairs))
+    assert index.signature(set()).shape == (index.num_perm,)
+
+class _WordTokenizer:
+    """One token per whitespace-separated word; counts encode() calls."""
+
+    def __init__(self):
+        self.vocab = {}
+        self.calls = 0
+
+    def encode(self, text):
+        self.calls += 1
+        return [self.vocab.setdefault(word, len(self.vocab)) for word in text.split()]
+
+def _token_buffer(monkeypatch, **kwargs):
+    from multimind.memory import token_buffer
+
+    class ConcreteTokenBuffer(token_buffer.TokenBufferMemory):
+        def save(self):
+            pass
+
+        def load(self):
+            pass
+
+    monkeypatch.setattr(token_buffer.tiktoken, "encoding_for_model", lambda model: _WordTokenizer())
+    return ConcreteTokenBuffer(**kwargs)
+
+def test_token_buffer_caches_token_counts(monkeypatch):
+    import asyncio
+    mem = _token_buffer(monkeypatch, max_tokens=100)
+
+    async def run():
+        for content in ("one two three", "four five", "six"):
+            await mem.add_message({"content": content})
+        assert [m["tokens"] for m in mem.messages] == [3, 2, 1]
+        assert mem.total_tokens == 6
+        calls = mem.tokenizer.calls
+        assert [m["content"] for m in await mem.get_messages(max_tokens=5)] == ["one two three", "four five"]
+        assert mem.tokenizer.calls == calls
+
+    asyncio.run(run())
+
+def test_token_buffer_index_matches_brute_force_relevance(monkeypatch):
+    import asyncio
+    mem = _token_buffer(monkeypatch, max_tokens=12, relevance_threshold=0.3)
+    contents = ["red green blue", "green blue", "yellow", "Red Yellow green", "blue blue blue", "purple"]
+
+    def brute_force(query):
+        query_set = set(mem.tokenizer.encode(query.lower()))
+        relevant = []
+        for entry in mem.messages:
+            content_set = set(mem.tokenizer.encode(entry["message"]["content"].lower()))
+            if len(query_set & content_set) / len(query_set | content_set) >= mem.relevance_threshold:
+                relevant.append(entry["message"]["content"])
+        return relevant
+
+    async def run():
+        for content in contents:
+            await mem.add_message({"content": content})
+        # The oldest message was pruned and must be gone from the index too
+        assert [m["message"]["content"] for m in mem.messages] == contents[1:]
+        assert all(entry_id in mem._entries for postings in mem._token_index.values() for entry_id in postings)
+        for query in ("green blue", "red", "yellow green", "blue", "orange"):
+            assert [m["content"] for m in await mem.get_messages(query=query)] == brute_force(query)
+
+    asyncio.run(run())
+
+def test_token_buffer_prunes_least_relevant_with_heap(monkeypatch):
+    import asyncio
+    mem = _token_buffer(monkeypatch, max_tokens=6, prune_strategy="least_relevant")
+    mem.relevance_scores = {"a": 0.9, "b": 0.1, "c": 0.5, "d": 0.8, "e": 0.7}
+
+    async def run():
+        for message_id in "abcd":
+            await mem.add_message({"id": message_id, "content": "w1 w2"})
+        # "b" is the least relevant, so it goes first and order is kept
+        assert [m["message"]["id"] for m in mem.messages] == ["a", "c", "d"]
+        assert mem.total_tokens == 6
+        await mem.add_message({"id": "e", "content": "w3 w4 w5"})
+        assert [m["message"]["id"] for m in mem.messages] == ["a", "d"]
+        assert mem.total_tokens == sum(m["tokens"] for m in mem.messages) == 4
+        assert set(mem._entries) == {m["entry_id"] for m in mem.messages}
+
+    asyncio.run(run())
+
+def _clique_graph_memory(**kwargs):
+    from multimind.memory.knowledge_graph import KnowledgeGraphMemory
+    mem = KnowledgeGraphMemory(None, **kwargs)
+    for group in "abcd":
+        names = [f"{group}{i}" for i in range(10)]
+        mem._update_graph(
+            {(name, "CONCEPT") for name in names},
+            [(src, "knows", "RELATED_TO", dst) for i, src in enumerate(names) for dst in names[i + 1:]]
+        )
+    mem._update_graph(set(), [(f"{x}9", "knows", "RELATED_TO", f"{y}0") for x, y in ("ab", "bc", "cd")])
+    return mem
+
+def _assert_pagerank_matches_cold(mem):
+    import networkx as nx
+    cached = {entity["entity"]: entity["pagerank"] for entity in mem.get_central_entities(top_k=1000)}
+    cold = nx.pagerank(mem.graph, alpha=mem.pagerank_alpha, tol=1e-12, max_iter=1000)
+    assert cached.keys() == cold.keys()
+    assert max(abs(cached[node] - cold[node]) for node in cold) < 1e-8
+
+def _assert_communities_match_cold(mem):
+    import networkx as nx
+    incremental = {frozenset(cluster) for cluster in mem.get_entity_clusters()}
+    cold = nx.community.greedy_modularity_communities(mem.graph.to_undirected())
+    assert incremental == {frozenset(community) for community in cold}
+
+def test_knowledge_graph_cached_pagerank_matches_cold_recomputation():
+    mem = _clique_graph_memory(pagerank_tol=1e-10)
+    _assert_pagerank_matches_cold(mem)
+    first = mem._get_cached("pagerank", mem._compute_pagerank)
+    assert mem._get_cached("pagerank", mem._compute_pagerank) is first
+
+    # Warm-started from the previous ranks after adds and removals
+    mem._update_graph({("x", "PERSON")}, [("x", "knows", "RELATED_TO", "a1"), ("d5", "knows", "RELATED_TO", "x")])
+    _assert_pagerank_matches_cold(mem)
+    mem.max_entities = 38
+    mem._trim_graph()
+    assert not mem.graph.has_node("a0") and not mem.graph.has_node("a1")
+    _assert_pagerank_matches_cold(mem)
+
+def test_knowledge_graph_incremental_communities_match_cold_recomputation():
+    mem = _clique_graph_memory(community_refresh_ratio=0.3)
+    _assert_communities_match_cold(mem)
+
+    mem._update_graph({("x", "PERSON")}, [("x", "knows", "RELATED_TO", "b1"), ("x", "knows", "RELATED_TO", "b2")])
+    assert len(mem._dirty_nodes) <= mem.community_refresh_ratio * mem.graph.number_of_nodes()
+    _assert_communities_match_cold(mem)
+
+    mem.max_entities = 40
+    mem._trim_graph()
+    assert not mem.graph.has_node("a0")
+    assert len(mem._dirty_nodes) + len(mem._removed_nodes) <= mem.community_refresh_ratio * mem.graph.number_of_nodes()
+    _assert_communities_match_cold(mem)
+
+def test_build_messages_table_indexes_per_key_queries():
+    from sqlalchemy import MetaData
+    from multimind.memory.sqlalchemy import build_messages_table
+    table = build_messages_table(MetaData(), "chat")
+    assert [column.name for column in table.columns] == ["id", "memory_key", "role", "content", "timestamp", "metadata"]
+    assert {index.name: [column.name for column in index.columns] for index in table.indexes} == {
+        "ix_chat_memory_key_timestamp": ["memory_key", "timestamp"],
+        "ix_chat_memory_key_id": ["memory_key", "id"]
+    }
+
+def test_sqlalchemy_memory_bulk_inserts_scoped_by_memory_key(tmp_path):
+    from datetime import datetime, timedelta
+    from multimind.memory.sqlalchemy import SQLAlchemyMemory
+    url = f"sqlite:///{tmp_path / 'messages.db'}"
+    alice, bob = SQLAlchemyMemory(url, memory_key="alice"), SQLAlchemyMemory(url, memory_key="bob")
+    start = datetime.utcnow() - timedelta(seconds=1)
+    alice.add_messages([
+        {"role": "user" if i % 2 == 0 else "assistant", "content": f"a{i}", "metadata": {"i": i}}
+        for i in range(5)
+    ])
+    bob.add_message({"role": "user", "content": "b0"})
+    alice.add_messages([])
+
+    assert alice.get_message_count() == 5 and bob.get_message_count() == 1
+    messages = alice.get_messages()
+    assert [m["content"] for m in messages] == [f"a{i}" for i in range(5)]
+    assert messages[3]["metadata"] == {"i": 3}
+    # Keyset pagination walks back from the most recent messages
+    page = alice.get_messages(limit=2)
+    assert [m["content"] for m in page] == ["a3", "a4"]
+    assert [m["content"] for m in alice.get_messages(limit=2, before=page[0]["id"])] == ["a1", "a2"]
+    assert [m["content"] for m in alice.get_messages_by_role("assistant")] == ["a1", "a3"]
+    assert len(alice.get_messages_since(start)) == 5
+    assert alice.get_messages_since(datetime.utcnow() + timedelta(seconds=1)) == []
+
+    alice.clear()
+    assert alice.get_messages() == []
+    assert [m["content"] for m in bob.get_messages()] == ["b0"]
+    alice.close()
+    bob.close()
+
+def test_async_sqlalchemy_memory_with_aiosqlite(tmp_path):
+    import asyncio
+    pytest.importorskip("aiosqlite")
+    pytest.importorskip("greenlet")
+    from multimind.memory.sqlalchemy import AsyncSQLAlchemyMemory
+    url = f"sqlite+aiosqlite:///{tmp_path / 'messages.db'}"
+
+    async def run():
+        alice, bob = AsyncSQLAlchemyMemory(url, memory_key="alice"), AsyncSQLAlchemyMemory(url, memory_key="bob")
+        assert await alice.get_messages() == []
+        await alice.add_messages([{"role": "user", "content": f"a{i}"} for i in range(4)])
+        await bob.add_message({"role": "assistant", "content": "b0"})
+
+        assert await alice.get_message_count() == 4
+        page = await alice.get_messages(limit=3)
+        assert [m["content"] for m in page] == ["a1", "a2", "a3"]
+        assert [m["content"] for m in await alice.get_messages(before=page[0]["id"])] == ["a0"]
+        assert [m["content"] for m in await bob.get_messages_by_role("assistant")] == ["b0"]
+
+        await alice.clear()
+        assert await alice.get_message_count() == 0
+        assert await bob.get_message_count() == 1
+        await alice.close()
+        await bob.close()
+
+    asyncio.run(run())
+
+def test_sketch_batches_match_per_item_operations():
+    import numpy as np
+    pytest.importorskip("mmh3")
+    from multimind.memory.sketch import BloomFilter, CountMinSketch, HyperLogLog
+    keys = [f"memory_{i % 37}" for i in range(200)]
+    counts = [i % 5 + 1 for i in range(200)]
+    probes = keys[:50] + [f"absent_{i}" for i in range(50)]
+
+    batched, single = CountMinSketch(64, 4, seed=7), CountMinSketch(64, 4, seed=7)
+    batched.add_many(keys, counts)
+    for key, count in zip(keys, counts):
+        single.add(key, count)
+    assert np.array_equal(batched.counts, single.counts)
+    assert batched.estimate_many(probes).tolist() == [single.estimate(key) for key in probes]
+    assert batched.estimate_many([]).shape == (0,)
+
+    batched, single = BloomFilter(512, 5, seed=7), BloomFilter(512, 5, seed=7)
+    batched.add_many(keys)
+    for key in keys:
+        single.add(key)
+    assert np.array_equal(batched.bits, single.bits)
+    assert batched.contains_many(probes).tolist() == [single.contains(key) for key in probes]
+    assert all(batched.contains_many(keys))
+
+    batched, single = HyperLogLog(6, seed=7), HyperLogLog(6, seed=7)
+    batched.add_many(keys)
+    for key in keys:
+        single.add(key)
+    assert np.array_equal(batched.M, single.M)
+
+def test_sketch_merge_and_serialization_round_trip():
+    import asyncio
+    import numpy as np
+    pytest.importorskip("mmh3")
+    from multimind.memory.sketch import BloomFilter, CountMinSketch, HyperLogLog, SketchMemory
+    keys = [f"memory_{i}" for i in range(300)]
+    for make in (lambda: CountMinSketch(128, 4, seed=3), lambda: BloomFilter(2048, 5, seed=3), lambda: HyperLogLog(8, seed=3)):
+        left, right, whole = make(), make(), make()
+        left.add_many(keys[:150])
+        right.add_many(keys[150:])
+        whole.add_many(keys)
+        left.merge(right)
+        state = {CountMinSketch: "counts", BloomFilter: "bits", HyperLogLog: "M"}[type(whole)]
+        assert np.array_equal(getattr(left, state), getattr(whole, state))
+
+        restored = type(whole).from_bytes(whole.to_bytes())
+        assert np.array_equal(getattr(restored, state), getattr(whole, state))
+        assert restored.seed == whole.seed
+        assert getattr(restored, state).dtype == getattr(whole, state).dtype
+
+    with pytest.raises(ValueError):
+        CountMinSketch(128, 4, seed=1).merge(CountMinSketch(128, 4, seed=2))
+    with pytest.raises(ValueError):
+        BloomFilter(2048, 5, seed=1).merge(BloomFilter(1024, 5, seed=1))
+    with pytest.raises(ValueError):
+        HyperLogLog(8, seed=1).merge(HyperLogLog(6, seed=1))
+
+    class ConcreteSketchMemory(SketchMemory):
+        # SketchMemory leaves the message API abstract
+        add_message = get_messages = clear = save = load = lambda self, *args: None
+
+    async def run():
+        shard, other = ConcreteSketchMemory(sketch_seed=11), ConcreteSketchMemory(sketch_seed=11)
+        await shard.add_memories([{"id": f"a{i}", "content": "x"} for i in range(20)])
+        await other.add_memories([{"id": f"b{i}", "content": "y"} for i in range(20)])
+        other.merge_sketches(shard)
+        copy = ConcreteSketchMemory()
+        copy.import_sketches(other.export_sketches())
+        assert await copy.contains_memories(["a3", "b7"]) == [True, True]
+        assert await copy.estimate_frequencies(["a3", "b7"]) == await other.estimate_frequencies(["a3", "b7"])
+        assert await copy.estimate_cardinality() == await other.estimate_cardinality()
+
+    asyncio.run(run())
+
+def test_embedding_matrix_grows_and_ranks_by_cosine():
+    import numpy as np
+    from multimind.memory.federated import EmbeddingMatrix
+    matrix = EmbeddingMatrix(capacity=2)
+    assert matrix.data().shape == (0, 0) and matrix.top_k(np.ones(4), 3) == []
+    rng = np.random.default_rng(0)
+    vectors = {f"m{i}": rng.standard_normal(4) for i in range(5)}
+    for memory_id, vector in vectors.items():
+        matrix.set(memory_id, vector)
+    vectors["m1"] = rng.standard_normal(4)
+    matrix.set("m1", vectors["m1"])
+    assert len(matrix) == 5 and "m4" in matrix and matrix.data().shape == (5, 4)
+    np.testing.assert_allclose(matrix["m1"], vectors["m1"], rtol=1e-6)
+
+    query = rng.standard_normal(4)
+    cosine = {key: v @ query / (np.linalg.norm(v) * np.linalg.norm(query)) for key, v in vectors.items()}
+    top = sorted(matrix.top_k(query.astype(np.float32), 3), key=lambda pair: -pair[1])
+    assert [key for key, _ in top] == sorted(cosine, key=cosine.get, reverse=True)[:3]
+    np.testing.assert_allclose([sim for _, sim in top], sorted(cosine.values(), reverse=True)[:3], rtol=1e-5)
+
+@pytest.mark.parametrize("executor_type", ["thread", "process"])
+def test_federated_stacked_fedavg_matches_weighted_average(executor_type, monkeypatch):
+    import asyncio
+    import numpy as np
+    import torch
+    from multimind.memory import federated
+    from multimind.memory.federated import FederatedMemory, train_local_state
+
+    class ConcreteFederatedMemory(FederatedMemory):
+        # FederatedMemory leaves the message API abstract
+        add_message = get_messages = clear = save = load = lambda self, *args: None
+
+    # Training never touches the vector store, which would need an LLM
+    monkeypatch.setattr(federated, "VectorStoreMemory", lambda: None)
+
+    mem = ConcreteFederatedMemory(
+        num_clients=3, aggregation_rounds=1, local_epochs=2, batch_size=4,
+        executor_type=executor_type, max_workers=2
+    )
+    # Drop the DP noise so the average can be checked exactly
+    mem.noise_generator.add_noise = lambda data: data
+    rng = np.random.default_rng(0)
+    sizes = {0: 3, 1: 6, 2: 9}
+    for client_id, size in sizes.items():
+        for i in range(size):
+            mem.client_embeddings[client_id].set(f"c{client_id}_{i}", rng.standard_normal(128))
+
+    global_state = {key: value.clone() for key, value in mem.global_model.state_dict().items()}
+    local_states = [
+        train_local_state(global_state, mem.client_embeddings[client_id].data(), 2, 4)
+        for client_id in sizes
+    ]
+    total = sum(sizes.values())
+    expected = {
+        key: sum(state[key] * size / total for state, size in zip(local_states, sizes.values()))
+        for key in global_state
+    }
+
+    async def run():
+        try:
+            await mem.train_federated_model()
+        finally:
+            await mem.close()
+
+    asyncio.run(run())
+    assert mem.aggregation_history[0]["num_clients"] == 3
+    for key, value in mem.global_model.state_dict().items():
+        torch.testing.assert_close(value, expected[key], rtol=1e-4, atol=1e-5)
+
+    # Without weights the stack is a plain mean
+    mem._aggregate_updates(local_states)
+    for key, value in mem.global_model.state_dict().items():
+        torch.testing.assert_close(value, sum(state[key] for state in local_states) / 3)
+
+class _HashEmbeddingLLM:
+    """Deterministic stand-in for the embedding model."""
+
+    async def embeddings(self, text):
+        import numpy as np
+        return np.random.default_rng(sum(map(ord, text))).standard_normal(16).tolist()
+
+def _dnc(tmp_path, sparse, **kwargs):
+    from multimind.memory.dnc import DNCMemory
+    return DNCMemory(
+        _HashEmbeddingLLM(), storage_path=str(tmp_path / "dnc.json"),
+        memory_size=32, word_size=16, num_read_heads=2, sparse_access=sparse,
+        enable_optimization=False, enable_analysis=False, enable_backup=False, **kwargs
+    )
+
+def _dnc_links(mem):
+    if mem.sparse_access:
+        return {(row, col): w for row, cols in mem.link_matrix.items() for col, w in cols.items()}
+    return {(int(r), int(c)): mem.link_matrix[r, c] for r, c in zip(*mem.link_matrix.nonzero())}
+
+@pytest.mark.parametrize("saved_sparse", [False, True])
+@pytest.mark.parametrize("loaded_sparse", [False, True])
+def test_dnc_save_and_load_across_access_modes(tmp_path, saved_sparse, loaded_sparse):
+    import asyncio
+    import numpy as np
+
+    async def run():
+        mem = _dnc(tmp_path, saved_sparse)
+        for i in range(6):
+            await mem.add_message({"content": f"message {i}"})
+        await mem.save()
+
+        loaded = _dnc(tmp_path, loaded_sparse)
+        assert [m["content"] for m in loaded.get_messages()] == [f"message {i}" for i in range(6)]
+        assert loaded.item_embeddings == mem.item_embeddings
+        np.testing.assert_allclose(loaded.memory_matrix, mem.memory_matrix, rtol=1e-6)
+        assert _dnc_links(loaded) == _dnc_links(mem) and len(_dnc_links(mem)) == 5
+        if loaded_sparse:
+            assert len(loaded.read_weighting) == 2 and loaded.read_weighting[0]
+        else:
+            assert loaded.read_weighting.shape == (2, 32) and loaded.read_weighting.any()
+
+        # The reloaded memory keeps working in its own mode
+        await loaded.add_message({"content": "after reload"})
+        assert loaded.items[-1]["metadata"]["read_heads"]
+        assert len(_dnc_links(loaded)) == 6
+
+    asyncio.run(run())
+
+def test_dnc_sparse_saves_are_batched_and_binary(tmp_path):
+    import asyncio
+    import json
+
+    async def run():
+        mem = _dnc(tmp_path, True, save_every=3)
+        for i in range(2):
+            await mem.add_message({"content": f"message {i}"})
+        assert not (tmp_path / "dnc.json").exists()
+        await mem.add_message({"content": "message 2"})
+        data = json.loads((tmp_path / "dnc.json").read_text())
+        assert "memory_matrix" not in data and "item_embeddings" not in data
+        assert (tmp_path / data["arrays_file"]).exists()
+        assert len(_dnc(tmp_path, True).items) == 3
+
+    asyncio.run(run())
+
+def test_dnc_loads_legacy_all_json_files(tmp_path):
+    import json
+    import numpy as np
+    link_matrix = np.zeros((32, 32))
+    link_matrix[0, 1] = 1
+    (tmp_path / "dnc.json").write_text(json.dumps({
+        "memory_matrix": np.ones((32, 16)).tolist(),
+        "usage_vector": [1.0] * 2 + [0.0] * 30,
+        "link_matrix": link_matrix.tolist(),
+        "write_weighting": np.zeros((1, 32)).tolist(),
+        "read_weighting": np.zeros((2, 32)).tolist(),
+        "items": [{"content": "old", "timestamp": "2024-01-01T00:00:00"}],
+        "item_embeddings": [[1.0] * 16]
+    }))
+    mem = _dnc(tmp_path, True)
+    assert mem.link_matrix == {0: {1: 1.0}}
+    assert mem.memory_matrix.dtype == np.float32
+    assert [m["content"] for m in mem.get_messages()] == ["old"]
+
+def test_summary_tree_merges_and_prefix_cover():
+    import asyncio
+    from multimind.memory.summary import SummaryTree
+
+    async def merge(contents):
+        return "+".join(contents)
+
+    async def run():
+        tree = SummaryTree(fanout=2)
+        for i in range(5):
+            await tree.append(str(i), 1, merge)
+        assert tree.depth == 3
+        assert [n["content"] for n in tree.cover(5)] == ["0+1+2+3", "4"]
+        assert await tree.summarize_prefix(3, merge) == "0+1+2"
+        tree.prune(4)
+        assert [n["content"] for n in tree.cover(5)] == ["0+1+2+3", "4"]
+
+    asyncio.run(run())
+
+def test_benchmark_helpers_are_deterministic():
+    import numpy as np
+    from multimind.memory.benchmark import FakeEmbedder, OperationStats, generate_messages
+    assert generate_messages(3) == generate_messages(3)
+    embedder = FakeEmbedder(dim=16)
+    assert np.allclose(embedder("hello"), embedder("hello"))
+    stats = OperationStats.from_samples([0.001, 0.002, 0.003, 0.004])
+    assert stats.count == 4
+    assert stats.p50_ms == 2.5
+
+@pytest.mark.skipif(not hasattr(signal, "setitimer"), reason="needs SIGALRM")
+def test_benchmark_budget_stops_a_hung_add_in_process():
+    import asyncio
+    import time
+    from multimind.memory.benchmark import benchmark_memory
+
+    class HangingMemory:
+        def __init__(self):
+            self.messages = []
+
+        def add_message(self, message):
+            self.messages.append(message)
+            while len(self.messages) == 3:
+                time.sleep(0.01)
+
+        def get_messages(self):
+            return self.messages
+
+        def save(self):
+            pass
+
+        def load(self):
+            pass
+
+    start = time.perf_counter()
+    result = asyncio.run(benchmark_memory(
+        HangingMemory, 10, queries=5, max_seconds=0.3,
+        factory=lambda memory_class, *args: memory_class()
+    ))
+    assert time.perf_counter() - start < 5
+    assert result.error is None
+    assert result.truncated
+    assert result.items_added == 2
+    assert set(result.operations) == {"add", "get", "save", "load"}
+
+def test_array_htm_memory_messages_and_stats():
+    import asyncio
+    from multimind.memory.htm import ArrayHTMMemory
+
+    async def run():
+        mem = ArrayHTMMemory(input_size=64, num_columns=128, seed=0)
+        for i in range(3):
+            await mem.add_message({"role": "user", "content": f"message {i}"})
+        assert [m["content"] for m in mem.get_messages()] == ["message 0", "message 1", "message 2"]
+        stats = await mem.get_stats()
+        assert stats["total_sequences"] == 3
+        assert type(stats["avg_anomaly_score"]) is float
+        await mem.clear()
+        assert mem.get_messages() == []
+        assert (await mem.get_stats())["unique_sequences"] == 0
+
+    asyncio.run(run())
+
+def _working_item(i):
+    from multimind.memory.hybrid_memory import WorkingMemory
+    return WorkingMemory(
+        content=f"item {i}", timestamp=float(i), importance=0.5, tokens=3, metadata={},
+        embedding=[1.0, float(i), 0.0], priority=1.0, expiration=None, dependencies=[], state="active"
+    )
+
+def test_tiered_store_reuses_record_slots(tmp_path):
+    pytest.importorskip("transformers")
+    from multimind.memory.hybrid_memory import TieredMemoryStore
+    store = TieredMemoryStore(str(tmp_path), hot_capacity=2, warm_capacity=3)
+    ids = [store.add(_working_item(i)) for i in range(10)]
+    for item_id in ids:
+        store.get(item_id)
+    size = store._records_path.stat().st_size
+    for _ in range(5):
+        for item_id in ids:
+            store.get(item_id)
+    assert store._records_path.stat().st_size == size
+    assert store.get_stats()["items"] == {"hot": 2, "warm": 3, "cold": 5}
+
+    # A record that outgrows its slot is appended; compaction drops the old slot
+    grown = _working_item(0)
+    grown.content = "item 0 " * 100
+    store._write_record(ids[0], grown)
+    assert store._records_path.stat().st_size > size
+    store.compact_records()
+    assert store._records_path.stat().st_size == store._live_bytes
+    assert store._read_record(ids[0]).content == grown.content
+
+def test_tiered_store_restores_tiers_and_removes_temp_dir(tmp_path):
+    pytest.importorskip("transformers")
+    from multimind.memory.hybrid_memory import TieredMemoryStore
+    store = TieredMemoryStore(str(tmp_path), hot_capacity=2, warm_capacity=3)
+    ids = [store.add(_working_item(i)) for i in range(8)]
+    stats = store.get_stats()
+    store.close()
+
+    restored = TieredMemoryStore(str(tmp_path), hot_capacity=2, warm_capacity=3)
+    assert restored.get_stats() == stats
+    assert [restored.get(item_id).content for item_id in ids] == [f"item {i}" for i in range(8)]
+    assert restored.add(_working_item(8)) == 8
+
+    temporary = TieredMemoryStore(hot_capacity=1)
+    temporary.add(_working_item(0))
+    temporary.add(_working_item(1))
+    temporary.close()
+    assert not temporary.storage_dir.exists()
@@ -0,0 +1,39 @@
+import math
+import pytest
+from multimind.core.exceptions import RateLimitError
+from multimind.core.monitoring import ModelMonitor, TokenBucket
+
+
+@pytest.mark.asyncio
+async def test_models_without_limits_are_never_throttled():
+    monitor = ModelMonitor()
+    for _ in range(500):
+        await monitor.acquire("unconfigured", tokens=10_000, timeout=0.1)
+    assert monitor.try_acquire("unconfigured", tokens=10_000)
+    assert not monitor.is_throttled("unconfigured")
+    assert monitor.estimate_wait("unconfigured") == 0.0
+
+
+@pytest.mark.asyncio
+async def test_configured_limits_are_enforced():
+    monitor = ModelMonitor()
+    monitor.set_rate_limits("limited", requests_per_minute=2, tokens_per_minute=1000)
+    assert monitor.try_acquire("limited")
+    await monitor.acquire("limited", timeout=0.1)
+    assert monitor.is_throttled("limited")
+    assert not monitor.try_acquire("limited")
+    assert not await monitor.check_rate_limit("limited", 0)
+    assert monitor.estimate_wait("limited") > 0
+
+
+@pytest.mark.asyncio
+async def test_zero_limits_deny_every_request():
+    assert TokenBucket(0, 0).time_until(1) == math.inf
+    monitor = ModelMonitor()
+    monitor.set_rate_limits("closed", requests_per_minute=0, tokens_per_minute=1000)
+    assert not monitor.try_acquire("closed")
+    assert monitor.is_throttled("closed")
+    assert monitor.estimate_wait("closed") == math.inf
+    assert monitor.get_backpressure("closed")["request_utilization"] == 1.0
+    with pytest.raises(RateLimitError):
+        await monitor.acquire("closed")
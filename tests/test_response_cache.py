@@ -0,0 +1,140 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+from multimind.core import response_cache
+from multimind.core.response_cache import (
+    InMemoryCacheBackend,
+    RequestCoalescer,
+    ResponseCache,
+    SQLiteCacheBackend,
+    make_cache_key
+)
+
+GREEDY = {"temperature": 0}
+
+
+class Counter:
+    """Async factory that counts calls and returns a fresh mutable response."""
+
+    def __init__(self, value="answer", delay=0.0, fail=False):
+        self.value = value
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("provider error")
+        return {"text": self.value} if self.value is not None else None
+
+
+@pytest.mark.asyncio
+async def test_coalescer_runs_concurrent_calls_once():
+    coalescer = RequestCoalescer()
+    factory = Counter(delay=0.05)
+    results = await asyncio.gather(*(coalescer.run("k", factory) for _ in range(5)))
+    assert factory.calls == 1
+    assert all(result == {"text": "answer"} for result in results)
+    assert "k" not in coalescer
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_requests_share_one_call():
+    cache = ResponseCache()
+    factory = Counter(delay=0.05)
+    results = await asyncio.gather(*(cache.get_or_compute("k", factory, GREEDY) for _ in range(3)))
+    assert factory.calls == 1
+    assert [cached for _, cached in results] == [False, True, True]
+    assert cache.stats["coalesced"] == 2
+    # Followers get their own copy of the leader's response
+    results[1][0]["text"] = "changed"
+    assert results[0][0] == {"text": "answer"}
+
+
+@pytest.mark.asyncio
+async def test_only_deterministic_requests_are_cached():
+    cache = ResponseCache()
+    factory = Counter()
+    for params in ({"temperature": 0.7}, {}, {"temperature": 0.7}):
+        assert (await cache.get_or_compute("k", factory, params))[1] is False
+    assert cache.stats["bypassed"] == 3
+    await cache.get_or_compute("k", factory, {"temperature": 0.7, "seed": 1})
+    assert (await cache.get_or_compute("k", factory, {"temperature": 0.7, "seed": 1}))[1] is True
+    assert factory.calls == 4
+
+    sampled = ResponseCache(cache_sampled=True)
+    await sampled.get_or_compute("k", factory, {"temperature": 0.7})
+    assert (await sampled.get_or_compute("k", factory, {"temperature": 0.7}))[1] is True
+
+
+@pytest.mark.asyncio
+async def test_none_responses_are_cached():
+    cache = ResponseCache()
+    factory = Counter(value=None)
+    assert await cache.get_or_compute("k", factory, GREEDY) == (None, False)
+    assert await cache.get_or_compute("k", factory, GREEDY) == (None, True)
+    assert factory.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_hits_are_copies():
+    cache = ResponseCache()
+    first, _ = await cache.get_or_compute("k", Counter(), GREEDY)
+    first["text"] = "mutated by caller"
+    hit, cached = await cache.get_or_compute("k", Counter(), GREEDY)
+    assert cached and hit == {"text": "answer"}
+    hit["text"] = "mutated again"
+    assert (await cache.get_or_compute("k", Counter(), GREEDY))[0] == {"text": "answer"}
+
+
+@pytest.mark.asyncio
+async def test_failures_are_not_cached():
+    cache = ResponseCache()
+    failing = Counter(fail=True, delay=0.01)
+    results = await asyncio.gather(
+        *(cache.get_or_compute("k", failing, GREEDY) for _ in range(2)), return_exceptions=True
+    )
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert failing.calls == 1
+    assert len(cache.backend) == 0
+    assert await cache.get_or_compute("k", Counter(), GREEDY) == ({"text": "answer"}, False)
+
+
+def test_in_memory_backend_ttl_and_lru():
+    backend = InMemoryCacheBackend(max_size=2)
+    backend.set("a", 1)
+    backend.set("b", 2)
+    backend.get("a")
+    backend.set("c", 3)
+    assert backend.get("b") is None
+    assert backend.get("a") == 1 and backend.get("c") == 3
+    backend.set("short", 4, ttl=0)
+    assert backend.get("short", "missing") == "missing"
+
+
+def test_sqlite_backend_ttl_lru_and_persistence(tmp_path, monkeypatch):
+    path = tmp_path / "cache.db"
+    backend = SQLiteCacheBackend(path, max_size=2)
+    clock = iter(range(100, 200))
+    monkeypatch.setattr(response_cache, "time", SimpleNamespace(time=lambda: next(clock)))
+    backend.set("a", {"text": "a"})
+    backend.set("b", {"text": "b"})
+    assert backend.get("a") == {"text": "a"}
+    backend.set("c", {"text": "c"})
+    assert backend.get("b") is None
+    backend.set("expiring", None, ttl=1)
+    assert backend.get("expiring", "missing") == "missing"
+    backend.set("none", None)
+    backend.close()
+
+    reopened = SQLiteCacheBackend(path, max_size=2)
+    assert reopened.get("none", "missing") is None
+    assert len(reopened) == 2
+    reopened.close()
+
+
+def test_cache_key_is_stable_and_order_independent():
+    assert make_cache_key("m", {"a": 1, "b": 2}, "hi") == make_cache_key("m", {"b": 2, "a": 1}, "hi")
+    assert make_cache_key("m", {"a": 1}, "hi") != make_cache_key("m", {"a": 1}, "hello")
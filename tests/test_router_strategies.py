@@ -0,0 +1,208 @@
+import asyncio
+import time
+import pytest
+from multimind.core.exceptions import RateLimitError
+from multimind.core.monitoring import ModelMonitor
+from multimind.core.router import Router, RoutingStrategy, TaskConfig, TaskType
+
+
+class FakeResult:
+    def __init__(self, provider):
+        self.provider = provider
+        self.metadata = {}
+
+
+class FakeProvider:
+    """Answers after ``delay`` seconds (or raises if ``fail``) and records cancellation."""
+
+    def __init__(self, name, delay, fail=False):
+        self.name = name
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+        self.cancelled = False
+        self.kwargs = None
+
+    async def generate_text(self, prompt, **kwargs):
+        self.calls += 1
+        self.kwargs = kwargs
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.fail:
+            raise RuntimeError(f"{self.name} failed")
+        return FakeResult(self.name)
+
+
+@pytest.fixture
+def make_router(tmp_path, monkeypatch):
+    # MetricsCollector writes its log under the working directory
+    monkeypatch.chdir(tmp_path)
+
+    def make(strategy, providers, fallback=(), **config):
+        router = Router()
+        for provider in list(providers) + list(fallback):
+            router.register_provider(provider.name, provider)
+        router.configure_task(TaskType.TEXT_GENERATION, TaskConfig(
+            preferred_providers=[p.name for p in providers],
+            fallback_providers=[p.name for p in fallback],
+            routing_strategy=strategy,
+            **config
+        ))
+        return router
+
+    return make
+
+
+@pytest.mark.asyncio
+async def test_ensemble_returns_at_quorum_and_cancels_stragglers(make_router):
+    a, b, c = FakeProvider("a", 0.01), FakeProvider("b", 0.02), FakeProvider("c", 5)
+    router = make_router(RoutingStrategy.ENSEMBLE, [a, b, c], ensemble_config={"quorum": 2})
+    start = time.monotonic()
+    result = await router.route(TaskType.TEXT_GENERATION, "hi")
+    assert time.monotonic() - start < 1
+    assert result.provider == "a"
+    assert c.cancelled and not a.cancelled and not b.cancelled
+
+
+@pytest.mark.asyncio
+async def test_ensemble_exits_early_on_confidence(make_router):
+    a, b, c = FakeProvider("a", 0.01), FakeProvider("b", 5), FakeProvider("c", 5)
+    router = make_router(RoutingStrategy.ENSEMBLE, [a, b, c], ensemble_config={
+        "weights": {"a": 3.0, "b": 1.0, "c": 1.0},
+        "confidence_threshold": 0.5
+    })
+    start = time.monotonic()
+    result = await router.route(TaskType.TEXT_GENERATION, "hi")
+    assert time.monotonic() - start < 1
+    assert result.provider == "a"
+    assert b.cancelled and c.cancelled
+
+
+@pytest.mark.asyncio
+async def test_ensemble_quorum_counts_only_successes(make_router):
+    a, b, c = FakeProvider("a", 0.01, fail=True), FakeProvider("b", 0.02), FakeProvider("c", 0.03)
+    router = make_router(RoutingStrategy.ENSEMBLE, [a, b, c], ensemble_config={
+        "quorum": 2,
+        "method": "weighted_voting",
+        "weights": {"a": 5.0, "b": 1.0, "c": 2.0}
+    })
+    result = await router.route(TaskType.TEXT_GENERATION, "hi")
+    assert result.provider == "c"
+    assert [m.provider for m in router.metrics.get_metrics("Error")] == ["a"]
+
+
+@pytest.mark.asyncio
+async def test_ensemble_zero_timeout_is_a_timeout(make_router):
+    a, b = FakeProvider("a", 0.01), FakeProvider("b", 0.05)
+    router = make_router(RoutingStrategy.ENSEMBLE, [a, b], ensemble_config={
+        "quorum": 1,
+        "provider_timeouts": {"a": 0}
+    })
+    result = await router.route(TaskType.TEXT_GENERATION, "hi")
+    assert result.provider == "b"
+
+
+@pytest.mark.asyncio
+async def test_ensemble_all_failed(make_router):
+    a, b = FakeProvider("a", 0.01, fail=True), FakeProvider("b", 0.01, fail=True)
+    router = make_router(RoutingStrategy.ENSEMBLE, [a, b], ensemble_config={"quorum": 1})
+    with pytest.raises(Exception, match="All providers failed in ensemble routing"):
+        await router.route(TaskType.TEXT_GENERATION, "hi")
+
+
+@pytest.mark.asyncio
+async def test_cascade_hedge_takes_first_success_and_cancels_loser(make_router):
+    slow, fast = FakeProvider("slow", 5), FakeProvider("fast", 0.01)
+    router = make_router(
+        RoutingStrategy.CASCADE, [slow], fallback=[fast],
+        cascade_config={"hedge": True, "hedge_delay": 0.05}
+    )
+    start = time.monotonic()
+    result = await router.route(TaskType.TEXT_GENERATION, "hi")
+    assert time.monotonic() - start < 1
+    assert result.provider == "fast"
+    assert slow.cancelled and fast.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_cascade_without_hedge_waits_for_primary(make_router):
+    primary, backup = FakeProvider("primary", 0.1), FakeProvider("backup", 0.01)
+    router = make_router(RoutingStrategy.CASCADE, [primary], fallback=[backup])
+    result = await router.route(TaskType.TEXT_GENERATION, "hi")
+    assert result.provider == "primary"
+    assert backup.calls == 0
+
+
+@pytest.mark.asyncio
+async def test_cascade_deadline_raises_timeout(make_router):
+    a, b = FakeProvider("a", 5), FakeProvider("b", 5)
+    router = make_router(
+        RoutingStrategy.CASCADE, [a], fallback=[b],
+        cascade_config={"hedge": True, "hedge_delay": 0.05, "deadline": 0.2}
+    )
+    start = time.monotonic()
+    with pytest.raises(asyncio.TimeoutError, match="deadline"):
+        await router.route(TaskType.TEXT_GENERATION, "hi")
+    assert time.monotonic() - start < 1
+    assert a.cancelled and b.cancelled
+
+
+@pytest.mark.asyncio
+async def test_cascade_aggregates_errors_when_all_fail(make_router):
+    a, b = FakeProvider("a", 0.01, fail=True), FakeProvider("b", 0.01, fail=True)
+    router = make_router(RoutingStrategy.CASCADE, [a], fallback=[b])
+    with pytest.raises(Exception, match="All providers failed in cascade routing") as info:
+        await router.route(TaskType.TEXT_GENERATION, "hi")
+    assert "a: a failed" in str(info.value)
+    assert "b: b failed" in str(info.value)
+
+
+@pytest.mark.asyncio
+async def test_provider_calls_consume_rate_limit_budget(make_router):
+    a, b = FakeProvider("a", 0), FakeProvider("b", 0)
+    router = make_router(RoutingStrategy.COST_BASED, [a, b])
+    router.monitor = ModelMonitor()
+    router.monitor.set_rate_limits("a", requests_per_minute=1, tokens_per_minute=1000)
+    router.performance_tracker.record("a", success=True, latency=0.001)
+    router.performance_tracker.record("b", success=True, latency=1.0)
+    first = await router.route(TaskType.TEXT_GENERATION, "one", max_tokens=10)
+    assert first.provider == "a"
+    # a's single request is spent, so the next call is routed around it
+    assert router.monitor.is_throttled("a")
+    second = await router.route(TaskType.TEXT_GENERATION, "two", max_tokens=10)
+    assert second.provider == "b"
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_wait_is_not_provider_latency_and_tenant_is_forwarded(make_router):
+    a = FakeProvider("a", 0)
+    router = make_router(RoutingStrategy.COST_BASED, [a])
+    tenants = []
+
+    async def slow_acquire(model, tokens=0, tenant="default", timeout=None):
+        tenants.append(tenant)
+        await asyncio.sleep(0.2)
+
+    router.monitor = ModelMonitor()
+    router.monitor.acquire = slow_acquire
+    await router.route(TaskType.TEXT_GENERATION, "hi", tenant="acme")
+    await router.route(TaskType.TEXT_GENERATION, "hi")
+    assert tenants == ["acme", "default"]
+    assert "tenant" not in a.kwargs
+    assert max(router.performance_tracker.metrics["a"]["latency"]) < 0.1
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_rejection_is_not_a_provider_failure(make_router):
+    a = FakeProvider("a", 0)
+    router = make_router(RoutingStrategy.COST_BASED, [a])
+    router.monitor = ModelMonitor()
+    router.monitor.set_rate_limits("a", requests_per_minute=0, tokens_per_minute=0)
+    with pytest.raises(RateLimitError):
+        await router.route(TaskType.TEXT_GENERATION, "hi")
+    assert a.calls == 0
+    assert router.fallback_policy.failure_counts.get("a", 0) == 0
+    assert "a" not in router.performance_tracker.metrics
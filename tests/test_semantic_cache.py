@@ -0,0 +1,148 @@
+from dataclasses import replace
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from multimind.core.router import Router, RoutingStrategy, TaskConfig, TaskType
+from multimind.core.semantic_cache import SemanticResponseCache
+
+
+class FakeVectorStore:
+    """Brute-force cosine search over added vectors."""
+
+    def __init__(self):
+        self.vectors, self.metadata = [], []
+
+    async def add_vectors(self, vectors, metadatas, documents):
+        self.vectors.extend(np.asarray(v) for v in vectors)
+        self.metadata.extend(metadatas)
+
+    async def search(self, vector, k):
+        scores = [float(np.dot(v, vector)) for v in self.vectors]
+        order = np.argsort(scores)[::-1][:k]
+        return [SimpleNamespace(metadata=self.metadata[i]) for i in order]
+
+    async def clear(self):
+        self.vectors, self.metadata = [], []
+
+
+def embed(text):
+    # Near-duplicate texts (same words, different punctuation) embed identically
+    vector = np.zeros(32)
+    for word in text.lower().replace("?", "").replace("!", "").split():
+        vector[hash(word) % 32] += 1
+    return vector
+
+
+class FakeProvider:
+    def __init__(self):
+        self.calls = []
+
+    async def generate_text(self, prompt, **kwargs):
+        self.calls.append(prompt)
+        return SimpleNamespace(provider="fake", text=f"answer to {prompt}", metadata={})
+
+    async def generate_embeddings(self, text, **kwargs):
+        self.calls.append(text)
+        return SimpleNamespace(provider="fake", embedding=embed(text).tolist(), metadata={})
+
+
+@pytest.fixture
+def make_router(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    def make(**cache_kwargs):
+        provider = FakeProvider()
+        router = Router(semantic_cache=SemanticResponseCache(embed, FakeVectorStore(), **cache_kwargs))
+        router.register_provider("fake", provider)
+        for task_type in (TaskType.TEXT_GENERATION, TaskType.EMBEDDINGS):
+            router.configure_task(task_type, TaskConfig(
+                preferred_providers=["fake"],
+                fallback_providers=[],
+                routing_strategy=RoutingStrategy.COST_BASED
+            ))
+        return router, provider
+
+    return make
+
+
+def test_task_types_are_opt_in_and_never_include_embeddings():
+    cache = SemanticResponseCache(embed, FakeVectorStore())
+    assert cache.enabled_for("text_generation")
+    assert not cache.enabled_for("image_analysis")
+    assert not cache.enabled_for("embeddings")
+    assert not SemanticResponseCache(embed, FakeVectorStore(), task_types=()).enabled_for("text_generation")
+    with pytest.raises(ValueError):
+        SemanticResponseCache(embed, FakeVectorStore(), task_types=["text_generation", "embeddings"])
+
+
+@pytest.mark.asyncio
+async def test_similar_deterministic_prompts_share_a_response(make_router):
+    router, provider = make_router()
+    first = await router.route(TaskType.TEXT_GENERATION, "What is the capital of France?", temperature=0)
+    second = await router.route(TaskType.TEXT_GENERATION, "what is the capital of france!", temperature=0)
+    assert second.text == first.text
+    assert len(provider.calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_hits_are_copies_of_the_cached_response():
+    cache = SemanticResponseCache(embed, FakeVectorStore())
+    response = {"text": "Paris"}
+    await cache.store("What is the capital of France?", response)
+    response["text"] = "mutated before the hit"
+    hit = await cache.lookup("what is the capital of france!")
+    assert hit == {"text": "Paris"}
+    hit["text"] = "mutated by caller"
+    assert await cache.lookup("what is the capital of france!") == {"text": "Paris"}
+
+
+@pytest.mark.asyncio
+async def test_sampled_prompts_bypass_the_semantic_cache(make_router):
+    router, provider = make_router()
+    for prompt in ("Tell me a story?", "tell me a story!"):
+        await router.route(TaskType.TEXT_GENERATION, prompt, temperature=0.8)
+    assert len(provider.calls) == 2
+    assert not router.semantic_cache.entries
+
+    router, provider = make_router(cache_sampled=True)
+    for prompt in ("Tell me a story?", "tell me a story!"):
+        await router.route(TaskType.TEXT_GENERATION, prompt, temperature=0.8)
+    assert len(provider.calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_near_duplicate_embedding_inputs_get_their_own_vectors(make_router):
+    router, provider = make_router()
+    first = await router.route(TaskType.EMBEDDINGS, "Hello world?")
+    second = await router.route(TaskType.EMBEDDINGS, "hello world!")
+    assert provider.calls == ["Hello world?", "hello world!"]
+    assert second is not first
+
+
+class FakeLLM:
+    model_name = "fake"
+
+    def __init__(self):
+        self.calls = []
+
+    async def generate(self, prompt, **kwargs):
+        self.calls.append(prompt)
+        return f"answer to {prompt}"
+
+
+@pytest.mark.asyncio
+async def test_llm_interface_only_shares_deterministic_generations():
+    from multimind.llm.llm_interface import LLMInterface
+    llm = FakeLLM()
+    interface = LLMInterface({"fake": llm}, "fake", semantic_cache=SemanticResponseCache(embed, FakeVectorStore()))
+    # The default generation config samples at temperature 0.7
+    for prompt in ("Tell me a story?", "tell me a story!"):
+        await interface.generate(prompt)
+    assert len(llm.calls) == 2
+    assert not interface.semantic_cache.entries
+
+    greedy = replace(interface._get_default_config(llm), temperature=0)
+    await interface.generate("Tell me a story?", config=greedy)
+    result = await interface.generate("tell me a story!", config=greedy)
+    assert len(llm.calls) == 3
+    assert result.metadata.get("cached") is True